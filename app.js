@@ -1,13 +1,36 @@
 const express = require("express");
 const path = require("path");
-const { spawn } = require("child_process");
+const { PythonPool } = require("./lib/pythonPool");
+const { SocketPool } = require("./lib/socketPool");
+const { parseBatchBody, normalizeItem, runBatch, MAX_ITEMS } = require("./lib/batch");
+const { evaluateStream, streamSse, STREAM_MAX_CHARS } = require("./lib/stream");
+const { observeTiming, observeWait, renderMetrics } = require("./lib/metrics");
+const { AdmissionGate, Coalescer } = require("./lib/admission");
+const { SessionStore } = require("./lib/sessions");
+const { JobQueue, JOB_MAX_ITEMS } = require("./lib/jobs");
 
 const app = express();
 const PORT = process.env.PORT || 3000;
+// teks di atas batas ini dinilai lewat mode stream (per paragraf), bukan pool worker
+const MAX_TEXT_CHARS = parseInt(process.env.MAX_TEXT_CHARS || "", 10) || 20000;
 
 app.set("view engine", "ejs");
 app.set("views", path.join(__dirname, "views"));
 
+// batch: body besar (JSON array / JSONL), dipasang sebelum parser global 1mb
+app.use(
+  "/api/evaluate/batch",
+  express.json({ limit: "20mb" }),
+  express.text({ type: ["application/x-ndjson", "application/jsonl", "text/plain"], limit: "20mb" })
+);
+// job: satu sekolah sekaligus (ribuan teks)
+app.use(
+  "/api/jobs",
+  express.json({ limit: process.env.JOB_MAX_BODY || "100mb" }),
+  express.text({ type: ["application/x-ndjson", "application/jsonl", "text/plain"], limit: process.env.JOB_MAX_BODY || "100mb" })
+);
+// teks panjang (JSON); body text/plain untuk /api/evaluate/stream tidak di-parse, dialirkan langsung
+app.use("/api/evaluate", express.json({ limit: STREAM_MAX_CHARS * 4 })); // utf-8: maks 4 byte per karakter
 app.use(express.json({ limit: "1mb" }));
 app.use(express.urlencoded({ extended: true }));
 
@@ -31,35 +54,123 @@ const TEXT_TYPES = [
   { key: "biografi", name: "Teks Biografi", desc: "Judul, Orientasi, Peristiwa penting, Reorientasi." }
 ];
 
-function pickPythonCmd() {
-  if (process.env.PYTHON && process.env.PYTHON.trim()) return process.env.PYTHON.trim();
-  return process.platform === "win32" ? "python" : "python3";
+// ✅ worker Python hidup lama (kamus dimuat sekali per worker, bukan per request).
+// EVAL_SOCKET / EVAL_SERVE=1: server pre-fork, kamus dimuat sekali lalu dibagi antar worker;
+// EVAL_SERVE=threads: satu proses Python dengan satu thread per slot pool
+const pool =
+  process.env.EVAL_SOCKET || ["1", "threads"].includes(process.env.EVAL_SERVE)
+    ? new SocketPool({ onTiming: observeTiming })
+    : new PythonPool({ onTiming: observeTiming });
+
+function runPython({ type, text, profile, spellFix, fields, excerpts, fixText, parallel, school, similar, submission }) {
+  const payload = { type, text };
+  if (school) payload.school = school;
+  if (similar) payload.similar = true;
+  if (submission) payload.submission = submission;
+  if (parallel) payload.parallel = true;
+  if (profile) payload.profile = true;
+  if (spellFix) payload.spell_fix = true;
+  if (fields) payload.fields = fields;
+  if (excerpts) payload.excerpts = true;
+  if (fixText) payload.fix_text = true;
+  return pool.run(payload);
 }
 
-function runPython({ type, text }) {
-  return new Promise((resolve, reject) => {
-    const py = pickPythonCmd();
-    const scriptPath = path.join(__dirname, "python", "poem_eval.py"); // ✅ tetap poem_eval.py
-    const child = spawn(py, [scriptPath], { stdio: ["pipe", "pipe", "pipe"] });
-
-    let out = "";
-    let err = "";
-
-    child.stdout.on("data", (d) => (out += d.toString()));
-    child.stderr.on("data", (d) => (err += d.toString()));
-
-    child.on("close", (code) => {
-      if (code !== 0) return reject(new Error(err || out || `Python exit ${code}`));
-      try {
-        resolve(JSON.parse(out));
-      } catch {
-        reject(new Error("Output python bukan JSON. Output: " + (out || err)));
-      }
-    });
-
-    child.stdin.write(JSON.stringify({ type, text }));
-    child.stdin.end();
-  });
+// batas evaluasi bersamaan (pool + stream + batch) dengan antrean terbatas;
+// request identik yang sedang dinilai menumpang hasil yang sama
+const gate = new AdmissionGate({ onWait: observeWait });
+const coalescer = new Coalescer();
+// sesi editor (umpan balik saat mengetik)
+const sessions = new SessionStore();
+// antrean job besar (SQLite, dilanjutkan setelah restart)
+const jobs = new JobQueue();
+
+function sendBusy(res, e) {
+  if (e.retryAfter) res.set("Retry-After", String(e.retryAfter));
+  else if (e.code === "QUEUE_FULL") res.set("Retry-After", "5");
+  return res.status(e.status || 500).json({ ok: false, message: e.message || "Server error" });
+}
+
+// ?profile=1 -> waktu per tahap & per aturan EYD di breakdown.meta.timing (melewati cache)
+function wantProfile(req) {
+  return ["1", "true", "yes"].includes(String(req.query.profile || "").toLowerCase());
+}
+
+// opsi ya/tidak dari body atau query (?nama=1)
+function wantFlag(req, name) {
+  const v = (req.body && req.body[name]) ?? req.query[name];
+  return v === true || ["1", "true", "yes"].includes(String(v || "").toLowerCase());
+}
+
+// ?spell_fix=1 (atau body.spell_fix) -> auto_fix juga membetulkan ejaan kata non-KBBI yang sarannya tidak ambigu
+function wantSpellFix(req) {
+  return wantFlag(req, "spell_fix");
+}
+
+// Pelanggaran EYD dikirim sebagai span {start, end} & auto-fix sebagai edit [start, end, pengganti]
+// (offset code point di teks ternormalisasi). ?excerpts=1 -> contoh teks tiap pelanggaran,
+// ?fix_text=1 -> teks auto-fix utuh (auto_fix.text).
+function wantExpand(req) {
+  return { excerpts: wantFlag(req, "excerpts"), fixText: wantFlag(req, "fix_text") };
+}
+
+// ?parallel=1 (atau body.parallel) -> dokumen besar dinilai per paragraf di beberapa core
+// (EVAL_PARALLEL_JOBS proses per worker Python). Hasil sama dengan penilaian biasa.
+function wantParallel(req) {
+  return wantFlag(req, "parallel");
+}
+
+// ?fields=score,eyd (atau body.fields: array/string) -> hanya bagian itu yang dihitung & dikirim.
+// null = hasil lengkap; nama tak dikenal -> 400
+const RESULT_FIELDS = ["score", "subscores", "feedback", "detail", "structure", "eyd", "auto_fix"];
+
+function wantFields(req) {
+  const v = (req.body && req.body.fields) ?? req.query.fields;
+  if (v == null || v === "") return null;
+  const list = (Array.isArray(v) ? v : String(v).split(",")).map((f) => String(f).trim()).filter(Boolean);
+  const unknown = list.filter((f) => !RESULT_FIELDS.includes(f));
+  if (unknown.length) {
+    const e = new Error(`fields tidak dikenal: ${unknown.join(", ")} (pilihan: ${RESULT_FIELDS.join(", ")}).`);
+    e.status = 400;
+    throw e;
+  }
+  return list.length ? [...new Set(list)].sort() : null;
+}
+
+// ?school=nama (atau body.school) -> overlay kamus sekolah python/overlays/<nama>.txt (EVAL_OVERLAY_DIR):
+// kata tambahan & kata yang ditolak di atas KBBI bersama. Overlay tidak ada -> 404, nama tidak valid -> 400
+const SCHOOL_RE = /^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$/;
+
+function wantSchool(req) {
+  const v = (req.body && req.body.school) ?? req.query.school;
+  if (v == null || v === "") return null;
+  const name = String(v).trim();
+  if (!SCHOOL_RE.test(name)) {
+    const e = new Error("Nama school tidak valid (huruf, angka, _ atau -, maks 64).");
+    e.status = 400;
+    throw e;
+  }
+  return name;
+}
+
+// ?similar=1 (atau body.similar) -> cari submisi mirip (salin-tempel antarsiswa) di indeks MinHash/LSH
+// (python/near_dup.py, EVAL_SIMILAR_DB) -> breakdown.meta.similar_submissions.
+// ?submission=id (atau body.submission): id submisi/siswa (UI: "<tugas>/<siswa>"). Teks hanya disimpan di indeks kalau id ada,
+// dan submisi dengan id yang sama tidak dilaporkan mirip dengan dirinya sendiri (klik ulang, revisi).
+function wantSimilar(req) {
+  return wantFlag(req, "similar");
+}
+
+function wantSubmission(req) {
+  const v = (req.body && req.body.submission) ?? req.query.submission;
+  if (v == null || v === "") return null;
+  const id = String(v).trim();
+  if (id.length > 128) {
+    const e = new Error("Id submission terlalu panjang (maks 128 karakter).");
+    e.status = 400;
+    throw e;
+  }
+  return id || null;
 }
 
 // Pages
@@ -79,15 +190,214 @@ app.post("/api/evaluate", async (req, res) => {
 
     if (!type) return res.status(400).json({ ok: false, message: "Tipe teks belum dikirim." });
     if (!text.trim()) return res.status(400).json({ ok: false, message: "Teks masih kosong." });
-    if (text.length > 20000) return res.status(400).json({ ok: false, message: "Teks terlalu panjang (maks 20.000 karakter)." });
+    if (text.length > STREAM_MAX_CHARS) {
+      return res.status(413).json({ ok: false, message: `Teks terlalu panjang (maks ${STREAM_MAX_CHARS} karakter).` });
+    }
 
-    const result = await runPython({ type, text });
+    const profile = wantProfile(req);
+    const spellFix = wantSpellFix(req);
+    const fields = wantFields(req);
+    const { excerpts, fixText } = wantExpand(req);
+    const parallel = wantParallel(req);
+    const school = wantSchool(req);
+    const similar = wantSimilar(req);
+    const submission = similar ? wantSubmission(req) : null;
+    // teks panjang lewat mode stream (auto-fix dikirim per paragraf sebagai teks, tanpa perbaikan ejaan),
+    // kecuali mode paralel: worker membagi paragraf sendiri dan hasilnya lengkap
+    const run = () =>
+      gate.run(() =>
+        text.length > MAX_TEXT_CHARS && !parallel
+          ? evaluateStream(type, text, { profile, fields, excerpts, school, similar, submission })
+          : runPython({ type, text, profile, spellFix, fields, excerpts, fixText, parallel, school, similar, submission })
+      );
+    // hasil profil berbeda per request (melewati cache) -> tidak digabung. Cek submisi mirip juga tidak:
+    // tiap submisi harus dicari & disimpan sendiri (dua siswa yang menempel teks sama bersamaan saling ketemu)
+    // Teks panjang: hasil stream & paralel berbeda bentuk (auto-fix) -> kunci terpisah
+    const variant = [
+      parallel && text.length > MAX_TEXT_CHARS ? "parallel" : "",
+      spellFix ? "spell_fix" : "",
+      fields ? fields.join(",") : "",
+      excerpts ? "excerpts" : "",
+      fixText ? "fix_text" : "",
+      school ? "@" + school : ""
+    ].join("|");
+    const key = Coalescer.key(type, text, variant);
+    const result = profile || similar ? await run() : await coalescer.run(key, run);
     return res.json(result);
   } catch (e) {
-    return res.status(500).json({ ok: false, message: e.message || "Server error" });
+    return sendBusy(res, e);
+  }
+});
+
+// API batch: satu kelas sekaligus, hasil per item dialirkan (NDJSON) + statistik kelas di akhir
+app.post("/api/evaluate/batch", (req, res) => {
+  let items;
+  try {
+    items = parseBatchBody(req.body);
+  } catch {
+    return res.status(400).json({ ok: false, message: "Format batch tidak valid (JSON array atau JSONL)." });
+  }
+  if (!Array.isArray(items) || items.length === 0) {
+    return res.status(400).json({ ok: false, message: "Batch kosong." });
+  }
+  if (items.length > MAX_ITEMS) {
+    return res.status(400).json({ ok: false, message: `Batch terlalu besar (maks ${MAX_ITEMS} teks).` });
+  }
+  gate
+    .acquire()
+    .then((release) => {
+      res.on("close", release);
+      runBatch(items.map(normalizeItem), res);
+    })
+    .catch((e) => sendBusy(res, e));
+});
+
+// API stream: progres per paragraf sebagai Server-Sent Events (event progress ..., lalu result)
+app.post("/api/evaluate/stream", (req, res) => {
+  const isJson = req.is("application/json");
+  const type = String((isJson ? req.body && req.body.type : req.query.type) || "").trim();
+  if (!type) return res.status(400).json({ ok: false, message: "Tipe teks belum dikirim." });
+  let fields, school;
+  try {
+    fields = wantFields(req);
+    school = wantSchool(req);
+  } catch (e) {
+    return sendBusy(res, e);
+  }
+
+  // tanpa body JSON: teks mentah dialirkan langsung dari request (text undefined)
+  let text;
+  if (isJson) {
+    text = String((req.body && req.body.text) || "");
+    if (!text.trim()) return res.status(400).json({ ok: false, message: "Teks masih kosong." });
+    if (text.length > STREAM_MAX_CHARS) {
+      return res.status(413).json({ ok: false, message: `Teks terlalu panjang (maks ${STREAM_MAX_CHARS} karakter).` });
+    }
+  }
+  gate
+    .acquire()
+    .then((release) => {
+      res.on("close", release);
+      streamSse(req, res, { type, text, profile: wantProfile(req), fields, excerpts: wantFlag(req, "excerpts"), school });
+    })
+    .catch((e) => sendBusy(res, e));
+});
+
+// API sesi editor: body {type, text} membuka sesi baru; {session, version, delta:{start,end,text}}
+// atau {session, text} memperbarui teks. Worker Python yang sama (affinity) menyimpan analisis
+// per paragraf, jadi hanya paragraf yang berubah (dan sambungannya) yang dinilai ulang.
+app.post("/api/evaluate/session", async (req, res) => {
+  try {
+    const body = req.body || {};
+    const fields = wantFields(req);
+    const school = wantSchool(req);
+    let id = body.session ? String(body.session) : "";
+    let s;
+    if (id) {
+      s = sessions.update(id, body);
+    } else {
+      const type = String(body.type || "").trim();
+      if (!type) return res.status(400).json({ ok: false, message: "Tipe teks belum dikirim." });
+      ({ id, session: s } = sessions.create(type, String(body.text || "")));
+    }
+    const version = s.version;
+    const payload = { op: "session", session: id, type: s.type, text: s.text };
+    if (wantProfile(req)) payload.profile = true;
+    if (wantSpellFix(req)) payload.spell_fix = true;
+    if (fields) payload.fields = fields;
+    if (school) payload.school = school;
+    const { excerpts, fixText } = wantExpand(req);
+    if (excerpts) payload.excerpts = true;
+    if (fixText) payload.fix_text = true;
+    const msg = await gate.run(() => pool.run(payload, { affinity: id, raw: true }));
+    return res.json({ ok: true, session: id, version, paragraphs: msg.session, result: msg.result });
+  } catch (e) {
+    return sendBusy(res, e);
+  }
+});
+
+app.delete("/api/evaluate/session/:id", (req, res) => {
+  const id = String(req.params.id || "");
+  const closed = sessions.close(id);
+  pool.run({ op: "session_close", session: id }, { affinity: id }).catch(() => {});
+  res.json({ ok: true, closed });
+});
+
+// API job: seperti batch, tetapi hasil disimpan (SQLite) dan dinilai di latar; job yang terputus
+// oleh restart dilanjutkan dari item yang belum selesai. POST -> 202 {job}, lalu polling status/hasil.
+app.post("/api/jobs", async (req, res) => {
+  let items;
+  try {
+    items = parseBatchBody(req.body);
+  } catch {
+    return res.status(400).json({ ok: false, message: "Format job tidak valid (JSON array atau JSONL)." });
+  }
+  if (!Array.isArray(items) || items.length === 0) {
+    return res.status(400).json({ ok: false, message: "Job kosong." });
+  }
+  if (items.length > JOB_MAX_ITEMS) {
+    return res.status(400).json({ ok: false, message: `Job terlalu besar (maks ${JOB_MAX_ITEMS} teks).` });
+  }
+  try {
+    const job = await jobs.create(items.map(normalizeItem));
+    res.set("Location", `/api/jobs/${job.id}`);
+    return res.status(202).json({ ok: true, job });
+  } catch (e) {
+    return sendBusy(res, e);
+  }
+});
+
+// progres + hasil item yang sudah selesai (urut index): ?offset=0&limit=100 (maks 1000)
+app.get("/api/jobs/:id", async (req, res) => {
+  try {
+    const offset = parseInt(req.query.offset || "", 10) || 0;
+    const limit = parseInt(req.query.limit || "", 10) || 100;
+    const page = await jobs.results(String(req.params.id), offset, limit);
+    return res.json({ ok: true, ...page });
+  } catch (e) {
+    return sendBusy(res, e);
+  }
+});
+
+// CSV skor total + subskor per item
+app.get("/api/jobs/:id/export.csv", async (req, res) => {
+  try {
+    const id = String(req.params.id);
+    const csv = await jobs.exportCsv(id);
+    res.set("Content-Type", "text/csv; charset=utf-8");
+    res.set("Content-Disposition", `attachment; filename="job-${id.replace(/[^\w-]/g, "")}.csv"`);
+    return res.send(csv);
+  } catch (e) {
+    return sendBusy(res, e);
   }
 });
 
+app.get("/api/health", (req, res) => {
+  const st = pool.status();
+  res.status(st.ready > 0 ? 200 : 503).json({
+    ok: st.ready > 0,
+    pool: st,
+    admission: gate.status(),
+    sessions: sessions.status()
+  });
+});
+
+// memori master + tiap worker Python (hanya mode server pre-fork)
+app.get("/api/health/memory", async (req, res) => {
+  if (!pool.memory) return res.status(404).json({ ok: false, error: "Hanya tersedia dengan EVAL_SOCKET / EVAL_SERVE=1." });
+  try {
+    res.json(await pool.memory());
+  } catch (e) {
+    res.status(e.status || 500).json({ ok: false, error: e.message });
+  }
+});
+
+// Prometheus: histogram waktu per tahap/aturan EYD (dari worker), antrean admission, status pool
+app.get("/metrics", (req, res) => {
+  res.set("Content-Type", "text/plain; version=0.0.4; charset=utf-8");
+  res.send(renderMetrics({ pool: pool.status(), admission: gate.status(), coalescer }));
+});
+
 app.listen(PORT, () => {
   console.log(`Server: http://localhost:${PORT}`);
   console.log(`Cek CSS: http://localhost:${PORT}/public/css/style.css`);
@@ -0,0 +1,128 @@
+const crypto = require("crypto");
+
+// Kendali beban sebelum proses Python dipakai:
+// - Coalescer: request (type, text) identik yang sedang dinilai berbagi satu promise
+//   (mis. 40 siswa mengirim teks contoh yang sama dalam beberapa detik).
+// - AdmissionGate: batas evaluasi bersamaan (pool, stream, batch) + antrean tunggu terbatas.
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+class AdmissionError extends Error {
+  constructor(message, code, status, retryAfter) {
+    super(message);
+    this.code = code;
+    this.status = status;
+    this.retryAfter = retryAfter;
+  }
+}
+
+class Coalescer {
+  constructor() {
+    this.inflight = new Map();
+    this.stats = { coalesced: 0 };
+  }
+
+  // variant: opsi yang mengubah hasil (mis. "spell_fix"), supaya tidak berbagi hasil dengan request biasa
+  static key(type, text, variant = "") {
+    return crypto.createHash("sha256").update(type).update("\0").update(variant).update("\0").update(text).digest("hex");
+  }
+
+  // fn dipanggil sekali per kunci selama promise-nya belum selesai
+  run(key, fn) {
+    const cur = this.inflight.get(key);
+    if (cur) {
+      this.stats.coalesced++;
+      return cur;
+    }
+    const p = Promise.resolve()
+      .then(fn)
+      .finally(() => this.inflight.delete(key));
+    this.inflight.set(key, p);
+    return p;
+  }
+
+  get size() {
+    return this.inflight.size;
+  }
+}
+
+class AdmissionGate {
+  constructor(opts = {}) {
+    this.limit = opts.limit || envInt("EVAL_CONCURRENCY", 8);
+    this.maxQueue = opts.maxQueue || envInt("EVAL_MAX_QUEUE", 200);
+    this.queueTimeoutMs = opts.queueTimeoutMs || envInt("EVAL_QUEUE_TIMEOUT_MS", 10000);
+    this.retryAfterSec = opts.retryAfterSec || envInt("EVAL_RETRY_AFTER_S", 5);
+    // onWait(detik): waktu tunggu tiap request yang akhirnya masuk (untuk metrik)
+    this.onWait = opts.onWait || null;
+
+    this.active = 0;
+    this.queue = [];
+    this.stats = { admitted: 0, rejected: 0, timedOut: 0 };
+  }
+
+  // resolve(release) begitu ada slot; release() wajib dipanggil tepat sekali
+  acquire() {
+    if (this.active < this.limit && !this.queue.length) return Promise.resolve(this.admit(0));
+    if (this.queue.length >= this.maxQueue) {
+      this.stats.rejected++;
+      return Promise.reject(
+        new AdmissionError("Terlalu banyak permintaan, coba lagi sebentar.", "TOO_MANY", 429, this.retryAfterSec)
+      );
+    }
+    return new Promise((resolve, reject) => {
+      const item = { resolve, reject, t0: Date.now() };
+      item.timer = setTimeout(() => {
+        const i = this.queue.indexOf(item);
+        if (i !== -1) this.queue.splice(i, 1);
+        this.stats.timedOut++;
+        reject(new AdmissionError("Server sedang sibuk, coba lagi sebentar.", "QUEUE_TIMEOUT", 503, this.retryAfterSec));
+      }, this.queueTimeoutMs);
+      this.queue.push(item);
+    });
+  }
+
+  admit(waitedMs) {
+    this.active++;
+    this.stats.admitted++;
+    if (this.onWait) this.onWait(waitedMs / 1000);
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      this.active--;
+      this.next();
+    };
+  }
+
+  next() {
+    while (this.active < this.limit && this.queue.length) {
+      const item = this.queue.shift();
+      clearTimeout(item.timer);
+      item.resolve(this.admit(Date.now() - item.t0));
+    }
+  }
+
+  async run(fn) {
+    const release = await this.acquire();
+    try {
+      return await fn();
+    } finally {
+      release();
+    }
+  }
+
+  status() {
+    return {
+      limit: this.limit,
+      active: this.active,
+      queued: this.queue.length,
+      max_queue: this.maxQueue,
+      ...this.stats
+    };
+  }
+}
+
+module.exports = { AdmissionGate, AdmissionError, Coalescer };
@@ -0,0 +1,83 @@
+const path = require("path");
+const os = require("os");
+const { spawn } = require("child_process");
+const { pickPythonCmd } = require("./pythonPool");
+
+// Penilaian satu kelas sekaligus: `poem_eval.py --batch` membagi item ke proses sebanyak core,
+// hasil per item dialirkan balik sebagai NDJSON begitu selesai, diakhiri baris "summary".
+
+const MAX_ITEMS = parseInt(process.env.BATCH_MAX_ITEMS || "", 10) || 500;
+const MAX_TEXT = 20000;
+
+function parseBatchBody(body) {
+  if (Array.isArray(body)) return body;
+  if (body && Array.isArray(body.items)) return body.items;
+  if (typeof body === "string") {
+    const raw = body.trim();
+    if (!raw) return [];
+    if (raw.startsWith("[")) return JSON.parse(raw);
+    // JSONL: baris rusak diteruskan apa adanya supaya Python melaporkannya per item
+    return raw
+      .split(/\r?\n/)
+      .filter((ln) => ln.trim())
+      .map((ln) => {
+        try {
+          return JSON.parse(ln);
+        } catch {
+          return null;
+        }
+      });
+  }
+  return null;
+}
+
+function normalizeItem(it, idx) {
+  if (!it || typeof it !== "object" || Array.isArray(it)) return it;
+  const text = String(it.text || "");
+  return {
+    id: it.id ?? idx,
+    type: String(it.type || "").trim(),
+    // teks terlalu panjang dikosongkan -> Python menandai item ini gagal tanpa mengganggu item lain
+    text: text.length > MAX_TEXT ? "" : text,
+    ...(it.spell_fix ? { spell_fix: true } : {}),
+    ...(it.excerpts ? { excerpts: true } : {}),
+    ...(it.fix_text ? { fix_text: true } : {}),
+    ...(it.fields ? { fields: it.fields } : {}),
+    ...(it.school ? { school: String(it.school) } : {})
+  };
+}
+
+function runBatch(items, res) {
+  const py = pickPythonCmd();
+  const scriptPath = path.join(__dirname, "..", "python", "poem_eval.py");
+  const jobs = String(parseInt(process.env.PY_BATCH_JOBS || "", 10) || os.cpus().length);
+  const child = spawn(py, [scriptPath, "--batch", "--jobs", jobs], { stdio: ["pipe", "pipe", "pipe"] });
+
+  let err = "";
+  child.stderr.on("data", (d) => (err = (err + d.toString()).slice(-4000)));
+
+  res.status(200);
+  res.set("Content-Type", "application/x-ndjson; charset=utf-8");
+  res.set("Cache-Control", "no-cache");
+  child.stdout.pipe(res, { end: false });
+
+  child.on("error", (e) => {
+    res.end(JSON.stringify({ event: "error", message: e.message }) + "\n");
+  });
+  child.on("close", (code) => {
+    if (code !== 0 && !res.writableEnded) {
+      res.write(JSON.stringify({ event: "error", message: err || `Python exit ${code}` }) + "\n");
+    }
+    if (!res.writableEnded) res.end();
+  });
+
+  // klien memutus koneksi -> hentikan proses batch
+  res.on("close", () => {
+    if (child.exitCode === null) child.kill();
+  });
+
+  child.stdin.on("error", () => {});
+  child.stdin.end(items.map((it) => JSON.stringify(it)).join("\n") + "\n");
+}
+
+module.exports = { parseBatchBody, normalizeItem, runBatch, MAX_ITEMS };
@@ -0,0 +1,115 @@
+const path = require("path");
+const readline = require("readline");
+const { spawn } = require("child_process");
+const { pickPythonCmd } = require("./pythonPool");
+
+// Antrean job penilaian (ujian satu sekolah: ribuan teks) yang tahan restart.
+// Job & hasil per item disimpan di SQLite oleh `job_queue.py --serve` (proses hidup lama,
+// NDJSON ditandai "id"); runner di proses itu menilai item pending per potongan dan
+// melanjutkan job yang belum selesai begitu proses dijalankan lagi.
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+const JOB_MAX_ITEMS = envInt("JOB_MAX_ITEMS", 20000);
+
+class JobError extends Error {
+  constructor(message, code, status) {
+    super(message);
+    this.code = code;
+    this.status = status || 500;
+  }
+}
+
+class JobQueue {
+  constructor(opts = {}) {
+    this.python = opts.python || pickPythonCmd();
+    this.script = opts.script || path.join(__dirname, "..", "python", "job_queue.py");
+    this.db = opts.db || process.env.JOB_DB || path.join(__dirname, "..", "data", "jobs.db");
+    this.timeoutMs = opts.timeoutMs || envInt("JOB_REQUEST_TIMEOUT_MS", 60000);
+    this.restartDelayMs = opts.restartDelayMs || 1000;
+    this.seq = 0;
+    this.pending = new Map(); // id -> { resolve, reject, timer }
+    this.restarts = 0;
+    this.child = null;
+    this.start(); // langsung: job yang terputus oleh restart server dilanjutkan tanpa menunggu request
+  }
+
+  start() {
+    this.stderr = "";
+    const child = spawn(this.python, [this.script, "--serve", "--db", this.db], { stdio: ["pipe", "pipe", "pipe"] });
+    this.child = child;
+    readline.createInterface({ input: child.stdout }).on("line", (line) => this.onLine(line));
+    child.stderr.on("data", (d) => {
+      this.stderr = (this.stderr + d.toString()).slice(-4000);
+    });
+    child.on("error", (e) => this.onExit(child, null, e));
+    child.on("exit", (code) => this.onExit(child, code));
+    child.stdin.on("error", () => {});
+  }
+
+  onLine(line) {
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch {
+      return;
+    }
+    const p = this.pending.get(msg.id);
+    if (!p) return;
+    this.pending.delete(msg.id);
+    clearTimeout(p.timer);
+    if (msg.ok === false) {
+      const notFound = msg.code === "NOT_FOUND";
+      p.reject(new JobError(msg.error || "Antrean job gagal.", msg.code || "JOB_ERROR", notFound ? 404 : 500));
+    } else {
+      p.resolve(msg);
+    }
+  }
+
+  onExit(child, code, err) {
+    if (child !== this.child) return;
+    this.child = null;
+    const detail = ((err && err.message) || this.stderr || `Python exit ${code}`).trim();
+    for (const p of this.pending.values()) {
+      clearTimeout(p.timer);
+      p.reject(new JobError("Antrean job berhenti: " + detail, "JOB_CRASH", 503));
+    }
+    this.pending.clear();
+    this.restarts++;
+    setTimeout(() => this.start(), this.restartDelayMs).unref();
+  }
+
+  request(msg) {
+    if (!this.child) return Promise.reject(new JobError("Antrean job sedang dijalankan ulang.", "JOB_CRASH", 503));
+    return new Promise((resolve, reject) => {
+      const id = ++this.seq;
+      const timer = setTimeout(() => {
+        if (this.pending.delete(id)) reject(new JobError("Antrean job tidak menjawab.", "TIMEOUT", 504));
+      }, this.timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.child.stdin.write(JSON.stringify({ ...msg, id }) + "\n");
+    });
+  }
+
+  async create(items) {
+    return (await this.request({ op: "create", items })).job;
+  }
+
+  async status(job) {
+    return (await this.request({ op: "status", job })).job;
+  }
+
+  async results(job, offset, limit) {
+    const msg = await this.request({ op: "results", job, offset, limit });
+    return { job: msg.job, offset: msg.offset, results: msg.results };
+  }
+
+  async exportCsv(job) {
+    return (await this.request({ op: "export", job })).csv;
+  }
+}
+
+module.exports = { JobQueue, JobError, JOB_MAX_ITEMS };
@@ -0,0 +1,151 @@
+// Metrik Prometheus (format teks 0.0.4) tanpa dependensi tambahan.
+// Diisi dari catatan waktu worker Python (StageTimer), antrean admission, dan status pool;
+// dibaca lewat GET /metrics.
+
+const BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5];
+
+function escapeLabel(v) {
+  return String(v).replace(/\\/g, "\\\\").replace(/\n/g, "\\n").replace(/"/g, '\\"');
+}
+
+function fmtLabels(labels) {
+  const keys = Object.keys(labels);
+  if (!keys.length) return "";
+  return "{" + keys.map((k) => `${k}="${escapeLabel(labels[k])}"`).join(",") + "}";
+}
+
+class Histogram {
+  constructor(name, help, labelName) {
+    this.name = name;
+    this.help = help;
+    this.labelName = labelName;
+    this.series = new Map(); // nilai label -> { counts, sum, count }
+  }
+
+  observe(label, seconds) {
+    let s = this.series.get(label);
+    if (!s) {
+      s = { counts: new Array(BUCKETS.length).fill(0), sum: 0, count: 0 };
+      this.series.set(label, s);
+    }
+    for (let i = 0; i < BUCKETS.length; i++) if (seconds <= BUCKETS[i]) s.counts[i]++;
+    s.sum += seconds;
+    s.count++;
+  }
+
+  render() {
+    const out = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+    for (const [label, s] of this.series) {
+      const base = this.labelName ? { [this.labelName]: label } : {};
+      BUCKETS.forEach((b, i) => out.push(`${this.name}_bucket${fmtLabels({ ...base, le: b })} ${s.counts[i]}`));
+      out.push(`${this.name}_bucket${fmtLabels({ ...base, le: "+Inf" })} ${s.count}`);
+      out.push(`${this.name}_sum${fmtLabels(base)} ${s.sum}`);
+      out.push(`${this.name}_count${fmtLabels(base)} ${s.count}`);
+    }
+    return out.join("\n");
+  }
+}
+
+class Counter {
+  constructor(name, help, labelName) {
+    this.name = name;
+    this.help = help;
+    this.labelName = labelName;
+    this.values = new Map();
+  }
+
+  inc(label, n = 1) {
+    this.values.set(label, (this.values.get(label) || 0) + n);
+  }
+
+  render() {
+    const out = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+    for (const [label, v] of this.values) {
+      out.push(`${this.name}${this.labelName ? fmtLabels({ [this.labelName]: label }) : ""} ${v}`);
+    }
+    return out.join("\n");
+  }
+}
+
+const stageSeconds = new Histogram("poem_eval_stage_seconds", "Waktu per tahap evaluasi (detik).", "stage");
+const ruleSeconds = new Histogram("poem_eval_eyd_rule_seconds", "Waktu per aturan EYD (detik).", "rule");
+const ruleHits = new Counter("poem_eval_eyd_rule_hits_total", "Jumlah temuan per aturan EYD.", "rule");
+const evalSeconds = new Histogram("poem_eval_total_seconds", "Waktu total evaluasi di worker (detik).", "cached");
+const cacheResults = new Counter("poem_eval_cache_total", "Hasil cache evaluasi di worker.", "result");
+const ruleTimeouts = new Counter("poem_eval_eyd_rule_timeouts_total", "Aturan EYD yang melewati anggaran waktunya.", "rule");
+const ruleSkipped = new Counter(
+  "poem_eval_eyd_rule_skipped_total",
+  "Aturan EYD yang tidak dijalankan karena anggaran waktu dokumen habis.",
+  "rule"
+);
+let disabledRules = []; // dari evaluasi terakhir yang menjalankan aturan EYD
+const admissionWait = new Histogram("poem_eval_admission_wait_seconds", "Waktu tunggu antrean sebelum evaluasi dimulai (detik).");
+
+// timing = StageTimer.to_dict() dari worker Python
+function observeTiming(timing, cached) {
+  if (!timing) return;
+  cacheResults.inc(cached ? "hit" : "miss");
+  evalSeconds.observe(cached ? "true" : "false", (timing.total_ms || 0) / 1000);
+  for (const [name, st] of Object.entries(timing.stages || {})) stageSeconds.observe(name, st.ms / 1000);
+  for (const [id, r] of Object.entries(timing.eyd_rules || {})) {
+    ruleSeconds.observe(id, r.ms / 1000);
+    if (r.hits) ruleHits.inc(id, r.hits);
+  }
+  const guard = timing.eyd_guard || {};
+  for (const id of guard.timeouts || []) ruleTimeouts.inc(id);
+  for (const id of guard.skipped || []) ruleSkipped.inc(id);
+  if (Object.keys(timing.eyd_rules || {}).length) disabledRules = guard.disabled || [];
+}
+
+function observeWait(seconds) {
+  admissionWait.observe("", seconds);
+}
+
+function gauge(name, help, value) {
+  return `# HELP ${name} ${help}\n# TYPE ${name} gauge\n${name} ${value}`;
+}
+
+function counter(name, help, value) {
+  return `# HELP ${name} ${help}\n# TYPE ${name} counter\n${name} ${value}`;
+}
+
+// pool: PythonPool.status(), admission: AdmissionGate.status(), coalescer: Coalescer
+function renderMetrics({ pool, admission, coalescer } = {}) {
+  const parts = [stageSeconds, ruleSeconds, ruleHits, ruleTimeouts, ruleSkipped, evalSeconds, cacheResults, admissionWait].map(
+    (m) => m.render()
+  );
+  parts.push(
+    gauge("poem_eval_eyd_rules_disabled", "Aturan EYD yang dinonaktifkan (pola ditolak / melewati anggaran).", disabledRules.length)
+  );
+  if (admission) {
+    parts.push(
+      gauge("poem_eval_admission_limit", "Batas evaluasi bersamaan.", admission.limit),
+      gauge("poem_eval_admission_active", "Evaluasi yang sedang berjalan.", admission.active),
+      gauge("poem_eval_admission_queue_depth", "Request yang menunggu slot evaluasi.", admission.queued),
+      counter("poem_eval_admission_rejected_total", "Request ditolak karena antrean penuh (429).", admission.rejected),
+      counter("poem_eval_admission_timeout_total", "Request yang habis waktu di antrean (503).", admission.timedOut)
+    );
+  }
+  if (coalescer) {
+    parts.push(
+      gauge("poem_eval_inflight_unique", "Evaluasi unik (type, text) yang sedang berjalan.", coalescer.size),
+      counter("poem_eval_coalesced_total", "Request yang menumpang evaluasi identik yang sedang berjalan.", coalescer.stats.coalesced)
+    );
+  }
+  if (pool) {
+    parts.push(
+      gauge("poem_eval_pool_size", "Jumlah worker Python.", pool.size),
+      gauge("poem_eval_pool_ready", "Worker Python yang siap.", pool.ready),
+      gauge("poem_eval_pool_busy", "Worker Python yang sedang menilai.", pool.busy),
+      gauge("poem_eval_pool_queued", "Request yang menunggu worker.", pool.queued),
+      counter("poem_eval_pool_served_total", "Request yang selesai dinilai.", pool.served),
+      counter("poem_eval_pool_failed_total", "Request yang gagal.", pool.failed),
+      counter("poem_eval_pool_restarts_total", "Worker yang dijalankan ulang.", pool.restarts),
+      counter("poem_eval_pool_recycled_total", "Worker yang didaur ulang setelah batas request.", pool.recycled),
+      counter("poem_eval_pool_rejected_total", "Request yang ditolak karena antrean penuh.", pool.rejected)
+    );
+  }
+  return parts.join("\n") + "\n";
+}
+
+module.exports = { observeTiming, observeWait, renderMetrics };
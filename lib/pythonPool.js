@@ -0,0 +1,251 @@
+const path = require("path");
+const os = require("os");
+const readline = require("readline");
+const { spawn } = require("child_process");
+
+// Pool proses Python hidup lama (poem_eval.py --worker).
+// Tiap worker memuat KBBI & EYD sekali, lalu melayani request NDJSON satu per satu.
+
+function pickPythonCmd() {
+  if (process.env.PYTHON && process.env.PYTHON.trim()) return process.env.PYTHON.trim();
+  return process.platform === "win32" ? "python" : "python3";
+}
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+function hashSlot(key, size) {
+  let h = 0;
+  for (let i = 0; i < key.length; i++) h = (h * 31 + key.charCodeAt(i)) >>> 0;
+  return h % size;
+}
+
+class PoolError extends Error {
+  constructor(message, code, status) {
+    super(message);
+    this.code = code;
+    this.status = status || 500;
+  }
+}
+
+class PythonWorker {
+  constructor(pool, slot) {
+    this.pool = pool;
+    this.slot = slot;
+    this.job = null;
+    this.ready = false;
+    this.dead = false;
+    this.served = 0;
+    this.recycle = false;
+    this.start();
+  }
+
+  start() {
+    const pool = this.pool;
+    this.stderr = "";
+    const child = spawn(pool.python, [pool.script, ...pool.args], { stdio: ["pipe", "pipe", "pipe"] });
+    this.child = child;
+
+    readline.createInterface({ input: child.stdout }).on("line", (line) => this.onLine(line));
+    child.stderr.on("data", (d) => {
+      this.stderr = (this.stderr + d.toString()).slice(-4000);
+    });
+    child.on("error", (e) => this.onExit(null, e));
+    child.on("exit", (code) => this.onExit(code));
+    child.stdin.on("error", () => {});
+
+    this.handshake();
+  }
+
+  // health check awal: worker dianggap siap setelah membalas ping
+  handshake() {
+    const pool = this.pool;
+    this.send({ op: "ping" }, pool.startupTimeoutMs)
+      .then(() => {
+        this.ready = true;
+        pool.drain();
+      })
+      .catch(() => this.kill());
+  }
+
+  get idle() {
+    return this.ready && !this.dead && !this.job;
+  }
+
+  send(msg, timeoutMs) {
+    return new Promise((resolve, reject) => {
+      const id = ++this.pool.seq;
+      const timer = setTimeout(() => {
+        if (this.job && this.job.id === id) {
+          this.job = null;
+          reject(new PoolError("Evaluasi melebihi batas waktu.", "TIMEOUT", 504));
+          this.kill();
+        }
+      }, timeoutMs);
+      this.job = { id, resolve, reject, timer };
+      this.write({ ...msg, id });
+    });
+  }
+
+  write(msg) {
+    this.child.stdin.write(JSON.stringify(msg) + "\n");
+  }
+
+  onLine(line) {
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch {
+      return;
+    }
+    this.onMessage(msg);
+  }
+
+  onMessage(msg) {
+    const job = this.job;
+    if (!job || msg.id !== job.id) return;
+    clearTimeout(job.timer);
+    this.job = null;
+    // kode dari Python (mis. OVERLAY_NOT_FOUND -> 404) diteruskan apa adanya
+    if (msg.ok === false) job.reject(new PoolError(msg.error || "Worker Python gagal.", msg.code || "WORKER_ERROR", msg.status));
+    else job.resolve(msg);
+    this.pool.drain();
+  }
+
+  onExit(code, err) {
+    if (this.dead) return;
+    this.dead = true;
+    this.ready = false;
+    const job = this.job;
+    this.job = null;
+    if (job) {
+      clearTimeout(job.timer);
+      const detail = (err && err.message) || this.stderr || `Python exit ${code}`;
+      job.reject(new PoolError("Worker Python berhenti: " + detail.trim(), "WORKER_CRASH"));
+    }
+    this.pool.replace(this);
+  }
+
+  // tidak menerima job lagi sejak saat ini, bukan baru saat event `exit` (async) tiba:
+  // request yang masuk di sela itu akan gagal sebagai WORKER_CRASH di proses yang sedang dimatikan
+  kill() {
+    this.ready = false;
+    try {
+      this.child.kill();
+    } catch {}
+  }
+}
+
+class PythonPool {
+  constructor(opts = {}) {
+    this.python = opts.python || pickPythonCmd();
+    this.script = opts.script || path.join(__dirname, "..", "python", "poem_eval.py");
+    this.args = opts.args || ["--worker"];
+    this.size = opts.size || envInt("PY_POOL_SIZE", Math.max(1, Math.min(4, os.cpus().length)));
+    this.timeoutMs = opts.timeoutMs || envInt("PY_TIMEOUT_MS", 15000);
+    this.startupTimeoutMs = opts.startupTimeoutMs || envInt("PY_STARTUP_TIMEOUT_MS", 30000);
+    this.maxQueue = opts.maxQueue || envInt("PY_MAX_QUEUE", 100);
+    this.healthIntervalMs = opts.healthIntervalMs || envInt("PY_HEALTH_INTERVAL_MS", 30000);
+    this.restartDelayMs = opts.restartDelayMs || 500;
+    // onTiming(timing, cached): catatan waktu per tahap dari worker (mis. untuk metrik Prometheus)
+    this.onTiming = opts.onTiming || null;
+
+    this.seq = 0;
+    this.queue = [];
+    this.workers = [];
+    this.closed = false;
+    this.stats = { served: 0, failed: 0, restarts: 0, recycled: 0, rejected: 0 };
+
+    this.setup(opts);
+    for (let i = 0; i < this.size; i++) this.workers.push(this.createWorker(i));
+
+    this.healthTimer = setInterval(() => this.healthCheck(), this.healthIntervalMs);
+    this.healthTimer.unref();
+  }
+
+  // titik kaitan subclass (mis. SocketPool): dipanggil sebelum worker pertama dibuat
+  setup() {}
+
+  createWorker(slot) {
+    return new PythonWorker(this, slot);
+  }
+
+  // opts.affinity: request dengan kunci sama selalu ke worker yang sama (mis. sesi editor,
+  // supaya cache per sesi di proses Python terpakai); opts.raw: kembalikan pesan worker utuh
+  run(payload, opts = {}) {
+    if (this.closed) return Promise.reject(new PoolError("Pool Python sudah ditutup.", "CLOSED", 503));
+    if (this.queue.length >= this.maxQueue) {
+      this.stats.rejected++;
+      return Promise.reject(new PoolError("Server sedang sibuk, coba lagi sebentar.", "QUEUE_FULL", 503));
+    }
+    const slot = opts.affinity == null ? null : hashSlot(String(opts.affinity), this.size);
+    return new Promise((resolve, reject) => {
+      this.queue.push({ payload, slot, raw: !!opts.raw, resolve, reject });
+      this.drain();
+    });
+  }
+
+  drain() {
+    for (let i = 0; i < this.queue.length; ) {
+      const slot = this.queue[i].slot;
+      const w = slot == null ? this.workers.find((x) => x.idle) : this.workers[slot].idle && this.workers[slot];
+      if (!w) {
+        if (slot == null) return; // tidak ada worker bebas sama sekali
+        i++; // worker tujuan sibuk: request lain di belakangnya boleh jalan dulu
+        continue;
+      }
+      const item = this.queue.splice(i, 1)[0];
+      w.served++;
+      const req = { op: "evaluate", ...item.payload };
+      if (this.onTiming) req.timing = true;
+      w.send(req, this.timeoutMs)
+        .then((msg) => {
+          this.stats.served++;
+          if (this.onTiming && msg.timing) this.onTiming(msg.timing, !!msg.cached);
+          item.resolve(item.raw ? msg : msg.result);
+        })
+        .catch((e) => {
+          this.stats.failed++;
+          item.reject(e);
+        });
+    }
+  }
+
+  // worker.recycle: berhenti terencana (daur ulang), langsung diganti tanpa jeda
+  replace(worker) {
+    if (this.closed) return;
+    if (worker.recycle) this.stats.recycled++;
+    else this.stats.restarts++;
+    setTimeout(() => {
+      if (this.closed) return;
+      this.workers[worker.slot] = this.createWorker(worker.slot);
+    }, worker.recycle ? 0 : this.restartDelayMs).unref();
+  }
+
+  healthCheck() {
+    this.workers
+      .filter((w) => w.idle)
+      .forEach((w) => w.send({ op: "ping" }, this.startupTimeoutMs).catch(() => {}));
+  }
+
+  status() {
+    return {
+      size: this.size,
+      ready: this.workers.filter((w) => w.ready).length,
+      busy: this.workers.filter((w) => w.job).length,
+      queued: this.queue.length,
+      ...this.stats
+    };
+  }
+
+  close() {
+    this.closed = true;
+    clearInterval(this.healthTimer);
+    this.queue.splice(0).forEach((it) => it.reject(new PoolError("Pool Python ditutup.", "CLOSED", 503)));
+    this.workers.forEach((w) => w.kill());
+  }
+}
+
+module.exports = { PythonPool, PythonWorker, PoolError, pickPythonCmd };
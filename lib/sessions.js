@@ -0,0 +1,110 @@
+const crypto = require("crypto");
+
+// Sesi editor untuk umpan balik saat mengetik: Node menyimpan teks terakhir per sesi dan
+// menerapkan delta dari browser (offset dalam satuan string JS, sama dengan textarea),
+// lalu teks utuh dikirim ke worker Python yang sama (affinity) yang menyimpan analisis
+// per paragraf dan hanya menganalisis ulang paragraf yang berubah.
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+class SessionError extends Error {
+  constructor(message, code, status) {
+    super(message);
+    this.code = code;
+    this.status = status;
+  }
+}
+
+class SessionStore {
+  constructor(opts = {}) {
+    this.max = opts.max || envInt("EDITOR_SESSION_MAX", 500);
+    this.ttlMs = opts.ttlMs || envInt("EDITOR_SESSION_TTL_MS", 15 * 60 * 1000);
+    this.maxChars = opts.maxChars || envInt("MAX_TEXT_CHARS", 20000);
+    this.items = new Map(); // urutan sisip = urutan pemakaian (LRU)
+    this.stats = { created: 0, evicted: 0, expired: 0 };
+
+    this.sweepTimer = setInterval(() => this.sweep(), Math.min(this.ttlMs, 60000));
+    this.sweepTimer.unref();
+  }
+
+  sweep() {
+    const now = Date.now();
+    for (const [id, s] of this.items) {
+      if (now - s.touched < this.ttlMs) break;
+      this.items.delete(id);
+      this.stats.expired++;
+    }
+  }
+
+  touch(id, s) {
+    s.touched = Date.now();
+    this.items.delete(id);
+    this.items.set(id, s);
+  }
+
+  create(type, text) {
+    this.checkSize(text);
+    const id = crypto.randomUUID();
+    const s = { type, text, version: 1, touched: 0 };
+    this.touch(id, s);
+    this.stats.created++;
+    while (this.items.size > this.max) {
+      this.items.delete(this.items.keys().next().value);
+      this.stats.evicted++;
+    }
+    return { id, session: s };
+  }
+
+  get(id) {
+    const s = this.items.get(id);
+    if (!s || Date.now() - s.touched >= this.ttlMs) {
+      if (s) this.items.delete(id);
+      throw new SessionError("Sesi tidak ditemukan atau kedaluwarsa; kirim ulang teks utuh.", "SESSION_EXPIRED", 404);
+    }
+    return s;
+  }
+
+  // body: { text } (ganti semua) atau { delta: { start, end, text }, version }
+  update(id, body) {
+    const s = this.get(id);
+    let text;
+    if (typeof body.text === "string") {
+      text = body.text;
+    } else {
+      const d = body.delta || {};
+      if (body.version !== s.version) {
+        throw new SessionError("Versi sesi tidak cocok; kirim ulang teks utuh.", "VERSION_MISMATCH", 409);
+      }
+      const start = Number(d.start);
+      const end = Number(d.end);
+      if (!Number.isInteger(start) || !Number.isInteger(end) || start < 0 || end < start || end > s.text.length) {
+        throw new SessionError("Delta tidak valid.", "BAD_DELTA", 400);
+      }
+      text = s.text.slice(0, start) + String(d.text || "") + s.text.slice(end);
+    }
+    this.checkSize(text);
+    s.text = text;
+    s.version++;
+    this.touch(id, s);
+    return s;
+  }
+
+  close(id) {
+    return this.items.delete(id);
+  }
+
+  checkSize(text) {
+    if (text.length > this.maxChars) {
+      throw new SessionError(`Teks terlalu panjang untuk umpan balik langsung (maks ${this.maxChars} karakter).`, "TOO_LONG", 413);
+    }
+  }
+
+  status() {
+    return { size: this.items.size, max: this.max, ttl_ms: this.ttlMs, ...this.stats };
+  }
+}
+
+module.exports = { SessionStore, SessionError };
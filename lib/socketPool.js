@@ -0,0 +1,137 @@
+const net = require("net");
+const os = require("os");
+const path = require("path");
+const { spawn } = require("child_process");
+const { PythonPool, PythonWorker } = require("./pythonPool");
+
+// Klien untuk server pre-fork (poem_eval.py --serve): KBBI & EYD dimuat sekali di master
+// Python lalu dibagi copy-on-write ke worker hasil fork. Tiap slot pool = satu koneksi
+// Unix socket yang dipegang satu worker Python; frame = panjang (u32 big-endian) + JSON.
+// Antrean, affinity, dan metrik sama dengan PythonPool.
+//
+// EVAL_SOCKET=path: pakai server yang sudah berjalan (jumlah worker server >= PY_POOL_SIZE,
+// karena koneksi dipegang terus); tanpa EVAL_SOCKET server dijalankan sendiri.
+// EVAL_SERVE=threads: server dijalankan dengan --threads (satu proses, satu salinan kamus untuk
+// semua slot; di Python free-threaded slot menilai bersamaan di banyak core).
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+const CONNECT_RETRY_MS = 200;
+
+class SocketConnection extends PythonWorker {
+  start() {
+    this.t0 = Date.now();
+    this.buf = Buffer.alloc(0);
+    this.error = null;
+    this.connect();
+  }
+
+  connect() {
+    const sock = net.createConnection(this.pool.socketPath);
+    this.sock = sock;
+    let retrying = false;
+    sock.on("connect", () => this.handshake());
+    sock.on("data", (d) => this.onData(d));
+    sock.on("error", (e) => {
+      // server belum siap (socket belum ada / belum listen): coba lagi sampai batas startup
+      const early = !this.ready && (e.code === "ENOENT" || e.code === "ECONNREFUSED");
+      if (early && !this.pool.closed && Date.now() - this.t0 < this.pool.startupTimeoutMs) {
+        retrying = true;
+        setTimeout(() => this.connect(), CONNECT_RETRY_MS).unref();
+        return;
+      }
+      this.error = e;
+    });
+    sock.on("close", () => {
+      if (!retrying) this.onExit(null, this.error);
+    });
+  }
+
+  write(msg) {
+    const body = Buffer.from(JSON.stringify(msg), "utf8");
+    const head = Buffer.alloc(4);
+    head.writeUInt32BE(body.length, 0);
+    this.sock.write(Buffer.concat([head, body]));
+  }
+
+  onData(chunk) {
+    this.buf = this.buf.length ? Buffer.concat([this.buf, chunk]) : chunk;
+    while (this.buf.length >= 4) {
+      const n = this.buf.readUInt32BE(0);
+      if (this.buf.length < 4 + n) break;
+      const body = this.buf.subarray(4, 4 + n);
+      this.buf = this.buf.subarray(4 + n);
+      let msg;
+      try {
+        msg = JSON.parse(body.toString("utf8"));
+      } catch {
+        continue;
+      }
+      // worker Python sudah mencapai --max-requests: koneksi ditutup server, slot tersambung ulang
+      if (msg.recycle) {
+        this.recycle = true;
+        this.ready = false;
+      }
+      this.onMessage(msg);
+    }
+  }
+
+  kill() {
+    this.ready = false; // seperti PythonWorker.kill(): `close` datang async
+    if (this.sock) this.sock.destroy();
+  }
+}
+
+class SocketPool extends PythonPool {
+  setup(opts) {
+    this.socketPath = opts.socketPath || process.env.EVAL_SOCKET || "";
+    this.maxRequests = opts.maxRequests || envInt("EVAL_MAX_REQUESTS", 0);
+    this.threads = opts.threads ?? process.env.EVAL_SERVE === "threads";
+    this.server = null;
+    if (!this.socketPath) {
+      this.socketPath = path.join(os.tmpdir(), `poem-eval-${process.pid}.sock`);
+      this.spawnServer();
+    }
+  }
+
+  createWorker(slot) {
+    return new SocketConnection(this, slot);
+  }
+
+  spawnServer() {
+    const mode = this.threads ? "--threads" : "--workers";
+    const args = [this.script, "--serve", this.socketPath, mode, String(this.size), "--exit-with-parent"];
+    // daur ulang per proses hanya ada di mode pre-fork
+    if (this.maxRequests && !this.threads) args.push("--max-requests", String(this.maxRequests));
+    const child = spawn(this.python, args, { stdio: ["ignore", "ignore", "inherit"] });
+    this.server = child;
+    child.on("error", (e) => console.error("Server Python gagal dijalankan:", e.message));
+    child.on("exit", (code) => {
+      if (this.closed || this.server !== child) return;
+      console.error(`Server Python berhenti (exit ${code}), dijalankan ulang.`);
+      this.stats.restarts++;
+      setTimeout(() => {
+        if (!this.closed) this.spawnServer();
+      }, this.restartDelayMs).unref();
+    });
+  }
+
+  // memori master + tiap worker Python (rss vs pss: halaman yang dibagi copy-on-write)
+  memory() {
+    return this.run({ op: "memory" }, { raw: true });
+  }
+
+  status() {
+    return { ...super.status(), socket: this.socketPath, max_requests: this.maxRequests, threads: this.threads };
+  }
+
+  close() {
+    super.close();
+    if (this.server) this.server.kill();
+  }
+}
+
+module.exports = { SocketPool };
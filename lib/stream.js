@@ -0,0 +1,150 @@
+const path = require("path");
+const readline = require("readline");
+const { spawn } = require("child_process");
+const { pickPythonCmd } = require("./pythonPool");
+
+// Teks panjang: `poem_eval.py --stream` membaca teks per paragraf (memori ~konstan),
+// mengirim event NDJSON "progress" per paragraf (counter berjalan + potongan auto-fix)
+// lalu satu event "result" dengan format yang sama seperti /api/evaluate.
+
+function envInt(name, def) {
+  const n = parseInt(process.env[name] || "", 10);
+  return Number.isFinite(n) && n > 0 ? n : def;
+}
+
+const STREAM_MAX_CHARS = envInt("STREAM_MAX_CHARS", 2000000);
+const STREAM_TIMEOUT_MS = envInt("STREAM_TIMEOUT_MS", 120000);
+
+function spawnStream(
+  type,
+  onEvent,
+  onDone,
+  { profile = false, fields = null, excerpts = false, school = null, similar = false, submission = null } = {}
+) {
+  const scriptPath = path.join(__dirname, "..", "python", "poem_eval.py");
+  const child = spawn(pickPythonCmd(), [scriptPath, "--stream"], { stdio: ["pipe", "pipe", "pipe"] });
+
+  let err = "";
+  let finished = false;
+  const done = (code, message) => {
+    if (finished) return;
+    finished = true;
+    clearTimeout(timer);
+    onDone(code, message);
+  };
+  const timer = setTimeout(() => {
+    child.kill();
+    done(null, "Evaluasi melebihi batas waktu.");
+  }, STREAM_TIMEOUT_MS);
+
+  child.stderr.on("data", (d) => (err = (err + d.toString()).slice(-4000)));
+  readline.createInterface({ input: child.stdout }).on("line", (line) => {
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch {
+      return;
+    }
+    onEvent(msg, line);
+  });
+  child.on("error", (e) => done(null, e.message));
+  child.on("close", (code) => done(code, code === 0 ? "" : err.trim() || `Python exit ${code}`));
+  child.stdin.on("error", () => {});
+
+  // baris pertama: header, sisanya teks mentah
+  const header = { type };
+  if (profile) header.profile = true;
+  if (fields) header.fields = fields;
+  if (excerpts) header.excerpts = true;
+  if (school) header.school = school;
+  if (similar) header.similar = true;
+  if (submission) header.submission = submission;
+  child.stdin.write(JSON.stringify(header) + "\n");
+  return child;
+}
+
+// Untuk /api/evaluate: jalankan mode stream, kembalikan hanya hasil akhir (auto-fix digabung).
+function evaluateStream(type, text, opts = {}) {
+  return new Promise((resolve, reject) => {
+    const fix = [];
+    let result = null;
+    let failed = null;
+    const child = spawnStream(
+      type,
+      (msg) => {
+        if (msg.event === "progress") fix.push(msg.fix || "");
+        else if (msg.event === "result") result = msg.result;
+        else if (msg.event === "error") failed = msg;
+      },
+      (code, message) => {
+        if (failed) {
+          // mis. overlay sekolah tidak ada -> 404 seperti jalur worker
+          const e = new Error(failed.message || "Evaluasi stream gagal.");
+          e.code = failed.code;
+          e.status = failed.code === "OVERLAY_NOT_FOUND" ? 404 : 400;
+          return reject(e);
+        }
+        if (!result) return reject(new Error(message || "Evaluasi stream gagal."));
+        if (result.auto_fix && result.auto_fix.streamed) result.auto_fix = { text: fix.join("") };
+        resolve(result);
+      },
+      opts
+    );
+    child.stdin.end(text);
+  });
+}
+
+// POST /api/evaluate/stream -> Server-Sent Events.
+// Body JSON {type, text}, atau teks mentah (text/plain) dengan ?type=... supaya teks tidak perlu
+// ditampung utuh di Node (batas dihitung dalam byte).
+function streamSse(req, res, { type, text, profile, fields, excerpts, school }) {
+  res.status(200);
+  res.set("Content-Type", "text/event-stream; charset=utf-8");
+  res.set("Cache-Control", "no-cache");
+  res.set("Connection", "keep-alive");
+  res.flushHeaders();
+
+  let aborted = false;
+  const send = (event, data) => {
+    if (!res.writableEnded) res.write(`event: ${event}\ndata: ${data}\n\n`);
+  };
+
+  const child = spawnStream(
+    type,
+    (msg, line) => send(msg.event || "message", line),
+    (code, message) => {
+      if (message && !aborted) send("error", JSON.stringify({ ok: false, message }));
+      if (!res.writableEnded) res.end();
+    },
+    { profile, fields, excerpts, school }
+  );
+
+  res.on("close", () => {
+    if (child.exitCode === null) child.kill();
+  });
+
+  if (typeof text === "string") {
+    child.stdin.end(text);
+    return;
+  }
+
+  let size = 0;
+  req.on("data", (chunk) => {
+    size += chunk.length;
+    if (size > STREAM_MAX_CHARS) {
+      if (aborted) return;
+      aborted = true;
+      send("error", JSON.stringify({ ok: false, message: `Teks terlalu panjang (maks ${STREAM_MAX_CHARS} byte).` }));
+      res.end();
+      child.kill();
+      return;
+    }
+    if (!child.stdin.write(chunk)) {
+      req.pause();
+      child.stdin.once("drain", () => req.resume());
+    }
+  });
+  req.on("end", () => child.stdin.end());
+}
+
+module.exports = { evaluateStream, streamSse, STREAM_MAX_CHARS };
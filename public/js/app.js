@@ -13,6 +13,7 @@
   const kurangEl = document.getElementById("kurang");
   const perluEl = document.getElementById("perlu");
   const autoFixEl = document.getElementById("autoFix");
+  const eydMarksEl = document.getElementById("eydMarks");
 
   const strukturBox = document.getElementById("strukturBox");
   const breakdownBox = document.getElementById("breakdownBox");
@@ -26,6 +27,7 @@
     if (!f) return;
     const text = await f.text();
     textInput.value = text;
+    if (liveToggle?.checked) liveSend();
   });
 
   function renderList(ul, items) {
@@ -88,40 +90,185 @@
       `Kejelasan: ${sub.kejelasan ?? "-"} / ${rub.kejelasan ?? "-"}\n` +
       `Kreativitas: ${sub.kreativitas ?? "-"} / ${rub.kreativitas ?? "-"}\n` +
       `Kerapihan: ${sub.kerapihan ?? "-"} / ${rub.kerapihan ?? "-"}\n` +
-      (b.kbbi_loaded === false ? `\n⚠️ KBBI CSV belum terbaca. Pastikan python/kbbi_wordlist.csv ada.` : "");
+      (b.kbbi_loaded === false ? `\n⚠️ KBBI CSV belum terbaca. Pastikan python/kbbi_wordlist.csv ada.` : "") +
+      (b.similar_submissions?.length
+        ? `\n⚠️ Mirip dengan ${b.similar_submissions.length} submisi lain (kemiripan tertinggi ${Math.round(b.similar_submissions[0].jaccard * 100)}%).`
+        : "");
 
     target.appendChild(pre);
   }
 
+  // Span EYD & edit auto-fix dari server = offset code point di teks ternormalisasi
+  // (sama dengan norm_space() di poem_eval.py), bukan offset string JS (UTF-16).
+  function normSpace(s) {
+    return String(s || "")
+      .replace(/\r\n?/g, "\n")
+      .replace(/[ \t]+/g, " ")
+      .replace(/\n{3,}/g, "\n\n")
+      .trim();
+  }
+
+  function applyEdits(chars, edits) {
+    const out = [];
+    let pos = 0;
+    for (const [s, e, rep] of edits) {
+      out.push(chars.slice(pos, s).join(""), rep);
+      pos = e;
+    }
+    out.push(chars.slice(pos).join(""));
+    return out.join("");
+  }
+
+  // span boleh bertumpuk (aturan per kalimat & per kata): teks dipotong di setiap batas span
+  function renderMarks(target, chars, spans) {
+    if (!target) return;
+    target.innerHTML = "";
+    const cuts = [...new Set([0, chars.length, ...spans.flatMap(([s, e]) => [s, e])])].sort((a, b) => a - b);
+    for (let i = 0; i + 1 < cuts.length; i++) {
+      const a = cuts[i];
+      const b = cuts[i + 1];
+      const ids = spans.filter(([s, e]) => s <= a && e >= b).map((sp) => sp[2]);
+      const piece = chars.slice(a, b).join("");
+      if (!ids.length) {
+        target.appendChild(document.createTextNode(piece));
+        continue;
+      }
+      const mark = document.createElement("mark");
+      mark.title = [...new Set(ids)].join(", ");
+      mark.textContent = piece;
+      target.appendChild(mark);
+    }
+  }
+
+  function renderResult(data, text) {
+    const chars = Array.from(normSpace(text));
+    const score = Number(data.score ?? 0);
+    scoreEl.textContent = Number.isFinite(score) ? score : "-";
+    barEl.style.width = Math.max(0, Math.min(100, score)) + "%";
+
+    renderList(benarEl, data.feedback?.benar || []);
+    renderList(kurangEl, data.feedback?.kurang_tepat || []);
+    renderList(perluEl, data.feedback?.perlu_diperbaiki || []);
+    autoFixEl.value = data.auto_fix?.text ?? applyEdits(chars, data.auto_fix?.edits || []);
+    renderMarks(eydMarksEl, chars, data.breakdown?.eyd?.spans || []);
+
+    renderChecklist(strukturBox, data.breakdown?.structure?.checklist || []);
+    renderBreakdown(breakdownBox, data.breakdown?.meta || {});
+  }
+
+  // umpan balik saat mengetik: sesi di server + delta teks (hanya paragraf yang berubah dinilai ulang)
+  const liveToggle = document.getElementById("liveToggle");
+  const spellFixToggle = document.getElementById("spellFixToggle");
+  const spellFix = () => !!spellFixToggle?.checked;
+  const live = { session: null, version: 0, sent: "", timer: null, busy: false, again: false };
+
+  function textDelta(a, b) {
+    const max = Math.min(a.length, b.length);
+    let s = 0;
+    while (s < max && a[s] === b[s]) s++;
+    let e = 0;
+    while (e < max - s && a[a.length - 1 - e] === b[b.length - 1 - e]) e++;
+    return { start: s, end: a.length - e, text: b.slice(s, b.length - e) };
+  }
+
+  async function postSession(body) {
+    const resp = await fetch("/api/evaluate/session", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body)
+    });
+    return { resp, data: await resp.json() };
+  }
+
+  async function liveSend() {
+    if (live.busy) {
+      live.again = true;
+      return;
+    }
+    const text = textInput.value || "";
+    if (live.session && text === live.sent) return;
+    live.busy = true;
+    try {
+      let r = live.session
+        ? await postSession({ session: live.session, version: live.version, delta: textDelta(live.sent, text), spell_fix: spellFix() })
+        : await postSession({ type: btn.dataset.type, text, spell_fix: spellFix() });
+      if (live.session && (r.resp.status === 404 || r.resp.status === 409)) {
+        // sesi kedaluwarsa / tidak sinkron -> mulai sesi baru dengan teks utuh
+        live.session = null;
+        r = await postSession({ type: btn.dataset.type, text, spell_fix: spellFix() });
+      }
+      if (!r.resp.ok || r.data.ok === false) throw new Error(r.data.message || "Gagal memproses.");
+
+      live.session = r.data.session;
+      live.version = r.data.version;
+      live.sent = text;
+      renderResult(r.data.result, text);
+      const p = r.data.paragraphs || {};
+      setStatus(`Umpan balik langsung: ${(p.paragraphs || 0) - (p.reused || 0)} dari ${p.paragraphs || 0} paragraf dinilai ulang.`);
+    } catch (err) {
+      setStatus("Error: " + err.message);
+    } finally {
+      live.busy = false;
+      if (live.again) {
+        live.again = false;
+        liveSend();
+      }
+    }
+  }
+
+  textInput.addEventListener("input", () => {
+    if (!liveToggle?.checked) return;
+    clearTimeout(live.timer);
+    live.timer = setTimeout(liveSend, 600);
+  });
+  liveToggle?.addEventListener("change", () => {
+    if (liveToggle.checked) liveSend();
+  });
+
+  // cek kemiripan: opt-in (default mati), id submisi = tugas + siswa yang diisi, bukan id peramban
+  // (satu komputer lab dipakai banyak siswa). Klik "Nilai" ulang / revisi untuk tugas yang sama tidak
+  // dilaporkan mirip dengan dirinya sendiri; esai siswa yang sama untuk tugas lain tetap terpisah.
+  const similarToggle = document.getElementById("similarToggle");
+  const similarFields = document.getElementById("similarFields");
+  const assignmentInput = document.getElementById("assignmentInput");
+  const studentInput = document.getElementById("studentInput");
+
+  similarToggle?.addEventListener("change", () => {
+    if (similarFields) similarFields.hidden = !similarToggle.checked;
+  });
+
+  function submissionId() {
+    const assignment = (assignmentInput?.value || "").trim();
+    const student = (studentInput?.value || "").trim();
+    return assignment && student ? `${assignment}/${student}` : null;
+  }
+
   btn.addEventListener("click", async () => {
     const type = btn.dataset.type;
     const text = (textInput.value || "").trim();
+    const similar = !!similarToggle?.checked;
+    const submission = similar ? submissionId() : null;
+    if (similar && !submission) {
+      setStatus("Isi tugas dan nama/NIS siswa untuk cek kemiripan.");
+      return;
+    }
 
     setStatus("Memproses penilaian...");
     btn.disabled = true;
 
     try {
+      const body = { type, text, spell_fix: spellFix() };
+      if (similar) Object.assign(body, { similar, submission });
       const resp = await fetch("/api/evaluate", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ type, text })
+        body: JSON.stringify(body)
       });
 
       const data = await resp.json();
       if (!resp.ok || data.ok === false) throw new Error(data.message || "Gagal memproses.");
 
-      const score = Number(data.score ?? 0);
-      scoreEl.textContent = Number.isFinite(score) ? score : "-";
-      barEl.style.width = Math.max(0, Math.min(100, score)) + "%";
-
-      renderList(benarEl, data.feedback?.benar || []);
-      renderList(kurangEl, data.feedback?.kurang_tepat || []);
-      renderList(perluEl, data.feedback?.perlu_diperbaiki || []);
-      autoFixEl.value = data.auto_fix?.text || "";
-
-      renderChecklist(strukturBox, data.breakdown?.structure?.checklist || []);
-      renderBreakdown(breakdownBox, data.breakdown?.meta || {});
-
+      renderResult(data, text);
       setStatus("Selesai ✅");
     } catch (err) {
       setStatus("Error: " + err.message);
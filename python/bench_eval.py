@@ -0,0 +1,262 @@
+import sys, os, time, json, random, argparse, tracemalloc
+
+import poem_eval as pe
+from stage_timing import StageTimer
+
+# =========================================================
+# BENCHMARK EVALUASI: korpus sintetis (14 tipe x beberapa ukuran), waktu per tahap,
+# throughput, memori puncak, dan perbandingan dengan baseline JSON
+# =========================================================
+SIZES = [200, 2000, 20000, 200000]
+
+FUNCTION_WORDS = [
+    "yang", "dan", "di", "ke", "dari", "itu", "ini", "dengan", "untuk", "pada", "tidak", "akan",
+    "juga", "sudah", "ada", "saya", "kami", "mereka", "dia", "karena", "sangat", "dalam",
+]
+
+# pelanggaran EYD yang disisipkan (pola yang dikenali eyd_db.txt / fungsi EYD)
+VIOLATIONS = [
+    lambda r: "di" + r.choice(["rumah", "pasar", "sekolah", "kota", "desa"]),   # di- kata depan disambung
+    lambda r: "ke" + r.choice(["rumah", "pasar", "sekolah", "kota", "desa"]),
+    lambda r: (lambda w: f"{w} {w}")(r.choice(["anak", "jalan", "buku", "rumah", "hari"])),  # ulang tanpa hubung
+    lambda r: r.choice(["buku", "rumah", "tas"]) + " ku",                          # klitik dipisah
+    lambda r: r.choice(["dia", "mereka", "kami"]) + " pun",
+]
+
+def word_pool():
+    # kata KBBI "biasa" saja (huruf kecil, tanpa spasi/hubung), urut supaya deterministik
+    words = sorted(w for w in pe.KBBI_WORDS if w.isalpha() and w.islower() and 3 <= len(w) <= 10)
+    return words or list(pe.FIGURATIVE)
+
+class CorpusGenerator:
+    """Teks Indonesia sintetis yang deterministik per (tipe, ukuran, seed)."""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self.words = word_pool()
+        self.figurative = sorted(pe.FIGURATIVE)
+        self.slang = sorted(pe.SLANG_MAP)
+        self.connectors = sorted(pe.CONNECTORS)
+
+    def _word(self, r, type_key):
+        x = r.random()
+        if x < 0.30:
+            return r.choice(FUNCTION_WORDS)
+        if x < 0.34:
+            return r.choice(self.connectors)
+        if x < 0.37:
+            return r.choice(self.slang)
+        if x < 0.42 or (type_key in pe.CONNOTATIVE_TYPES and x < 0.50):
+            return r.choice(self.figurative)
+        if x < 0.45:
+            return VIOLATIONS[r.randrange(len(VIOLATIONS))](r)
+        return r.choice(self.words)
+
+    def _sentence(self, r, type_key, phrases):
+        n = r.randint(4, 16)
+        ws = [self._word(r, type_key) for _ in range(n)]
+        if phrases and r.random() < 0.3:
+            ws.insert(r.randrange(len(ws) + 1), r.choice(phrases).strip())
+        s = " ".join(ws)
+        if r.random() < 0.9:  # sisanya: huruf kecil di awal kalimat (pelanggaran kapital)
+            s = s[0].upper() + s[1:]
+        if r.random() < 0.05:
+            s = s.replace(" ", " , ", 1)  # spasi sebelum koma
+        return s + r.choice([".", ".", ".", ".", "!", "?", ""])
+
+    def generate(self, type_key: str, size: int) -> str:
+        r = random.Random(f"{self.seed}:{type_key}:{size}")
+        phrases = [k for keys in pe.STRUCTURE_KEYS.get(type_key, {}).values() for k in keys]
+        parts = ["Judul " + r.choice(self.figurative).capitalize() + " " + r.choice(self.words)]
+        total = len(parts[0])
+        while total < size:
+            if type_key == "puisi":
+                # bait 4 larik pendek
+                lines = [" ".join(self._word(r, type_key) for _ in range(r.randint(3, 6))) for _ in range(4)]
+                para = "\n".join(ln[0].upper() + ln[1:] for ln in lines)
+            else:
+                para = " ".join(self._sentence(r, type_key, phrases) for _ in range(r.randint(2, 6)))
+            parts.append(para)
+            total += len(para) + 2
+        return "\n\n".join(parts)[:size]
+
+# =========================================================
+# PENGUKURAN
+# =========================================================
+def bench_case(type_key: str, text: str, min_time: float = 0.5, min_runs: int = 1, fields=None, parallel=False):
+    run = pe.evaluate_parallel if parallel else pe.evaluate
+    if parallel:
+        run(type_key, text)  # pool proses dibuat di luar pengukuran
+    n, stages, t0 = 0, {}, time.perf_counter()
+    while True:
+        timer = StageTimer()
+        run(type_key, text, timer=timer, fields=fields)
+        for name, (sec, calls, _) in timer.stages.items():
+            stages[name] = stages.get(name, 0.0) + sec
+        n += 1
+        el = time.perf_counter() - t0
+        if el >= min_time and n >= min_runs:
+            break
+    ms = el / n * 1000.0
+
+    # memori puncak: satu run terpisah (tracemalloc memperlambat, jangan dicampur ke waktu)
+    tracemalloc.start()
+    run(type_key, text, fields=fields)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "type": type_key,
+        "chars": len(text),
+        "runs": n,
+        "ms_per_doc": round(ms, 3),
+        "docs_per_sec": round(1000.0 / ms, 2) if ms else 0.0,
+        "chars_per_sec": round(len(text) * 1000.0 / ms) if ms else 0,
+        "peak_kib": round(peak / 1024.0, 1),
+        "stages_ms": {k: round(v / n * 1000.0, 3) for k, v in stages.items()},
+    }
+
+def case_key(res):
+    key = f"{res['type']}:{res['size']}"
+    if res.get("parallel"):
+        key += ":parallel"
+    return key + ":" + res["fields"] if res.get("fields") else key
+
+def compare(results, baseline, tolerance: float):
+    """Kembalikan daftar regresi: (kunci, ms baseline, ms sekarang, rasio)."""
+    base = {case_key(b): b for b in baseline.get("results", [])}
+    out = []
+    for res in results:
+        key = case_key(res)
+        b = base.get(key)
+        if not b or not b.get("ms_per_doc"):
+            continue
+        ratio = res["ms_per_doc"] / b["ms_per_doc"]
+        res["baseline_ms"] = b["ms_per_doc"]
+        res["ratio"] = round(ratio, 3)
+        if ratio > 1.0 + tolerance:
+            out.append((key, b["ms_per_doc"], res["ms_per_doc"], ratio))
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark evaluate() pada korpus sintetis semua tipe teks.")
+    ap.add_argument("--types", default="", help="tipe dipisah koma (default: semua VALID_TYPES)")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="ukuran dokumen (karakter), dipisah koma")
+    ap.add_argument("--seed", type=int, default=0, help="seed korpus sintetis")
+    ap.add_argument("--min-time", type=float, default=0.5, help="detik minimum per pengukuran")
+    ap.add_argument("--json", default="", help="tulis hasil lengkap ke file JSON")
+    ap.add_argument("--baseline", default="", help="bandingkan dengan baseline JSON (hasil --json / --save-baseline)")
+    ap.add_argument("--save-baseline", default="", help="simpan hasil sebagai baseline baru")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="batas perlambatan sebelum dianggap regresi (0.25 = 25%%)")
+    ap.add_argument("--dump", default="", help="tulis korpus sintetis ke direktori ini (tanpa benchmark)")
+    ap.add_argument("--fields", default="", help="evaluasi sebagian, set dipisah ';' (mis. 'score,subscores;eyd;auto_fix'): "
+                    "diukur juga dan dibandingkan dengan evaluasi lengkap")
+    ap.add_argument("--parallel", type=int, default=0, metavar="N",
+                    help="ukur juga evaluate_parallel() dengan N proses (per paragraf) dibandingkan serial")
+    args = ap.parse_args(argv)
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()] or sorted(pe.VALID_TYPES)
+    field_sets = [pe.parse_fields(fs) for fs in args.fields.split(";") if fs.strip()]
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    gen = CorpusGenerator(args.seed)
+
+    if args.dump:
+        os.makedirs(args.dump, exist_ok=True)
+        for t in types:
+            for size in sizes:
+                with open(os.path.join(args.dump, f"{t}_{size}.txt"), "w", encoding="utf-8") as f:
+                    f.write(gen.generate(t, size))
+        return 0
+
+    results = []
+    print(f"{'tipe':<14} {'chars':>7} {'ms/dok':>10} {'dok/s':>9} {'chars/s':>10} {'puncak KiB':>11}  tahap terlama")
+    for size in sizes:
+        for t in types:
+            text = pe.norm_space(gen.generate(t, size))
+            res = bench_case(t, text, args.min_time)
+            res["size"] = size
+            results.append(res)
+            top = max(res["stages_ms"].items(), key=lambda kv: kv[1])
+            print(
+                f"{t:<14} {res['chars']:>7} {res['ms_per_doc']:>10.3f} {res['docs_per_sec']:>9.2f} "
+                f"{res['chars_per_sec']:>10} {res['peak_kib']:>11.1f}  {top[0]} ({top[1]:.2f} ms)"
+            )
+            sys.stdout.flush()
+
+    # evaluasi sebagian: rata-rata ms per dokumen (semua tipe) dibandingkan evaluasi lengkap
+    partial = []
+    for fields in field_sets:
+        label = ",".join(sorted(fields))
+        for size in sizes:
+            for t in types:
+                text = pe.norm_space(gen.generate(t, size))
+                res = bench_case(t, text, args.min_time, fields=fields)
+                res["size"], res["fields"] = size, label
+                partial.append(res)
+    if partial:
+        print()
+        print(f"{'fields':<30} {'chars':>7} {'lengkap ms':>11} {'sebagian ms':>12} {'hemat':>7}")
+        for label in dict.fromkeys(r["fields"] for r in partial):
+            for size in sizes:
+                full = [r["ms_per_doc"] for r in results if r["size"] == size]
+                part = [r["ms_per_doc"] for r in partial if r["size"] == size and r["fields"] == label]
+                f_ms, p_ms = sum(full) / len(full), sum(part) / len(part)
+                print(f"{label:<30} {size:>7} {f_ms:>11.3f} {p_ms:>12.3f} {1 - p_ms / f_ms:>7.0%}")
+    # paralel per paragraf: hanya dokumen di atas EVAL_PARALLEL_MIN_CHARS yang benar-benar dibagi
+    parallel = []
+    if args.parallel:
+        pe.PARALLEL_JOBS = args.parallel
+        for size in sizes:
+            for t in types:
+                text = pe.norm_space(gen.generate(t, size))
+                res = bench_case(t, text, args.min_time, parallel=True)
+                res["size"], res["parallel"] = size, args.parallel
+                parallel.append(res)
+        print()
+        print(f"{'paralel':<10} {'chars':>7} {'serial ms':>11} {'paralel ms':>11} {'speedup':>8}")
+        for size in sizes:
+            full = [r["ms_per_doc"] for r in results if r["size"] == size]
+            par = [r["ms_per_doc"] for r in parallel if r["size"] == size]
+            f_ms, p_ms = sum(full) / len(full), sum(par) / len(par)
+            print(f"{args.parallel:<10} {size:>7} {f_ms:>11.3f} {p_ms:>11.3f} {f_ms / p_ms:>7.2f}x")
+    full_results = results
+    results = results + partial + parallel
+
+    # ringkasan per tahap (rata-rata ms per dokumen, per ukuran)
+    stage_names = sorted({k for r in full_results for k in r["stages_ms"]})
+    print()
+    print(f"{'tahap':<30}" + "".join(f"{s:>10}" for s in sizes))
+    for name in stage_names:
+        row = []
+        for size in sizes:
+            vals = [r["stages_ms"].get(name, 0.0) for r in full_results if r["size"] == size]
+            row.append(sum(vals) / len(vals) if vals else 0.0)
+        print(f"{name:<30}" + "".join(f"{v:>10.3f}" for v in row))
+
+    report = {
+        "seed": args.seed,
+        "python": sys.version.split()[0],
+        "dict_version": pe.dict_version(),
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        print()
+        if regressions:
+            print(f"REGRESI (> {args.tolerance:.0%} lebih lambat dari baseline):")
+            for key, before, after, ratio in regressions:
+                print(f"  {key:<22} {before:>10.3f} -> {after:>10.3f} ms ({ratio:.2f}x)")
+        else:
+            print("Tidak ada regresi terhadap baseline.")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
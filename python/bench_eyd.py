@@ -0,0 +1,65 @@
+import sys, time, re, argparse
+
+import poem_eval as pe
+
+# =========================================================
+# BENCHMARK PASS ATURAN EYD: sebelum (pola mentah per request) vs sesudah (EydRulePlan)
+# =========================================================
+SAMPLE = (
+    "Kemarin saya pergi kerumah nenek dirumah sakit. kalau hujan kami berteduh dipasar "
+    "Apa kamu tahu siapa yang datang. Wah indah sekali. Dia pintar tetapi malas "
+    "Mereka pun pergi ke sekolah , sedangkan adik tinggal. Bacalah buku ku setiap hari "
+    "Harga 12.5 ribu per meter, jumlahnya 7,000 orang. Anak anak bermain jalan jalan.\n\n"
+)
+
+def legacy_rule_pass(text: str, type_key: str):
+    # tiruan loop lama: re.finditer(pola string) + flag diturunkan ulang tiap request,
+    # fungsi aturan masing-masing memecah kalimat sendiri (tanpa konteks bersama)
+    hits = 0
+    for rule in pe.EYD_RULES:
+        rid = rule.get("id", "")
+        if type_key == "puisi" and rid in {"TITIK_01", "KOMA_02"}:
+            continue
+        if rule.get("check_type") == "regex":
+            pat = rule.get("pattern", "")
+            flags = pe._re_flags(rule.get("flags", ""))
+            if rid in pe.EYD_HIT_FILTERS:
+                pat = pe.EYD_HIT_FILTERS[rid][0]
+            n = 0
+            for m in re.finditer(pat, text, flags=flags):
+                if rid == "KDEP_01" and not re.match(r"^(di|ke|dari)", m.group(0), flags=re.IGNORECASE):
+                    continue
+                n += 1
+                if n >= 10:
+                    break
+            hits += n
+        elif rule.get("check_type") == "function":
+            f = pe.EYD_FUNCTIONS.get(rule.get("function", ""))
+            if f:
+                hits += len((f(text, data=rule.get("data") or {}) or [])[:10])
+    return hits
+
+def timeit(fn, min_time=1.0):
+    n, t0 = 0, time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        el = time.perf_counter() - t0
+        if el >= min_time:
+            return el / n * 1000.0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark biaya pass aturan EYD per dokumen.")
+    ap.add_argument("--sizes", default="2000,20000", help="ukuran dokumen (karakter), dipisah koma")
+    ap.add_argument("--min-time", type=float, default=1.0, help="detik minimum per pengukuran")
+    args = ap.parse_args(argv)
+
+    print(f"{'chars':>8} {'sebelum (ms)':>14} {'sesudah (ms)':>14} {'speedup':>8}")
+    for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        text = pe.norm_space((SAMPLE * (size // len(SAMPLE) + 1))[:size])
+        before = timeit(lambda: legacy_rule_pass(text, "naratif"), args.min_time)
+        after = timeit(lambda: pe.apply_eyd_rules(text, "naratif"), args.min_time)
+        print(f"{len(text):>8} {before:>14.3f} {after:>14.3f} {before / after:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
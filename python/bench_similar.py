@@ -0,0 +1,75 @@
+import sys, os, time, random, tempfile, argparse
+
+from kbbi_index import read_wordlist_csv
+from near_dup import MinHasher, SimilarityIndex
+
+# =========================================================
+# BENCHMARK INDEKS SUBMISI MIRIP: waktu cari + simpan per dokumen pada N dokumen tersimpan,
+# dan berapa salinan yang sudah diubah sebagian masih ditemukan
+# =========================================================
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def make_doc(rnd, vocab, n_words):
+    return rnd.choices(vocab, k=n_words)
+
+def edited(rnd, vocab, words, frac):
+    out = list(words)
+    for i in rnd.sample(range(len(out)), int(len(out) * frac)):
+        out[i] = rnd.choice(vocab)
+    return out
+
+def hasher_for(words):
+    h = MinHasher()
+    h.update(words)
+    return h
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))] * 1000.0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark indeks submisi mirip (MinHash + LSH di SQLite).")
+    ap.add_argument("--docs", type=int, default=100000, help="jumlah dokumen tersimpan sebelum diukur")
+    ap.add_argument("--words", type=int, default=250, help="kata per dokumen")
+    ap.add_argument("--queries", type=int, default=300, help="dokumen yang dicari + disimpan per jenis")
+    ap.add_argument("--edits", default="0,0.05,0.1,0.2", help="porsi kata yang diganti pada salinan, dipisah koma")
+    ap.add_argument("--db", default="", help="file SQLite (default: file sementara)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    vocab = sorted(read_wordlist_csv(os.path.join(THIS_DIR, "kbbi_wordlist.csv")))
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="similar-bench-"), "similar.db")
+    index = SimilarityIndex(path)
+
+    stored, t0 = [], time.perf_counter()
+    for start in range(0, args.docs, 1000):
+        batch = [make_doc(rnd, vocab, args.words) for _ in range(min(1000, args.docs - start))]
+        stored.extend(rnd.sample(batch, min(len(batch), 5)))  # bahan salinan
+        index.add_many((hasher_for(w), "", f"d{start + i}", "naratif") for i, w in enumerate(batch))
+    fill = time.perf_counter() - t0
+    print(f"isi awal: {args.docs} dokumen dalam {fill:.1f} s, file {os.path.getsize(path) / 1e6:.1f} MB ({path})")
+
+    print(f"{'jenis':>14} {'hash p50':>9} {'cari+simpan p50':>16} {'p95':>8} {'ditemukan':>10} {'Jaccard':>8}")
+    kinds = [("baru", None)] + [(f"salinan {float(e):.0%}", float(e)) for e in args.edits.split(",") if e.strip()]
+    for name, frac in kinds:
+        t_hash, t_check, found, jac = [], [], 0, []
+        for q in range(args.queries):
+            words = make_doc(rnd, vocab, args.words) if frac is None else edited(rnd, vocab, rnd.choice(stored), frac)
+            t0 = time.perf_counter()
+            h = hasher_for(words)
+            h.signature()
+            t1 = time.perf_counter()
+            matches = index.check(h, "", f"q-{name}-{q}", "naratif")
+            t_check.append(time.perf_counter() - t1)
+            t_hash.append(t1 - t0)
+            if matches:
+                found += 1
+                jac.append(matches[0]["jaccard"])
+        mean_j = f"{sum(jac) / len(jac):.2f}" if jac else "-"
+        print(f"{name:>14} {pct(t_hash, 0.5):>7.2f}ms {pct(t_check, 0.5):>14.2f}ms {pct(t_check, 0.95):>6.2f}ms"
+              f" {found / args.queries:>9.1%} {mean_j:>8}")
+    print(index.stats())
+
+if __name__ == "__main__":
+    sys.exit(main())
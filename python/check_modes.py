@@ -0,0 +1,100 @@
+import io, sys, json, random, argparse
+
+import poem_eval as pe
+from bench_eval import CorpusGenerator
+
+# =========================================================
+# CEK KESETARAAN MODE: sesi editor (EvalSession, dengan suntingan acak) dan mode stream harus memberi
+# hasil yang persis sama dengan evaluate() atas teks utuh, termasuk contoh teks di umpan balik.
+# Stream mengirim teks auto-fix per paragraf (event "progress"), bukan edit: dibandingkan sebagai teks.
+# =========================================================
+SIZES = [2000, 20000]
+EDITS = ["a", " ", ". ", "\n\n", "dirumah ", ",", "Apakah "]
+
+def dump(res) -> str:
+    return json.dumps(res, ensure_ascii=False, sort_keys=True)
+
+def first_diff(a: dict, b: dict, path=""):
+    """Jalur kunci pertama yang berbeda + kedua nilainya (untuk laporan)."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        for k in sorted(set(a) | set(b)):
+            if k not in a or k not in b or dump(a[k]) != dump(b[k]):
+                return first_diff(a.get(k), b.get(k), f"{path}.{k}")
+    if isinstance(a, list) and isinstance(b, list) and len(a) == len(b):
+        for i, (x, y) in enumerate(zip(a, b)):
+            if dump(x) != dump(y):
+                return first_diff(x, y, f"{path}[{i}]")
+    return path, a, b
+
+def random_edit(rnd, text: str) -> str:
+    pos = rnd.randrange(len(text) + 1)
+    if rnd.random() < 0.6:
+        return text[:pos] + rnd.choice(EDITS) + text[pos:]
+    return text[:pos] + text[pos + rnd.randint(1, 5):]
+
+def check_session(t: str, text: str, steps: int, rnd):
+    bad = []
+    sid = f"check-{t}-{len(text)}"
+    for step in range(steps + 1):
+        if step:
+            text = random_edit(rnd, text)
+        got, _ = pe.evaluate_session(sid, t, text)
+        want = pe.evaluate(t, text)
+        if dump(got) != dump(want):
+            bad.append((step, first_diff(want, got)))
+    pe.get_session_store().close(sid)
+    return bad
+
+def run_stream(t: str, text: str):
+    """Hasil akhir mode stream, auto_fix.text disusun dari potongan "fix" seperti lib/stream.js."""
+    out = io.StringIO()
+    pe.run_stream(io.StringIO(json.dumps({"type": t}) + "\n" + text, newline=None), out)
+    events = [json.loads(ln) for ln in out.getvalue().splitlines()]
+    res = events[-1]["result"]
+    if res.get("auto_fix", {}).get("streamed"):
+        res["auto_fix"] = {"text": "".join(ev.get("fix", "") for ev in events if ev["event"] == "progress")}
+    return res
+
+def check_stream(t: str, text: str):
+    want = pe.evaluate(t, text)
+    if "edits" in want.get("auto_fix", {}):
+        want = {**want, "auto_fix": {"text": pe.apply_edits(pe.norm_space(text), want["auto_fix"]["edits"])}}
+    got = run_stream(t, text)
+    return [] if dump(got) == dump(want) else [(0, first_diff(want, got))]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bandingkan hasil sesi editor & mode stream dengan evaluate() atas teks utuh.")
+    ap.add_argument("--modes", default="session,stream", help="mode yang dicek, dipisah koma (session, stream)")
+    ap.add_argument("--types", default="", help="tipe dipisah koma (default: semua VALID_TYPES)")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="ukuran dokumen (karakter), dipisah koma")
+    ap.add_argument("--steps", type=int, default=5, help="suntingan acak per dokumen (sesi)")
+    ap.add_argument("--seed", type=int, default=0, help="seed korpus & suntingan")
+    args = ap.parse_args(argv)
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()] or sorted(pe.VALID_TYPES)
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    gen = CorpusGenerator(args.seed)
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    failed_all = 0
+    for mode in modes:
+        total = failed = 0
+        for size in sizes:
+            for t in types:
+                text = gen.generate(t, size)
+                if mode == "session":
+                    bad = check_session(t, text, args.steps, random.Random(f"{args.seed}-{t}-{size}"))
+                    total += args.steps + 1
+                else:
+                    bad = check_stream(t, text)
+                    total += 1
+                failed += len(bad)
+                for step, (path, want, got) in bad[:3]:
+                    print(f"BEDA {mode} {t} {size} langkah {step} {path}:")
+                    print(f"  evaluate: {json.dumps(want, ensure_ascii=False)[:200]}")
+                    print(f"  {mode + ':':<9} {json.dumps(got, ensure_ascii=False)[:200]}")
+        print(f"{mode}: {total} evaluasi dibandingkan, {failed} berbeda")
+        failed_all += failed
+    return 1 if failed_all else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import sys, os, io, csv, json, time, uuid, sqlite3, threading, argparse
+
+# =========================================================
+# ANTREAN JOB PENILAIAN (ujian satu sekolah: ribuan teks, tahan restart)
+# =========================================================
+# Job & item disimpan di SQLite. Runner (thread latar) mengambil item "pending" per potongan
+# (JOB_CHUNK item), menilainya dengan evaluate_batch_item() seperti --batch (paralel per core),
+# lalu menyimpan hasil satu potongan dalam satu transaksi. Setelah crash/restart, item yang sudah
+# selesai tidak dinilai ulang; hanya potongan yang sedang berjalan saat itu yang diulang.
+#
+# Mode --serve: 1 baris JSON per perintah -> 1 baris JSON per jawaban (ditandai "id"), dipakai Node
+# (lib/jobs.js). Perintah: ping, create {items}, status {job}, results {job, offset, limit}, export {job}.
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(THIS_DIR, "..", "data", "jobs.db")
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        n = int(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+    return n if n > 0 else default
+
+JOB_CHUNK = _env_int("JOB_CHUNK", 32)
+# default separuh core: sisanya untuk pool worker yang melayani /api/evaluate
+JOB_WORKERS = _env_int("JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+JOB_IDLE_POLL = 5.0  # detik; runner juga dibangunkan langsung saat job baru dibuat
+
+RESULTS_MAX_LIMIT = 1000
+SUBSCORE_KEYS = ("struktur", "bahasa", "kejelasan", "kreativitas", "kerapihan")
+
+class JobNotFound(Exception):
+    pass
+
+class JobStore:
+    """Job & item di SQLite (WAL). Satu koneksi per objek; dipakai bersama antar thread lewat lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, created REAL NOT NULL, updated REAL NOT NULL, status TEXT NOT NULL,"
+            " total INTEGER NOT NULL, done INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " job_id TEXT NOT NULL, idx INTEGER NOT NULL, item_id TEXT, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, score INTEGER, subscores TEXT, result TEXT, error TEXT,"
+            " PRIMARY KEY (job_id, idx))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_status ON items(job_id, status, idx)")
+        self._lock = threading.Lock()
+
+    def create(self, items) -> dict:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        rows = []
+        for i, it in enumerate(items):
+            iid = it.get("id", i) if isinstance(it, dict) else i
+            rows.append((job_id, i, json.dumps(iid, ensure_ascii=False), json.dumps(it, ensure_ascii=False), "pending"))
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, created, updated, status, total) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, now, now, "queued" if rows else "done", len(rows)),
+                )
+                self._db.executemany(
+                    "INSERT INTO items (job_id, idx, item_id, payload, status) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> dict:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, created, updated, status, total, done, failed FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            raise JobNotFound(job_id)
+        jid, created, updated, status, total, done, failed = row
+        finished = done + failed
+        return {
+            "id": jid,
+            "status": status,
+            "created": created,
+            "updated": updated,
+            "total": total,
+            "done": done,
+            "failed": failed,
+            "pending": total - finished,
+            "progress": round(finished / total, 4) if total else 1.0,
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100):
+        """Item yang sudah selesai (urut index), berhalaman."""
+        self.status(job_id)
+        offset = max(0, int(offset))
+        limit = max(1, min(int(limit), RESULTS_MAX_LIMIT))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, item_id, status, result, error FROM items"
+                " WHERE job_id = ? AND status != 'pending' ORDER BY idx LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+        out = []
+        for idx, iid, status, result, error in rows:
+            it = {"index": idx, "id": json.loads(iid), "ok": status == "done"}
+            if status == "done":
+                it["result"] = json.loads(result)
+            else:
+                it["error"] = error or ""
+            out.append(it)
+        return out
+
+    def export_csv(self, job_id: str) -> str:
+        """Satu baris per item: skor total + subskor (breakdown.meta.subscores)."""
+        self.status(job_id)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, item_id, status, score, subscores, error FROM items WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(("index", "id", "status", "score") + SUBSCORE_KEYS + ("error",))
+        for idx, iid, status, score, subscores, error in rows:
+            iid = json.loads(iid)
+            sub = json.loads(subscores) if subscores else {}
+            w.writerow(
+                (idx, iid if isinstance(iid, str) else json.dumps(iid), status, "" if score is None else score)
+                + tuple(sub.get(k, "") for k in SUBSCORE_KEYS)
+                + (error or "",)
+            )
+        return buf.getvalue()
+
+    def next_chunk(self, limit: int):
+        """(job_id, [(index, item), ...]) dari job tertua yang masih punya item pending, atau (None, [])."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None, []
+            job_id = row[0]
+            rows = self._db.execute(
+                "SELECT idx, payload FROM items WHERE job_id = ? AND status = 'pending' ORDER BY idx LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+            if not rows:
+                # semua item sudah selesai (mis. crash tepat sebelum status job diperbarui)
+                self._db.execute("UPDATE jobs SET status = 'done', updated = ? WHERE id = ?", (time.time(), job_id))
+                return job_id, []
+        return job_id, [(idx, json.loads(payload)) for idx, payload in rows]
+
+    def save(self, job_id: str, results):
+        """Simpan hasil evaluate_batch_item() satu potongan + perbarui counter job (satu transaksi)."""
+        rows, n_done, n_failed = [], 0, 0
+        for r in results:
+            if r.get("ok"):
+                res = r["result"]
+                sub = res.get("breakdown", {}).get("meta", {}).get("subscores")
+                rows.append(("done", res.get("score"), json.dumps(sub) if sub is not None else None,
+                             json.dumps(res, ensure_ascii=False), None, job_id, r["index"]))
+                n_done += 1
+            else:
+                rows.append(("failed", None, None, None, r.get("error", ""), job_id, r["index"]))
+                n_failed += 1
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "UPDATE items SET status = ?, score = ?, subscores = ?, result = ?, error = ?"
+                    " WHERE job_id = ? AND idx = ? AND status = 'pending'",
+                    rows,
+                )
+                self._db.execute(
+                    "UPDATE jobs SET done = done + ?, failed = failed + ?, updated = ?,"
+                    " status = CASE WHEN done + failed + ? + ? >= total THEN 'done' ELSE 'running' END"
+                    " WHERE id = ?",
+                    (n_done, n_failed, now, n_done, n_failed, job_id),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+class JobRunner(threading.Thread):
+    """Thread latar: menilai item pending potongan demi potongan sampai antrean kosong, lalu menunggu."""
+
+    def __init__(self, path: str, workers: int = JOB_WORKERS, chunk: int = JOB_CHUNK):
+        super().__init__(name="job-runner", daemon=True)
+        self.store = JobStore(path)  # koneksi sendiri, terpisah dari thread perintah
+        self.workers = workers
+        self.chunk = chunk
+        self.wake = threading.Event()
+        self.error = None
+
+    def run(self):
+        while True:
+            try:
+                busy = self.drain()
+                self.error = None
+            except Exception as e:
+                busy = False
+                self.error = str(e) or e.__class__.__name__
+                sys.stderr.write(f"job runner: {self.error}\n")
+            if not busy:
+                self.wake.wait(JOB_IDLE_POLL)
+                self.wake.clear()
+
+    def drain(self) -> bool:
+        job_id, rows = self.store.next_chunk(self.chunk)
+        if job_id is None:
+            return False
+        import poem_eval as pe
+        # kamus/aturan yang berubah di disk berlaku mulai putaran berikutnya (proses pool dibuat ulang)
+        pe.apply_reload()
+        pool = None
+        if self.workers > 1:
+            import multiprocessing
+            pool = multiprocessing.Pool(processes=self.workers)
+        try:
+            while job_id is not None:
+                if rows:
+                    if pool is not None:
+                        results = pool.map(pe.evaluate_batch_item, rows, chunksize=1)
+                    else:
+                        results = [pe.evaluate_batch_item(r) for r in rows]
+                    self.store.save(job_id, results)
+                job_id, rows = self.store.next_chunk(self.chunk)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return True
+
+# =========================================================
+# MODE SERVE (NDJSON lewat stdin/stdout)
+# =========================================================
+def handle_job_request(store: JobStore, runner, req: dict):
+    rid = req.get("id")
+    op = req.get("op", "")
+    if op == "ping":
+        return {"id": rid, "ok": True, "pong": True, "pid": os.getpid(), "runner_error": runner.error if runner else None}
+    if op == "create":
+        items = req.get("items")
+        if not isinstance(items, list):
+            return {"id": rid, "ok": False, "error": "items harus list"}
+        job = store.create(items)
+        if runner is not None:
+            runner.wake.set()
+        return {"id": rid, "ok": True, "job": job}
+    job_id = str(req.get("job", ""))
+    try:
+        if op == "status":
+            return {"id": rid, "ok": True, "job": store.status(job_id)}
+        if op == "results":
+            offset = max(0, int(req.get("offset", 0) or 0))
+            items = store.results(job_id, offset, int(req.get("limit", 100) or 100))
+            return {"id": rid, "ok": True, "job": store.status(job_id), "offset": offset, "results": items}
+        if op == "export":
+            return {"id": rid, "ok": True, "csv": store.export_csv(job_id)}
+    except JobNotFound:
+        return {"id": rid, "ok": False, "code": "NOT_FOUND", "error": "Job tidak ditemukan."}
+    return {"id": rid, "ok": False, "error": f"op tidak dikenal: {op}"}
+
+def serve(path: str, workers: int = JOB_WORKERS, inp=None, out=None):
+    if inp is None:
+        # proses pool (fork dari thread runner) menutup sys.stdin saat mulai; kalau thread utama sedang
+        # memblok di sys.stdin.readline(), lock buffer-nya ikut tersalin -> anak macet. Perintah dibaca
+        # lewat fd duplikat, sys.stdin diganti devnull.
+        inp = io.TextIOWrapper(os.fdopen(os.dup(0), "rb"), encoding="utf-8")
+        sys.stdin = open(os.devnull)
+    out = out or sys.stdout
+    import poem_eval as pe  # kamus dimuat sekali di proses ini, lalu dibagi ke proses pool (fork)
+    pe.start_watcher()
+    store = JobStore(path)
+    runner = JobRunner(path, workers)
+    runner.start()  # job yang belum selesai sebelum restart langsung dilanjutkan
+    while True:
+        line = inp.readline()
+        if not line:
+            break
+        ln = line.strip()
+        if not ln:
+            continue
+        rid = None
+        try:
+            req = json.loads(ln)
+            if not isinstance(req, dict):
+                raise ValueError("request harus objek JSON")
+            rid = req.get("id")
+            resp = handle_job_request(store, runner, req)
+        except Exception as e:
+            resp = {"id": rid, "ok": False, "error": str(e) or e.__class__.__name__}
+        out.write(json.dumps(resp, ensure_ascii=False) + "\n")
+        out.flush()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Antrean job penilaian (SQLite).")
+    ap.add_argument("--db", default=os.environ.get("JOB_DB") or DEFAULT_DB, help="file SQLite job")
+    ap.add_argument("--serve", action="store_true", help="NDJSON perintah lewat stdin/stdout + runner latar")
+    ap.add_argument("--workers", type=int, default=JOB_WORKERS, help="proses penilai (default: separuh core)")
+    ap.add_argument("--status", metavar="JOB", default="", help="cetak progres job")
+    ap.add_argument("--export", metavar="JOB", default="", help="cetak CSV subskor job")
+    args = ap.parse_args(argv)
+
+    if args.serve:
+        serve(args.db, max(1, args.workers))
+        return
+    store = JobStore(args.db)
+    try:
+        if args.status:
+            sys.stdout.write(json.dumps(store.status(args.status), ensure_ascii=False, indent=2) + "\n")
+        elif args.export:
+            sys.stdout.write(store.export_csv(args.export))
+        else:
+            ap.print_help()
+    except JobNotFound:
+        sys.stderr.write(f"job tidak ditemukan: {args.status or args.export}\n")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import sys, os, csv, mmap, struct, hashlib
+
+# =========================================================
+# INDEX KBBI BINER (sorted string table, dibaca via mmap)
+# =========================================================
+# Format file (little-endian):
+#   MAGIC (8 byte)
+#   HEADER: csv_mtime_ns (u64), csv_size (u64), sha256 csv (32 byte), jumlah kata N (u32)
+#   OFFSETS: (N+1) x u32 -> posisi absolut tiap kata di file
+#   BLOB: kata-kata UTF-8 terurut (urutan byte), tanpa pemisah
+# Semua proses worker yang membuka file yang sama berbagi satu salinan di page cache.
+
+MAGIC = b"KBBIIDX1"
+HEADER = struct.Struct("<QQ32sI")
+
+def _clean_cell(s: str) -> str:
+    s = (s or "").strip().lower()
+    s = s.lstrip("\ufeff")  # BOM
+    if len(s) >= 2 and ((s[0] == s[-1] == '"') or (s[0] == s[-1] == "'")):
+        s = s[1:-1].strip()
+    return s
+
+def read_wordlist_csv(csv_path: str):
+    words = set()
+    with open(csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        reader = csv.reader(f)
+        for i, row in enumerate(reader):
+            if not row:
+                continue
+            w = _clean_cell(row[0])
+            # baris pertama "kata" = header; "kata" di baris lain adalah kata KBBI biasa
+            if not w or (i == 0 and w == "kata"):
+                continue
+            if w.startswith("'") and w[1:].isalpha():
+                words.add(w[1:])
+            words.add(w)
+    return words
+
+def file_sha256(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.digest()
+
+def build_index(csv_path: str, idx_path: str):
+    st = os.stat(csv_path)
+    digest = file_sha256(csv_path)
+    keys = sorted(w.encode("utf-8") for w in read_wordlist_csv(csv_path))
+
+    base = len(MAGIC) + HEADER.size + 4 * (len(keys) + 1)
+    offsets, pos = [], base
+    for k in keys:
+        offsets.append(pos)
+        pos += len(k)
+    offsets.append(pos)
+
+    tmp = f"{idx_path}.{os.getpid()}.tmp"  # beberapa worker bisa membangun bersamaan (muat ulang)
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(st.st_mtime_ns, st.st_size, digest, len(keys)))
+        f.write(struct.pack("<%dI" % len(offsets), *offsets))
+        f.write(b"".join(keys))
+    # atomic: pembaca lain tidak pernah melihat file setengah jadi
+    os.replace(tmp, idx_path)
+    return len(keys)
+
+class KbbiIndex:
+    """Set kata KBBI read-only di atas mmap; mendukung `in` dan `len()`."""
+
+    def __init__(self, idx_path: str):
+        with open(idx_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError("bukan file index KBBI")
+        self.mtime_ns, self.size, self.sha256, self.n = HEADER.unpack_from(self._mm, len(MAGIC))
+        start = len(MAGIC) + HEADER.size
+        self._off = memoryview(self._mm)[start:start + 4 * (self.n + 1)].cast("I")
+
+    def __len__(self):
+        return self.n
+
+    def __contains__(self, word):
+        if not isinstance(word, str):
+            return False
+        key = word.encode("utf-8")
+        mm, off = self._mm, self._off
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            cur = mm[off[mid]:off[mid + 1]]
+            if cur < key:
+                lo = mid + 1
+            elif cur > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __iter__(self):
+        mm, off = self._mm, self._off
+        for i in range(self.n):
+            yield mm[off[i]:off[i + 1]].decode("utf-8")
+
+    def is_fresh(self, csv_path: str) -> bool:
+        # cepat: mtime + ukuran sama -> anggap segar; kalau beda, pastikan lewat hash isi
+        try:
+            st = os.stat(csv_path)
+        except OSError:
+            return True
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.size:
+            return True
+        return st.st_size == self.size and file_sha256(csv_path) == self.sha256
+
+def open_index(idx_path: str, csv_path: str):
+    """Index mmap jika ada & segar; None jika harus fallback ke CSV."""
+    if sys.byteorder != "little" or not os.path.exists(idx_path):
+        return None
+    try:
+        idx = KbbiIndex(idx_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    return idx if idx.is_fresh(csv_path) else None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    this_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(this_dir, "kbbi_wordlist.csv")
+    idx_path = os.path.join(this_dir, "kbbi_wordlist.idx")
+    if "--if-stale" in argv and open_index(idx_path, csv_path) is not None:
+        print("index KBBI sudah terbaru:", idx_path)
+        return
+    n = build_index(csv_path, idx_path)
+    print(f"index KBBI dibuat: {idx_path} ({n} kata)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os, re, hashlib, threading
+from collections import OrderedDict
+
+# =========================================================
+# OVERLAY KAMUS PER SEKOLAH (di atas KBBI bersama)
+# =========================================================
+# File <EVAL_OVERLAY_DIR>/<nama>.txt, satu kata per baris (besar/kecil huruf sama saja):
+#   kata / +kata  -> diterima seperti kata KBBI (nama lokal, kata daerah, istilah mata pelajaran)
+#   -kata         -> ditandai "tidak terverifikasi KBBI" walau ada di kamus bersama
+#   # ...         -> komentar
+# Kata dasar berlaku juga untuk bentuk berimbuhan (dicek lewat possible_roots() seperti KBBI).
+# Overlay hanya menyimpan kata miliknya sendiri (frozenset kecil); kamus bersama tidak pernah disalin,
+# jadi ratusan sekolah dalam satu worker cukup beberapa KB per sekolah.
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(THIS_DIR, "overlays")
+NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+class OverlayNotFound(LookupError):
+    code = "OVERLAY_NOT_FOUND"
+    status = 404
+
+class WordOverlay:
+    """Kata tambahan (allow) & kata yang ditolak (deny) satu sekolah, huruf kecil."""
+    __slots__ = ("name", "allow", "deny", "version")
+
+    def __init__(self, name: str, allow, deny):
+        self.name = name
+        self.allow = frozenset(allow)
+        self.deny = frozenset(deny)
+        h = hashlib.sha256()
+        h.update("\n".join(sorted(self.allow)).encode("utf-8"))
+        h.update(b"\0")
+        h.update("\n".join(sorted(self.deny)).encode("utf-8"))
+        self.version = h.hexdigest()[:16]
+
+    @property
+    def key(self) -> str:
+        # ikut di kunci cache hasil & sesi: isi overlay berubah -> hasil lama tidak dipakai
+        return f"{self.name}:{self.version}"
+
+def parse_overlay(lines):
+    """Baris file overlay -> (allow, deny). Kata yang muncul di keduanya: deny menang."""
+    allow, deny = set(), set()
+    for ln in lines:
+        w = ln.strip().lstrip("\ufeff")  # BOM
+        if not w or w.startswith("#"):
+            continue
+        target = allow
+        if w[0] in "+-":
+            target = deny if w[0] == "-" else allow
+            w = w[1:].strip()
+        w = w.lower()
+        if w:
+            target.add(w)
+    return allow - deny, deny
+
+def read_overlay(path: str, name: str) -> WordOverlay:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        allow, deny = parse_overlay(f)
+    return WordOverlay(name, allow, deny)
+
+class OverlayStore:
+    """Overlay per nama, dimuat saat pertama diminta & disimpan (LRU, maks `max_items`).
+
+    Tiap get() memeriksa stat file (mtime, ukuran): file yang berubah dimuat ulang, file yang
+    dihapus -> OverlayNotFound. Aman dipakai bersama antar thread.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, max_items: int = 256):
+        self.directory = directory
+        self.max_items = max_items
+        self._items = OrderedDict()  # nama -> (stat, WordOverlay)
+        self._lock = threading.Lock()
+        self.loads = self.hits = self.evictions = 0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name + ".txt")
+
+    def get(self, name: str) -> WordOverlay:
+        if not NAME_RE.match(name or ""):
+            raise ValueError(f"nama overlay tidak valid: {name!r}")
+        path = self.path(name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._items.pop(name, None)
+            raise OverlayNotFound(f"overlay kamus sekolah tidak ditemukan: {name}")
+        state = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            it = self._items.get(name)
+            if it is not None and it[0] == state:
+                self._items.move_to_end(name)
+                self.hits += 1
+                return it[1]
+        ov = read_overlay(path, name)  # di luar lock: file kecil, muat ganda sesekali tidak masalah
+        with self._lock:
+            self._items[name] = (state, ov)
+            self._items.move_to_end(name)
+            self.loads += 1
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return ov
+
+    def stats(self):
+        with self._lock:
+            words = sum(len(ov.allow) + len(ov.deny) for _, ov in self._items.values())
+            return {
+                "dir": self.directory,
+                "size": len(self._items),
+                "max_items": self.max_items,
+                "words": words,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+def store_from_env() -> OverlayStore:
+    try:
+        max_items = int(os.environ.get("EVAL_OVERLAY_MAX", "") or 256)
+    except ValueError:
+        max_items = 256
+    return OverlayStore((os.environ.get("EVAL_OVERLAY_DIR") or "").strip() or DEFAULT_DIR, max(1, max_items))
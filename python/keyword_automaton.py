@@ -0,0 +1,115 @@
+import re
+from functools import lru_cache
+
+# =========================================================
+# PENCARI FRASA KATA KUNCI (trie per kata, satu lintasan token)
+# =========================================================
+# Semua penanda (struktur, penghubung, pemicu EYD) berupa kata utuh atau deret kata pendek,
+# jadi automaton dibangun di atas token, bukan karakter: batas kata otomatis terjaga
+# ("jadi" tidak cocok di dalam "terjadi") dan biaya = jumlah token x panjang frasa terpanjang.
+
+TOKEN_RE = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ]+(?:[-'][A-Za-zÀ-ÖØ-öø-ÿ]+)?|\d+")  # sama dengan poem_eval.TOKEN_RE
+_END = ""  # kunci penanda akhir frasa di node trie (token tidak pernah kosong)
+_LETTER = "A-Za-zÀ-ÖØ-öø-ÿ"
+_BEFORE = f"(?<![{_LETTER}0-9])(?<![{_LETTER}][-'])"
+_AFTER = f"(?![{_LETTER}0-9])(?![-'][{_LETTER}])"
+
+def _trie_pattern(node):
+    # trie karakter -> regex dengan prefiks bersama; spasi antarkata = \s+
+    alts = [(r"\s+" if ch == " " else re.escape(ch)) + _trie_pattern(node[ch]) for ch in sorted(k for k in node if k)]
+    if not alts:
+        return ""
+    if len(alts) == 1 and _END not in node:
+        return alts[0]
+    return "(?:" + "|".join(alts) + ")" + ("?" if _END in node else "")
+
+class PhraseAutomaton:
+    """Kumpulan frasa -> trie kata. `particles`: akhiran partikel yang boleh menempel pada kata
+    terakhir frasa (mis. "kah": "apakah" dihitung sebagai "apa")."""
+
+    def __init__(self, phrases, particles=()):
+        self.root = {}
+        self.max_words = 1
+        self.particles = tuple(particles)
+        self._chars = {}  # trie per karakter, bahan self.regex
+        self._regex = None
+        for ph in phrases:
+            ws = ph.lower().split()
+            if not ws:
+                continue
+            node = self.root
+            for w in ws:
+                node = node.setdefault(w, {})
+            node[_END] = key = " ".join(ws)
+            self.max_words = max(self.max_words, len(ws))
+            node = self._chars
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+    def _step(self, node, tok):
+        nxt = node.get(tok)
+        if nxt is None and self.particles:
+            for p in self.particles:
+                if len(tok) > len(p) and tok.endswith(p):
+                    cand = node.get(tok[:-len(p)])
+                    if cand is not None and _END in cand:
+                        return {_END: cand[_END]}
+        return nxt
+
+    def iter_hits(self, text: str, spans=None):
+        """Yield (frasa, offset) untuk setiap kemunculan; kata dalam frasa hanya dipisah spasi.
+
+        spans: [(token, start, end)] hasil TOKEN_RE pada `text` (mis. AnalysisContext.token_spans),
+        supaya teks tidak ditokenisasi ulang.
+        """
+        if spans is None:
+            spans = [(m.group(0), m.start(), m.end()) for m in TOKEN_RE.finditer(text)]
+        low = [t.lower() for (t, _, _) in spans]
+        root, step, n = self.root, self._step, len(low)
+        if self.particles:
+            starts = range(n)
+        else:
+            # kebanyakan token bukan awal frasa: saring dulu dengan lookup dict
+            starts = [i for i, tok in enumerate(low) if tok in root]
+        for i in starts:
+            node = step(root, low[i])
+            if node is None:
+                continue
+            j = i
+            while True:
+                ph = node.get(_END)
+                if ph is not None:
+                    yield ph, spans[i][1]
+                j += 1
+                if j >= n or len(node) == (ph is not None) or not text[spans[j - 1][2]:spans[j][1]].isspace():
+                    break
+                node = step(node, low[j])
+                if node is None:
+                    break
+
+    def find(self, text: str, spans=None):
+        """{frasa: [offset, ...]}"""
+        out = {}
+        for ph, pos in self.iter_hits(text, spans):
+            out.setdefault(ph, []).append(pos)
+        return out
+
+    @property
+    def regex(self):
+        # trie yang sama sebagai satu regex (dicocokkan di C, huruf kecil): untuk teks pendek tanpa
+        # token siap pakai, mis. tiap kalimat di aturan EYD. Batas kata = batas token TOKEN_RE.
+        if self._regex is None:
+            tail = "(?:" + "|".join(map(re.escape, self.particles)) + ")?" if self.particles else ""
+            self._regex = re.compile(_BEFORE + "(" + _trie_pattern(self._chars) + ")" + tail + _AFTER)
+        return self._regex
+
+    def first(self, text: str):
+        # lower() lalu regex biasa jauh lebih cepat daripada re.IGNORECASE
+        m = self.regex.search(text.lower())
+        return " ".join(m.group(1).split()) if m else None
+
+@lru_cache(maxsize=64)
+def phrase_automaton(phrases: tuple, particles: tuple = ()):
+    # daftar kata dari eyd_db.txt -> satu automaton (di-cache per isi daftar)
+    return PhraseAutomaton(phrases, particles)
@@ -0,0 +1,202 @@
+import os, time, struct, sqlite3, hashlib, threading
+
+# =========================================================
+# INDEKS SUBMISI MIRIP (salin-tempel antarsiswa), MinHash + LSH di SQLite
+# =========================================================
+# Dokumen -> shingle 3 kata (token tokenize_words(), huruf kecil) -> tanda tangan MinHash 128 bin
+# (one-permutation hashing: satu hash per shingle, minimum per bin; bin kosong diisi dari bin
+# berikutnya + rotasi, jadi biaya O(jumlah shingle), bukan O(shingle x 128)).
+# LSH: 32 band x 4 baris; tiap band -> satu kunci 64-bit (ikut nama sekolah), disimpan di tabel
+# `bands` (PRIMARY KEY key, doc). Query = 32 lookup index + skor Jaccard dari tanda tangan
+# kandidat; tidak pernah membandingkan dengan semua dokumen. Teks asli tidak disimpan.
+#
+# Peluang jadi kandidat: J=0.3 -> ~23%, J=0.5 -> ~87%, J=0.6 -> ~99%.
+
+NUM_BINS = 128
+BANDS = 32
+ROWS = NUM_BINS // BANDS
+SHINGLE = 3          # kata per shingle
+MIN_SHINGLES = 8     # teks lebih pendek tidak diindeks (terlalu sedikit untuk disebut salinan)
+CANDIDATES_MAX = 100  # kandidat terbanyak (urut jumlah band yang sama) yang dinilai per query
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(THIS_DIR, "..", "data", "similar.db")
+
+_EMPTY = 1 << 64
+_ROTATE = 1 << 57   # nilai bin < 2^57; bin pinjaman + t * _ROTATE tidak pernah sama dengan aslinya
+_SIG = struct.Struct(f"<{NUM_BINS}I")
+_BAND = struct.Struct(f"<{ROWS}I")
+
+def _h64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+class MinHasher:
+    """Tanda tangan satu dokumen, diisi bertahap (update per paragraf: shingle lintas paragraf tetap dihitung)."""
+    __slots__ = ("mins", "tail", "shingles", "_digest")
+
+    def __init__(self):
+        self.mins = [_EMPTY] * NUM_BINS
+        self.tail = []
+        self.shingles = 0
+        self._digest = hashlib.sha256()
+
+    def update(self, tokens):
+        words = self.tail + [t.lower() for t in tokens]
+        if len(words) == len(self.tail):
+            return
+        self._digest.update(("\0".join(words[len(self.tail):]) + "\0").encode("utf-8"))
+        mins = self.mins
+        for i in range(len(words) - SHINGLE + 1):
+            h = _h64(" ".join(words[i:i + SHINGLE]).encode("utf-8"))
+            b, v = h % NUM_BINS, h >> 7
+            if v < mins[b]:
+                mins[b] = v
+        self.shingles += max(0, len(words) - SHINGLE + 1)
+        self.tail = words[-(SHINGLE - 1):]
+
+    @property
+    def digest(self) -> bytes:
+        return self._digest.digest()[:16]
+
+    def signature(self):
+        """Tuple NUM_BINS nilai 32-bit; None kalau shingle < MIN_SHINGLES."""
+        if self.shingles < MIN_SHINGLES:
+            return None
+        mins, sig, nxt = self.mins, [0] * NUM_BINS, None
+        # densifikasi: bin kosong meminjam bin terisi berikutnya (melingkar), digeser t * _ROTATE
+        for j in range(2 * NUM_BINS - 1, -1, -1):
+            i = j % NUM_BINS
+            if mins[i] != _EMPTY:
+                nxt = j
+                if j < NUM_BINS:
+                    sig[i] = mins[i]
+            elif j < NUM_BINS:
+                sig[i] = mins[nxt % NUM_BINS] + (nxt - j) * _ROTATE
+        return tuple((x ^ (x >> 32)) & 0xFFFFFFFF for x in sig)
+
+def jaccard(a, b) -> float:
+    """Perkiraan Jaccard dua tanda tangan = porsi bin yang sama."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+def band_keys(sig, scope: str):
+    pre = scope.encode("utf-8") + b"\0"
+    return [
+        int.from_bytes(
+            hashlib.blake2b(pre + bytes((b,)) + _BAND.pack(*sig[b * ROWS:(b + 1) * ROWS]), digest_size=8).digest(),
+            "little", signed=True,
+        )
+        for b in range(BANDS)
+    ]
+
+class SimilarityIndex:
+    """Tanda tangan & band LSH di SQLite (WAL). Satu koneksi per objek, dipakai bersama antar thread lewat lock;
+    beberapa proses worker boleh membuka file yang sama."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY, scope TEXT NOT NULL, ref TEXT NOT NULL, type TEXT NOT NULL,"
+            " created REAL NOT NULL, shingles INTEGER NOT NULL, digest BLOB NOT NULL, sig BLOB NOT NULL)"
+        )
+        # teks sama dari submisi sama (atau tanpa ref) disimpan sekali
+        self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS docs_digest ON docs(scope, digest, ref)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS bands (key INTEGER NOT NULL, doc INTEGER NOT NULL, PRIMARY KEY (key, doc))"
+            " WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+        self.queries = self.inserts = 0
+
+    def _query(self, sig, keys, ref: str, limit: int, min_jaccard: float):
+        rows = self._db.execute(
+            f"SELECT doc FROM bands WHERE key IN ({','.join('?' * len(keys))})"
+            " GROUP BY doc ORDER BY COUNT(*) DESC LIMIT ?",
+            (*keys, CANDIDATES_MAX),
+        ).fetchall()
+        if not rows:
+            return []
+        ids = [r[0] for r in rows]
+        out = []
+        for did, dref, dtype, created, blob in self._db.execute(
+            f"SELECT id, ref, type, created, sig FROM docs WHERE id IN ({','.join('?' * len(ids))})", ids
+        ):
+            if ref and dref == ref:
+                continue
+            j = jaccard(sig, _SIG.unpack(blob))
+            if j >= min_jaccard:
+                out.append({"id": did, "submission": dref or None, "type": dtype, "jaccard": round(j, 2),
+                            "created": round(created, 3)})
+        out.sort(key=lambda m: (-m["jaccard"], m["id"]))
+        return out[:limit]
+
+    def _add(self, sig, keys, digest: bytes, scope: str, ref: str, type_key: str, shingles: int):
+        cur = self._db.execute(
+            "INSERT OR IGNORE INTO docs (scope, ref, type, created, shingles, digest, sig) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (scope, ref, type_key, time.time(), shingles, digest, _SIG.pack(*sig)),
+        )
+        if cur.rowcount:
+            self._db.executemany("INSERT OR IGNORE INTO bands (key, doc) VALUES (?, ?)", [(k, cur.lastrowid) for k in keys])
+            self.inserts += 1
+
+    def query(self, hasher: MinHasher, scope: str = "", ref: str = "", limit: int = 5, min_jaccard: float = 0.5):
+        sig = hasher.signature()
+        if sig is None:
+            return None
+        keys = band_keys(sig, scope)
+        with self._lock:
+            self.queries += 1
+            return self._query(sig, keys, ref, limit, min_jaccard)
+
+    def check(self, hasher: MinHasher, scope: str = "", ref: str = "", type_key: str = "",
+              limit: int = 5, min_jaccard: float = 0.5):
+        """Cari submisi mirip lalu simpan dokumen ini (satu transaksi). None = teks terlalu pendek."""
+        sig = hasher.signature()
+        if sig is None:
+            return None
+        keys = band_keys(sig, scope)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self.queries += 1
+                out = self._query(sig, keys, ref, limit, min_jaccard)
+                self._add(sig, keys, hasher.digest, scope, ref, type_key, hasher.shingles)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return out
+
+    def add_many(self, items):
+        """[(hasher, scope, ref, type), ...] dalam satu transaksi (isi awal / benchmark)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for hasher, scope, ref, type_key in items:
+                    sig = hasher.signature()
+                    if sig is not None:
+                        self._add(sig, band_keys(sig, scope), hasher.digest, scope, ref, type_key, hasher.shingles)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def stats(self):
+        with self._lock:
+            docs = self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        return {"db": self.path, "docs": docs, "queries": self.queries, "inserts": self.inserts}
+
+def index_from_env():
+    """(SimilarityIndex, batas hasil, Jaccard minimum) dari EVAL_SIMILAR_DB / _LIMIT / _MIN."""
+    def num(name, default, cast=int):
+        try:
+            return cast(os.environ.get(name, "") or default)
+        except ValueError:
+            return default
+
+    path = (os.environ.get("EVAL_SIMILAR_DB") or "").strip() or DEFAULT_DB
+    return SimilarityIndex(path), max(1, num("EVAL_SIMILAR_LIMIT", 5)), num("EVAL_SIMILAR_MIN", 0.5, float)
@@ -1,87 +1,252 @@
-import sys, json, re, os, csv
-from collections import Counter
+import sys, io, json, re, os, time, argparse, itertools, struct, sqlite3, threading, contextvars
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
+
+from kbbi_index import open_index, read_wordlist_csv, file_sha256, build_index as build_kbbi_index
+from result_cache import cache_key, cache_from_env
+from stage_timing import StageTimer, stage
+from keyword_automaton import PhraseAutomaton, phrase_automaton
+from spell_index import open_index as open_spell_index, build_index as build_spell_index
+from smash_model import open_model as open_smash_model, build_model as build_smash_model
+from regex_guard import RuleTimeout, Deadline, cancel_alarm, check_pattern
+from kbbi_overlay import store_from_env as overlay_store_from_env
+from near_dup import MinHasher, index_from_env as similarity_index_from_env
 
 # =========================================================
 # PATHS
 # =========================================================
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 KBBI_CSV = os.path.join(THIS_DIR, "kbbi_wordlist.csv")
+KBBI_INDEX = os.path.join(THIS_DIR, "kbbi_wordlist.idx")
+SPELL_INDEX = os.path.join(THIS_DIR, "kbbi_wordlist.sym")
+SMASH_MODEL = os.path.join(THIS_DIR, "kbbi_wordlist.tri")
 EYD_DB_TXT = os.path.join(THIS_DIR, "eyd_db.txt")
 
+# =========================================================
+# MESIN EVALUASI (kamus + aturan yang sudah dimuat, tidak diubah setelah dibuat)
+# =========================================================
+# Muat ulang tidak mengubah isi Evaluator yang sedang dipakai: set_kbbi()/set_eyd() membuat
+# Evaluator baru lalu mengganti ENGINE (satu penugasan referensi). Evaluasi yang sedang berjalan
+# memegang Evaluator-nya sendiri lewat ACTIVE_ENGINE (per thread/konteks, lihat pinned()), jadi
+# banyak thread boleh menilai bersamaan dengan satu salinan kamus (--serve --threads).
+# KBBI_WORDS, EYD_RULES, dst. tetap ada sebagai cermin ENGINE untuk skrip bench / status.
+class Evaluator:
+    """Kamus KBBI, aturan EYD (EydRulePlan), index saran ejaan & model trigram satu versi;
+    evaluate() murni, aman dipanggil dari banyak thread sekaligus."""
+
+    def __init__(self, words=frozenset(), source="", kbbi_loaded=False, rules=(), plan=None, eyd_loaded=False,
+                 spell=None, files=None, smash=None):
+        self.words = words
+        self.kbbi_source = source
+        self.kbbi_loaded = kbbi_loaded
+        self.rules = tuple(rules)
+        self.plan = plan
+        self.eyd_loaded = eyd_loaded
+        self.files = dict(files or {})  # path -> (mtime_ns, size, sha256) isi yang dimuat
+        self._spell = spell  # SpellIndex (mmap); None = belum dibuka, False = tidak tersedia
+        self._smash = smash  # SmashModel, sama seperti _spell
+        self._version = None
+        self._lock = threading.Lock()
+        # cache per Evaluator: versi kamus lain tidak pernah melihat (atau perlu mengosongkan) isinya
+        self.kbbi_root = lru_cache(maxsize=65536)(self._kbbi_root)
+        self.suggest_word = lru_cache(maxsize=16384)(self._suggest_word)
+
+    def with_kbbi(self, words, source, spell=None, smash=None, state=None):
+        files = {**self.files, KBBI_CSV: state} if state else self.files
+        return Evaluator(words, source, True, self.rules, self.plan, self.eyd_loaded, spell, files, smash)
+
+    def with_eyd(self, rules, plan, state=None):
+        # kamus sama -> index saran ejaan & model trigram yang sudah dibuka ikut dipakai
+        files = {**self.files, EYD_DB_TXT: state} if state else self.files
+        return Evaluator(self.words, self.kbbi_source, self.kbbi_loaded, rules, plan, True, self._spell, files,
+                         self._smash)
+
+    @property
+    def version(self) -> str:
+        """Sidik jari kamus + aturan + kode (kunci cache hasil & sesi)."""
+        if self._version is None:
+            # kamus & aturan: isi yang dimuat Evaluator ini (bukan file di disk yang mungkin sudah berubah)
+            parts = [self.files[p][2].hex()[:16] if p in self.files else "-" for p in (KBBI_CSV, EYD_DB_TXT)]
+            self._version = "-".join(parts + [code_version()])
+        return self._version
+
+    def _kbbi_root(self, low: str):
+        for cand in possible_roots(low):
+            if cand in self.words:
+                return cand
+        return None
+
+    def spell_index(self):
+        if self._spell is None:
+            with self._lock:
+                if self._spell is None:
+                    self._spell = open_spell(self.kbbi_loaded)
+        return self._spell or None
+
+    def smash_model(self):
+        if self._smash is None:
+            with self._lock:
+                if self._smash is None:
+                    self._smash = open_smash(self.kbbi_loaded)
+        return self._smash or None
+
+    def _suggest_word(self, low: str):
+        idx = self.spell_index()
+        if idx is None or len(low) < 3:
+            return ()
+        return tuple(idx.suggest(low, k=SPELL_SUGGESTIONS))
+
+    def evaluate(self, type_key: str, text: str, timer=None, fields=None):
+        """Penilaian tanpa cache hasil / overlay sekolah (lihat evaluate())."""
+        token = ACTIVE_ENGINE.set(self)
+        try:
+            return _evaluate(type_key, text, timer=timer, fields=fields)
+        finally:
+            ACTIVE_ENGINE.reset(token)
+
+ENGINE = Evaluator()
+ENGINE_LOCK = threading.Lock()  # set_kbbi / set_eyd dari beberapa thread tidak saling menimpa
+ACTIVE_ENGINE = contextvars.ContextVar("evaluator", default=None)
+
+def engine() -> Evaluator:
+    """Evaluator evaluasi yang sedang berjalan, atau ENGINE terbaru di luar evaluasi."""
+    return ACTIVE_ENGINE.get() or ENGINE
+
+@contextmanager
+def pinned():
+    # satu request = satu Evaluator dari awal sampai akhir, walau ENGINE diganti thread lain di tengahnya
+    eng = ACTIVE_ENGINE.get()
+    if eng is not None:
+        yield eng
+        return
+    eng = ENGINE
+    token = ACTIVE_ENGINE.set(eng)
+    try:
+        yield eng
+    finally:
+        ACTIVE_ENGINE.reset(token)
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    parts = []
+    for name in ("poem_eval.py", "spell_index.py", "smash_model.py"):
+        try:
+            parts.append(file_sha256(os.path.join(THIS_DIR, name)).hex()[:16])
+        except OSError:
+            parts.append("-")
+    # ambang "asal ketik" dari env mengubah hasil -> ikut versi (cache SQLite dibagi antar proses)
+    return "-".join(parts) + f"-s{SMASH_THRESHOLD:g}/{SMASH_MIN_LEN}"
+
 # =========================================================
 # LOAD KBBI CSV (1 kolom: kata)
 # =========================================================
 KBBI_WORDS = set()
 KBBI_LOADED = False
+KBBI_SOURCE = ""
+DICT_FILES = {}  # path -> (mtime_ns, size, sha256) isi yang sedang dipakai (lihat DictWatcher)
 
-def _clean_cell(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = s.lstrip("\ufeff")  # BOM
-    if len(s) >= 2 and ((s[0] == s[-1] == '"') or (s[0] == s[-1] == "'")):
-        s = s[1:-1].strip()
-    return s
-
-def load_kbbi():
-    global KBBI_WORDS, KBBI_LOADED
-    if not os.path.exists(KBBI_CSV):
-        KBBI_LOADED = False
-        return
+def file_state(path: str):
     try:
-        with open(KBBI_CSV, "r", encoding="utf-8", errors="replace", newline="") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if not row:
-                    continue
-                w = _clean_cell(row[0])
-                if not w or w == "kata":
-                    continue
-                if w.startswith("'") and w[1:].isalpha():
-                    KBBI_WORDS.add(w[1:])
-                KBBI_WORDS.add(w)
-        KBBI_LOADED = len(KBBI_WORDS) > 1000
-    except:
-        KBBI_LOADED = False
-
-load_kbbi()
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, file_sha256(path))
+    except OSError:
+        return None
+
+def dict_load_failed(name: str, err, keep: bool):
+    sys.stderr.write(
+        f"{name} gagal dimuat ({err or err.__class__.__name__}); "
+        + ("versi sebelumnya tetap dipakai\n" if keep else "pemeriksaan dinonaktifkan\n")
+    )
+    sys.stderr.flush()
+
+def read_kbbi(rebuild: bool = False):
+    """(kata, sumber) dari index biner (mmap, dibagi antar proses) atau CSV; gagal -> exception.
+
+    rebuild=True: index yang basi dibangun ulang dulu (muat ulang di latar, lihat DictWatcher).
+    """
+    idx = open_index(KBBI_INDEX, KBBI_CSV)
+    if idx is None and rebuild:
+        build_kbbi_index(KBBI_CSV, KBBI_INDEX)
+        idx = open_index(KBBI_INDEX, KBBI_CSV)
+    words, source = (idx, "index") if idx is not None else (read_wordlist_csv(KBBI_CSV), "csv")
+    if len(words) <= 1000:
+        raise ValueError(f"hanya {len(words)} kata")
+    return words, source
+
+def set_kbbi(words, source, spell=None, smash=None, state=None):
+    # semua yang diturunkan dari kamus diganti bersamaan: Evaluator baru; state = file_state() isinya
+    global ENGINE, KBBI_WORDS, KBBI_LOADED, KBBI_SOURCE
+    with ENGINE_LOCK:
+        ENGINE = ENGINE.with_kbbi(words, source, spell, smash, state)
+        KBBI_WORDS, KBBI_SOURCE, KBBI_LOADED = words, source, True
+        if state:
+            DICT_FILES[KBBI_CSV] = state
+
+def load_kbbi() -> bool:
+    # gagal -> kamus yang sedang dipakai (kalau ada) tetap dipakai, bukan KBBI_LOADED = False
+    state = file_state(KBBI_CSV)
+    if state is None:
+        return False
+    try:
+        words, source = read_kbbi()
+    except Exception as e:
+        dict_load_failed("kbbi_wordlist.csv", e, KBBI_LOADED)
+        return False
+    set_kbbi(words, source, state=state)
+    return True
 
 # =========================================================
 # LOAD EYD DB (JSON Lines)
 # =========================================================
 EYD_RULES = []
 EYD_LOADED = False
+EYD_PLAN = None
 
-def load_eyd_db():
-    global EYD_RULES, EYD_LOADED
+def read_eyd_db():
+    """(aturan, EydRulePlan) dari eyd_db.txt; gagal / tanpa aturan -> exception."""
     rules = []
-    if not os.path.exists(EYD_DB_TXT):
-        EYD_RULES = []
-        EYD_LOADED = False
-        return
+    with open(EYD_DB_TXT, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            ln = (line or "").strip()
+            if not ln or ln.startswith("#"):
+                continue
+            try:
+                obj = json.loads(ln)
+                if isinstance(obj, dict) and obj.get("id"):
+                    rules.append(obj)
+            except:
+                continue
+    if not rules:
+        raise ValueError("tidak ada aturan")
+    return rules, EydRulePlan(rules)
+
+def set_eyd(rules, plan, state=None):
+    global ENGINE, EYD_RULES, EYD_LOADED, EYD_PLAN
+    with ENGINE_LOCK:
+        ENGINE = ENGINE.with_eyd(rules, plan, state)
+        EYD_RULES, EYD_PLAN, EYD_LOADED = rules, plan, True
+        if state:
+            DICT_FILES[EYD_DB_TXT] = state
+
+def load_eyd_db() -> bool:
+    state = file_state(EYD_DB_TXT)
+    if state is None:
+        return False
     try:
-        with open(EYD_DB_TXT, "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                ln = (line or "").strip()
-                if not ln or ln.startswith("#"):
-                    continue
-                try:
-                    obj = json.loads(ln)
-                    if isinstance(obj, dict) and obj.get("id"):
-                        rules.append(obj)
-                except:
-                    continue
-        EYD_RULES = rules
-        EYD_LOADED = len(EYD_RULES) > 0
-    except:
-        EYD_RULES = []
-        EYD_LOADED = False
-
-load_eyd_db()
+        rules, plan = read_eyd_db()
+    except Exception as e:
+        dict_load_failed("eyd_db.txt", e, EYD_LOADED)
+        return False
+    set_eyd(rules, plan, state=state)
+    return True
 
 # =========================================================
 # UTIL
 # =========================================================
 VOWELS = set("aiueo")
 WEIRD_SYMBOLS_RE = re.compile(r"[@#$%^&*_=\|~<>`]+")
+TOKEN_RE = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ]+(?:[-'][A-Za-zÀ-ÖØ-öø-ÿ]+)?|\d+")
 
 # --- kata lokasi/arah untuk bedain "di rumah" vs "dikenal"
 LOCATION_WORDS = {
@@ -112,7 +277,7 @@ def get_paragraphs(text: str):
     return [p.strip() for p in parts if p.strip()]
 
 def tokenize_words(text: str):
-    return re.findall(r"[A-Za-zÀ-ÖØ-öø-ÿ]+(?:[-'][A-Za-zÀ-ÖØ-öø-ÿ]+)?|\d+", text)
+    return TOKEN_RE.findall(text)
 
 def alpha_words(text: str):
     return [w for w in tokenize_words(text) if w.isalpha()]
@@ -131,6 +296,23 @@ def sentences(text: str):
     parts = re.split(r"(?<=[.!?…])\s+", t)
     return [p.strip() for p in parts if p.strip()]
 
+SENT_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+")
+
+def sentence_spans(text: str):
+    """[(awal, akhir), ...] kalimat di teks asli: re.sub(r"\\s+", " ", text[awal:akhir]) == sentences(text)[i]."""
+    out, pos, n = [], 0, len(text)
+    for m in itertools.chain(SENT_SPLIT_RE.finditer(text), (None,)):
+        s, e = pos, (m.start() if m else n)
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if s < e:
+            out.append((s, e))
+        if m:
+            pos = m.end()
+    return out
+
 def count_numbers(text: str):
     return len(re.findall(r"\b\d+([.,]\d+)?\b", text))
 
@@ -187,9 +369,85 @@ def is_probable_proper_noun(token: str, sent_start: bool, next_is_cap: bool) ->
 # =========================================================
 PREFIXES = [
     "memper","meng","meny","mem","men","ber","ter","per","pe","pen","pem","peng",
-    "ke","se","di"
+    "ke","se","di",
+    "menge","penge","peny","me","be","te","diper"
 ]
 SUFFIXES = ["kan","i","an","nya","lah","kah","pun","ku","mu"]
+CLITIC_SUFFIXES = {"nya","lah","kah","pun","ku","mu"}
+
+# peluluhan nasal: meN-/peN- + vokal -> fonem awal kata dasar luluh (menulis <- tulis)
+NASAL_RESTORE = {
+    "meng": "k", "meny": "s", "mem": "p", "men": "t",
+    "peng": "k", "peny": "s", "pem": "p", "pen": "t",
+}
+
+def build_affix_trie(affixes, reverse=False):
+    # trie karakter; suffix disimpan terbalik supaya dicocokkan dari akhir kata
+    root = {}
+    for a in affixes:
+        node = root
+        for ch in (a[::-1] if reverse else a):
+            node = node.setdefault(ch, {})
+        node[""] = a
+    return root
+
+PREFIX_TRIE = build_affix_trie(PREFIXES)
+SUFFIX_TRIE = build_affix_trie(SUFFIXES, reverse=True)
+
+def match_affixes(trie, s: str, reverse=False):
+    """Semua afiks di trie yang cocok di awal (atau akhir) s, dari yang terpendek."""
+    out = []
+    node = trie
+    for ch in (reversed(s) if reverse else s):
+        node = node.get(ch)
+        if node is None:
+            break
+        if "" in node:
+            out.append(node[""])
+    return out
+
+# me-/be-/te- tanpa nasal/r hanya benar di depan bunyi tertentu: me- + l/m/n/ny/ng/r/w/y (melihat, merasa),
+# be-/te- + r atau suku pertama berakhiran -er (berenang, bekerja, tepercaya). Di tempat lain itu salah
+# ketik (mebaca, bejalan, tebawa, beteriak) dan tidak diterima sebagai bentuk turunan.
+SHORT_PREFIX_OK = {
+    "me": re.compile(r"[lmnrwy]"),
+    "be": re.compile(r"r|[^aiueo]+er[^aiueo]"),
+    "te": re.compile(r"r|[^aiueo]+er[^aiueo]"),
+}
+
+def strip_prefix(low: str, pre: str):
+    mid = low[len(pre):]
+    ok = SHORT_PREFIX_OK.get(pre)
+    if ok is not None and not ok.match(mid):
+        return
+    yield mid
+    rest = NASAL_RESTORE.get(pre)
+    if rest and mid[:1] in VOWELS:
+        yield rest + mid
+
+def strip_suffixes(low: str):
+    for suf in match_affixes(SUFFIX_TRIE, low, reverse=True):
+        if len(low) > len(suf) + 2:
+            stem = low[:-len(suf)]
+            yield stem
+            # klitik di luar akhiran turunan: menuliskannya -> menuliskan -> menulis
+            if suf in CLITIC_SUFFIXES:
+                for inner in match_affixes(SUFFIX_TRIE, stem, reverse=True):
+                    if inner not in CLITIC_SUFFIXES and len(stem) > len(inner) + 2:
+                        yield stem[:-len(inner)]
+
+# contoh bentuk turunan, dicek lewat `python poem_eval.py --check-morph` setelah mengubah imbuhan:
+# peluluhan nasal & me-/be-/te- yang benar harus diterima, salah ketik awalan harus tetap ditandai
+MORPH_ACCEPT = (
+    "menulis", "menyapu", "memukul", "mengirim", "menuliskannya",
+    "melihat", "merasa", "mewarnai", "berenang", "bekerja", "bepergian", "tepercaya",
+)
+MORPH_REJECT = ("mebaca", "mepukul", "mesapu", "bejalan", "tebawa", "beteriak")
+
+def check_morphology():
+    """[(kata, harus_diterima), ...] untuk contoh yang dinilai salah oleh is_kbbi_word()."""
+    return [(w, want) for want, words in ((True, MORPH_ACCEPT), (False, MORPH_REJECT))
+            for w in words if is_kbbi_word(w) != want]
 
 def possible_roots(w: str):
     low = w.lower()
@@ -200,23 +458,63 @@ def possible_roots(w: str):
         for p in parts:
             yield p
 
-    for pre in PREFIXES:
-        if low.startswith(pre) and len(low) > len(pre) + 2:
-            yield low[len(pre):]
+    pres = [pre for pre in match_affixes(PREFIX_TRIE, low) if len(low) > len(pre) + 2]
+    for pre in pres:
+        yield from strip_prefix(low, pre)
+
+    yield from strip_suffixes(low)
 
-    for suf in SUFFIXES:
-        if low.endswith(suf) and len(low) > len(suf) + 2:
-            yield low[:-len(suf)]
+    for pre in pres:
+        for mid in strip_prefix(low, pre):
+            yield from strip_suffixes(mid)
 
-    for pre in PREFIXES:
-        if low.startswith(pre) and len(low) > len(pre) + 2:
-            mid = low[len(pre):]
-            for suf in SUFFIXES:
-                if mid.endswith(suf) and len(mid) > len(suf) + 2:
-                    yield mid[:-len(suf)]
+def kbbi_root(low: str):
+    """Bentuk pertama dari possible_roots() yang ada di KBBI, atau None (di-cache per kata per Evaluator)."""
+    return engine().kbbi_root(low)
 
-def is_kbbi_word(w: str) -> bool:
-    if not KBBI_LOADED:
+# =========================================================
+# OVERLAY KAMUS PER SEKOLAH (kbbi_overlay.py)
+# =========================================================
+# Dipilih per request ("school"); berlaku selama evaluasi lewat ACTIVE_OVERLAY (per thread/konteks,
+# bukan argumen yang diteruskan ke semua scorer). Kamus efektif = (KBBI ∪ allow) \ deny.
+OVERLAYS = None
+ACTIVE_OVERLAY = contextvars.ContextVar("kbbi_overlay", default=None)
+
+def get_overlay_store():
+    global OVERLAYS
+    if OVERLAYS is None:
+        with LAZY_LOCK:
+            if OVERLAYS is None:
+                OVERLAYS = overlay_store_from_env()
+    return OVERLAYS
+
+def overlay_for(name):
+    """WordOverlay untuk nama sekolah, None kalau tidak diminta; file tidak ada -> OverlayNotFound."""
+    name = str(name or "").strip()
+    return get_overlay_store().get(name) if name else None
+
+@contextmanager
+def use_overlay(overlay):
+    token = ACTIVE_OVERLAY.set(overlay)
+    try:
+        yield overlay
+    finally:
+        ACTIVE_OVERLAY.reset(token)
+
+def overlay_accepts(ov, low: str, root, words) -> bool:
+    # root = kbbi_root(low) (kamus bersama, di-cache); kandidat kata dasar hanya dicek ulang kalau
+    # overlay bisa mengubah jawabannya: kata non-KBBI + ada allow, atau kata dasarnya di deny
+    if low in ov.deny:
+        return False
+    if root is not None and root not in ov.deny:
+        return True
+    if root is None and not ov.allow:
+        return False
+    return any((c in ov.allow or c in words) and c not in ov.deny for c in possible_roots(low))
+
+def is_kbbi_word(w: str, overlay=None, eng=None) -> bool:
+    eng = eng or engine()
+    if not eng.kbbi_loaded:
         return True
 
     # inisial nama (mis. "J", "A") -> jangan dihitung non-KBBI
@@ -228,10 +526,71 @@ def is_kbbi_word(w: str) -> bool:
         return True
     if w.upper() == w and 2 <= len(w) <= 6:
         return True
-    for cand in possible_roots(low):
-        if cand in KBBI_WORDS:
-            return True
-    return False
+    if overlay is not None:
+        return overlay_accepts(overlay, low, eng.kbbi_root(low), eng.words)
+    return eng.kbbi_root(low) is not None
+
+# =========================================================
+# SARAN EJAAN (index deletion neighbourhood, lihat spell_index.py)
+# =========================================================
+SPELL_SUGGESTIONS = 3
+
+def open_spell(kbbi_loaded: bool):
+    """SpellIndex (mmap), False kalau tidak tersedia; dibuka saat saran pertama diminta (Evaluator.spell_index)."""
+    if not kbbi_loaded:
+        return False
+    try:
+        idx = open_spell_index(SPELL_INDEX, KBBI_CSV)
+        if idx is None:
+            # belum dibangun / basi: bangun sekali (beberapa detik); normalnya lewat npm run build:kbbi
+            build_spell_index(KBBI_CSV, SPELL_INDEX)
+            idx = open_spell_index(SPELL_INDEX, KBBI_CSV)
+        return idx or False
+    except OSError:
+        return False
+
+def get_spell_index():
+    return engine().spell_index()
+
+def suggest_word(low: str):
+    """((kata KBBI, jarak), ...) terdekat untuk kata (huruf kecil), di-cache per kata per Evaluator."""
+    return engine().suggest_word(low)
+
+def suggestions_for(low: str):
+    # saran dari kamus bersama, tanpa kata yang ditolak overlay sekolah yang aktif
+    sug = suggest_word(low)
+    ov = ACTIVE_OVERLAY.get()
+    if ov is not None and ov.deny and sug:
+        sug = tuple(x for x in sug if x[0] not in ov.deny)
+    return sug
+
+def match_case(src: str, rep: str) -> str:
+    return rep[0].upper() + rep[1:] if src[:1].isupper() else rep
+
+def spelling_suggestions(words):
+    """{kata: [saran, ...]} untuk kata non-KBBI; kata tanpa saran dilewati."""
+    out = {}
+    for w in words:
+        sug = suggestions_for(w.lower())
+        if sug:
+            out[w] = [match_case(w, s) for (s, _) in sug]
+    return out
+
+def spelling_fixes(words):
+    # untuk auto-fix hanya saran yang tidak ambigu: satu-satunya kandidat berjarak 1, atau
+    # satu-satunya kandidat yang hanya menukar dua huruf ("rumha" -> "rumah", bukan "rumba")
+    out = {}
+    for w in words:
+        low = w.lower()
+        sug = suggestions_for(low)
+        if not sug or sug[0][1] != 1:
+            continue
+        swaps = [s for (s, _) in sug if len(s) == len(low) and sorted(s) == sorted(low)]
+        if len(sug) == 1 or (len(swaps) == 1 and swaps[0] == sug[0][0]):
+            out[w] = match_case(w, sug[0][0])
+    return out
+
+load_kbbi()
 
 # =========================================================
 # SLANG + "ASAL KETIK" + TANDA BACA ANEH
@@ -245,9 +604,9 @@ SLANG_MAP = {
 }
 SLANG_SET = set(SLANG_MAP.keys())
 
-def find_slang(text: str):
+def find_slang(text: str, ctx=None, limit=10):
     found = []
-    for t in tokenize_words(text):
+    for t in (ctx.tokens if ctx is not None else tokenize_words(text)):
         low = t.lower()
         if low in SLANG_SET:
             found.append(t)
@@ -257,7 +616,7 @@ def find_slang(text: str):
     for x in found:
         if x.lower() not in seen:
             out.append(x); seen.add(x.lower())
-    return out[:10]
+    return out[:limit]
 
 def vowel_ratio(w: str) -> float:
     w = w.lower()
@@ -269,7 +628,61 @@ def vowel_ratio(w: str) -> float:
 def has_long_consonant_run(w: str) -> bool:
     return bool(re.search(r"[^aiueoAIUEO]{5,}", w))
 
+# Model trigram huruf dari KBBI (smash_model.py): token ASCII sepanjang >= SMASH_MIN_LEN yang rata-rata
+# log-prob per hurufnya < SMASH_THRESHOLD dianggap asal ketik. Ambang -3.6: ~0,3% kata KBBI & ~0,03%
+# bentuk berimbuhan acak di bawahnya, ~95% ketikan asal sintetis (baris keyboard / acak) tertangkap;
+# kata yang ternyata ada di KBBI / overlay sekolah tetap tidak ditandai. Cek skor: smash_model.py kata...
+try:
+    SMASH_THRESHOLD = float(os.environ.get("EVAL_SMASH_THRESHOLD", "") or -3.6)
+except ValueError:
+    SMASH_THRESHOLD = -3.6
+try:
+    SMASH_MIN_LEN = max(1, int(os.environ.get("EVAL_SMASH_MIN_LEN", "") or 5))
+except ValueError:
+    SMASH_MIN_LEN = 5
+TRIPLE_LETTER_RE = re.compile(r"(.)\1\1+")
+
+def open_smash(kbbi_loaded: bool):
+    """SmashModel, False kalau tidak tersedia (heuristik lama dipakai); dibuka saat pertama dipakai."""
+    if not kbbi_loaded:
+        return False
+    try:
+        model = open_smash_model(SMASH_MODEL, KBBI_CSV)
+        if model is None:
+            # belum dibangun / basi: < 1 detik; normalnya lewat npm run build:kbbi
+            build_smash_model(KBBI_CSV, SMASH_MODEL)
+            model = open_smash_model(SMASH_MODEL, KBBI_CSV)
+        return model or False
+    except OSError:
+        return False
+
+def keyboard_smashes(tokens, eng=None):
+    """{token huruf kecil: alasan} untuk token yang tampak asal ketik; satu panggilan per dokumen
+    (token unik dinilai sekali, model dipanggil sekali untuk semuanya)."""
+    eng = eng or engine()
+    model = eng.smash_model()
+    out, cand = {}, []
+    for low in {t.lower() for t in tokens}:
+        if model is None:
+            sm, reason = legacy_keyboard_smash(low)
+            if sm:
+                out[low] = reason
+        elif TRIPLE_LETTER_RE.search(low):
+            out[low] = "huruf berulang berlebihan"
+        elif len(low) >= SMASH_MIN_LEN and low.isascii():
+            cand.append(low)
+    if cand:
+        for low, score in zip(cand, model.scores(cand)):
+            if score < SMASH_THRESHOLD:
+                out[low] = "pola huruf tidak lazim"
+    return out
+
 def is_keyboard_smash(w: str):
+    reason = keyboard_smashes((w,)).get(w.lower())
+    return (True, reason) if reason else (False, "")
+
+def legacy_keyboard_smash(w: str):
+    # heuristik tetap, hanya kalau model trigram tidak tersedia
     low = w.lower()
     if len(low) >= 8 and vowel_ratio(low) < 0.20:
         return True, "vokal sangat minim"
@@ -282,39 +695,43 @@ def is_keyboard_smash(w: str):
         return True, "terlalu banyak q/x/z"
     return False, ""
 
+WEIRD_PUNCT_CHECKS = [
+    (WEIRD_SYMBOLS_RE, "Ada simbol aneh (@/#/$/%/dll)."),
+    (re.compile(r"([.,!?;:])\1{1,}"), "Ada tanda baca berulang (.. ,,, ?? !!)."),
+    (re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ]{2,}[.,!?;:][A-Za-zÀ-ÖØ-öø-ÿ]{2,}"), "Ada tanda baca nyelip di tengah kata."),
+    (re.compile(r"\s+[,.!?;:…]"), "Ada spasi sebelum tanda baca (mis. 'kata ,')."),
+    (re.compile(r"[,.!?;:][A-Za-zÀ-ÖØ-öø-ÿ]"), "Ada tanda baca tanpa spasi setelahnya (mis. 'kata,ini')."),
+]
+
 def find_weird_punct(text: str):
-    issues = []
-    if WEIRD_SYMBOLS_RE.search(text):
-        issues.append("Ada simbol aneh (@/#/$/%/dll).")
-    if re.search(r"([.,!?;:])\1{1,}", text):
-        issues.append("Ada tanda baca berulang (.. ,,, ?? !!).")
-    if re.search(r"[A-Za-zÀ-ÖØ-öø-ÿ]{2,}[.,!?;:][A-Za-zÀ-ÖØ-öø-ÿ]{2,}", text):
-        issues.append("Ada tanda baca nyelip di tengah kata.")
-    if re.search(r"\s+[,.!?;:…]", text):
-        issues.append("Ada spasi sebelum tanda baca (mis. 'kata ,').")
-    if re.search(r"[,.!?;:][A-Za-zÀ-ÖØ-öø-ÿ]", text):
-        issues.append("Ada tanda baca tanpa spasi setelahnya (mis. 'kata,ini').")
+    issues = [msg for (rx, msg) in WEIRD_PUNCT_CHECKS if rx.search(text)]
     return issues[:8]
 
-def detect_gibberish_and_non_kbbi(text: str):
-    toks = tokenize_alpha_with_spans(text)
+def detect_gibberish_and_non_kbbi(text: str, ctx=None, prev_char=None, next_token=None, limit=12):
+    # prev_char/next_token: konteks di luar `text` (mode stream: paragraf sebelum/sesudah)
+    toks = ctx.alpha_spans if ctx is not None else tokenize_alpha_with_spans(text)
+    overlay, eng = ACTIVE_OVERLAY.get(), engine()
+    smashed = keyboard_smashes([t for t, _, _ in toks], eng)
     smash = []
     nonkbbi = []
 
     for i, (t, s, e) in enumerate(toks):
-        sm, reason = is_keyboard_smash(t)
-        if sm:
+        low = t.lower()
+        reason = smashed.get(low)
+        # kata KBBI / overlay sekolah yang ejaannya jarang (mis. "psikologi") bukan asal ketik
+        if reason and (reason != "pola huruf tidak lazim" or not is_kbbi_word(t, overlay, eng)):
             smash.append((t, reason))
             continue
 
-        low = t.lower()
         if low in SLANG_SET:
             continue
 
         sent_start = is_sentence_start(text, s)
+        if s == 0 and prev_char:
+            sent_start = prev_char in ".!?…"
         next_is_cap = False
-        if i + 1 < len(toks):
-            nxt = toks[i+1][0]
+        nxt = toks[i+1][0] if i + 1 < len(toks) else next_token
+        if nxt:
             # next token kapital dan masih satu kalimat (heuristik)
             next_is_cap = nxt[:1].isupper() and not nxt.isupper()
 
@@ -322,7 +739,7 @@ def detect_gibberish_and_non_kbbi(text: str):
         if is_probable_proper_noun(t, sent_start=sent_start, next_is_cap=next_is_cap):
             continue
 
-        if not is_kbbi_word(t):
+        if not is_kbbi_word(t, overlay, eng):
             nonkbbi.append(t)
 
     def uniq_list(items):
@@ -333,10 +750,217 @@ def detect_gibberish_and_non_kbbi(text: str):
                 out.append(x); seen.add(key)
         return out
 
-    smash = uniq_list(smash)[:12]
-    nonkbbi = uniq_list(nonkbbi)[:12]
+    smash = uniq_list(smash)[:limit]
+    nonkbbi = uniq_list(nonkbbi)[:limit]
     return smash, nonkbbi, len(toks)
 
+# =========================================================
+# KONTEKS ANALISIS (dihitung sekali per dokumen, dipakai semua scorer/EYD)
+# =========================================================
+
+class AnalysisContext:
+    """Data turunan teks (token, kalimat, paragraf, dst.), dihitung malas & di-cache."""
+
+    def __init__(self, text: str, sentences=None, sentence_spans=None):
+        self.text = text
+        if sentences is not None:
+            # kalimat sudah dipecah di luar (mode stream: kalimat bisa menyeberang paragraf,
+            # span-nya relatif thd awal text dan boleh negatif)
+            self.__dict__["sentences"] = sentences
+            self.__dict__["sentence_spans"] = sentence_spans
+
+    @cached_property
+    def token_spans(self):
+        return [(m.group(0), m.start(), m.end()) for m in TOKEN_RE.finditer(self.text)]
+
+    @cached_property
+    def tokens(self):
+        return [t for (t, _, _) in self.token_spans]
+
+    @cached_property
+    def alpha_spans(self):
+        # sama dengan tokenize_alpha_with_spans(): semua token kecuali angka
+        return [x for x in self.token_spans if not x[0][0].isdigit()]
+
+    @cached_property
+    def words(self):
+        return [t for t in self.tokens if t.isalpha()]
+
+    @cached_property
+    def words_lower(self):
+        return [w.lower() for w in self.words]
+
+    @cached_property
+    def word_counts(self):
+        return Counter(self.words_lower)
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def sentences(self):
+        return sentences(self.text)
+
+    @cached_property
+    def sentence_spans(self):
+        # hanya dihitung kalau ada aturan EYD berbasis kalimat yang kena
+        return sentence_spans(self.text)
+
+    @cached_property
+    def sentence_word_counts(self):
+        return [len(alpha_words(s)) for s in self.sentences]
+
+    @cached_property
+    def paragraphs(self):
+        return get_paragraphs(self.text)
+
+    @cached_property
+    def lines(self):
+        return get_lines(self.text)
+
+    @cached_property
+    def nonempty_lines(self):
+        return [ln.strip() for ln in self.lines if ln.strip()]
+
+    @cached_property
+    def number_count(self):
+        return count_numbers(self.text)
+
+    @cached_property
+    def lexical_diversity(self):
+        w = self.words_lower
+        return len(set(w)) / len(w) if w else 0.0
+
+    @cached_property
+    def avg_sentence_len(self):
+        lens = self.sentence_word_counts
+        return sum(lens) / len(lens) if lens else 0.0
+
+    @cached_property
+    def slang(self):
+        return find_slang(self.text, ctx=self)
+
+    @cached_property
+    def weird_punct(self):
+        return find_weird_punct(self.text)
+
+    @cached_property
+    def gibberish(self):
+        return detect_gibberish_and_non_kbbi(self.text, ctx=self)
+
+    def count_hits(self, vocab):
+        wc = self.word_counts
+        return sum(wc[x] for x in vocab if x in wc)
+
+    # --- sinyal yang dibaca scorer (StreamContext menyediakan atribut yang sama)
+    def has_word(self, vocab):
+        wc = self.word_counts
+        return any(x in wc for x in vocab)
+
+    @cached_property
+    def markers(self):
+        # {frasa: [offset, ...]} untuk semua penanda struktur & penghubung (satu lintasan token)
+        return MARKERS.find(self.text, self.token_spans)
+
+    def has_any(self, phrases):
+        # frasa harus terdaftar di MARKERS (STRUCTURE_KEYS / CONNECTORS)
+        hits = self.markers
+        return any(k in hits for k in phrases)
+
+    def count_any(self, phrases):
+        hits = self.markers
+        return sum(1 for k in phrases if k in hits)
+
+    @cached_property
+    def n_words(self):
+        return len(self.words)
+
+    @cached_property
+    def paragraph_count(self):
+        return len(self.paragraphs)
+
+    @cached_property
+    def first_paragraph(self):
+        return self.paragraphs[0] if self.paragraphs else ""
+
+    @cached_property
+    def first_line(self):
+        return self.nonempty_lines[0] if self.nonempty_lines else ""
+
+    @cached_property
+    def last_line(self):
+        return self.nonempty_lines[-1] if self.nonempty_lines else ""
+
+    @cached_property
+    def line_count(self):
+        return len(self.lines)
+
+    @cached_property
+    def has_subject_line(self):
+        return any(ln.lower().strip().startswith(("subjek:", "subject:")) for ln in self.lines)
+
+    @cached_property
+    def verse_ends(self):
+        # baris pertama = judul
+        return verse_ends(self.lines[1:])
+
+    @cached_property
+    def bullet_count(self):
+        return count_bullets(self.text)
+
+    @cached_property
+    def has_date_place(self):
+        return has_date_place_line(self.text)
+
+    @cached_property
+    def has_email(self):
+        return has_email_address(self.text)
+
+    @cached_property
+    def has_time(self):
+        return bool(TIME_RE.search(self.lower))
+
+    @cached_property
+    def sentence_count(self):
+        return len(self.sentences)
+
+    @cached_property
+    def short_sentences(self):
+        return sum(1 for n in self.sentence_word_counts if n <= 3)
+
+    @cached_property
+    def long_sentences(self):
+        return sum(1 for n in self.sentence_word_counts if n >= 30)
+
+    @cached_property
+    def connectors(self):
+        hits = self.markers
+        return {c for c in CONNECTORS if c in hits}
+
+    @cached_property
+    def has_double_space(self):
+        return bool(re.search(r"[ \t]{2,}", self.text))
+
+    @cached_property
+    def has_blank_run(self):
+        return bool(re.search(r"\n{3,}", self.text))
+
+    @cached_property
+    def has_weird_symbol(self):
+        return bool(WEIRD_SYMBOLS_RE.search(self.text))
+
+    @cached_property
+    def upper_count(self):
+        return sum(1 for ch in self.text if ch.isupper())
+
+    @cached_property
+    def alpha_count(self):
+        return sum(1 for ch in self.text if ch.isalpha())
+
+def get_ctx(text, ctx=None) -> AnalysisContext:
+    return ctx if ctx is not None else AnalysisContext(text)
+
 # =========================================================
 # EYD RULE ENGINE (from eyd_db.txt)
 # =========================================================
@@ -347,67 +971,89 @@ def _re_flags(flag_str: str):
         flags |= re.IGNORECASE
     return flags
 
-def _excerpt(text: str, start: int, end: int, pad: int = 28):
+def _excerpt(text: str, start: int, end: int, pad: int = 28, more_before=False, more_after=False):
     a = max(0, start - pad)
     b = min(len(text), end + pad)
     frag = text[a:b].replace("\n", " ")
-    return ("..." if a > 0 else "") + frag + ("..." if b < len(text) else "")
+    return ("..." if a > 0 or more_before else "") + frag + ("..." if b < len(text) or more_after else "")
+
+@lru_cache(maxsize=64)
+def word_alternation(words: tuple, head: str = "", tail: str = ""):
+    # daftar kata dari eyd_db.txt -> satu regex terkompilasi (di-cache per isi daftar)
+    return re.compile(head + "(" + "|".join(re.escape(w) for w in words) + ")" + tail)
 
-def check_initial_capital(text: str, data=None):
+def sentence_hit(ctx, i: int, **extra):
+    # hit aturan berbasis kalimat: span kalimat ke-i (contoh teks dibuat belakangan, lihat hit_excerpt)
+    start, end = ctx.sentence_spans[i]
+    return {"start": start, "end": end, "sentence": i, **extra}
+
+def check_initial_capital(text: str, data=None, ctx=None):
     viol = []
-    for s in sentences(text):
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
         m = re.search(r"[A-Za-zÀ-ÖØ-öø-ÿ]", s)
         if not m:
             continue
         ch = s[m.start()]
         if ch != ch.upper():
-            viol.append({"example": s[:120]})
+            viol.append(sentence_hit(ctx, i))
     return viol
 
-def check_pun_spacing(text: str, data=None):
+def check_pun_spacing(text: str, data=None, ctx=None):
     exc = set((data or {}).get("exceptions_serangkai", []))
     viol = []
     for m in re.finditer(r"\b([A-Za-zÀ-ÖØ-öø-ÿ]+)pun\b", text, flags=re.IGNORECASE):
         tok = m.group(0).lower()
         if tok in exc:
             continue
-        viol.append({"example": _excerpt(text, m.start(), m.end())})
+        viol.append({"start": m.start(), "end": m.end()})
     return viol
 
-def check_sentence_final_punct(text: str, data=None):
+def check_sentence_final_punct(text: str, data=None, ctx=None):
     viol = []
-    for s in sentences(text):
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
         if not re.search(r"[.!?…]$", s.strip()):
-            viol.append({"example": s[:120]})
+            viol.append(sentence_hit(ctx, i))
     return viol
 
-def check_question_mark(text: str, data=None):
+# kata tanya boleh bersambung partikel: "apakah", "siapatah", "di manakah"
+QUESTION_PARTICLES = ("kah", "tah")
+
+def check_question_mark(text: str, data=None, ctx=None):
     qwords = (data or {}).get("question_words", [])
-    qwords = [qw.lower() for qw in qwords]
+    qwords = tuple(qw.lower() for qw in qwords)
     viol = []
-    for s in sentences(text):
-        low = s.lower()
-        hit = any(qw in low for qw in qwords)
+    if not qwords:
+        return viol
+    ac = phrase_automaton(qwords, QUESTION_PARTICLES)
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
+        hit = ac.first(s)
         if hit and not s.strip().endswith("?"):
-            viol.append({"example": s[:120]})
+            viol.append(sentence_hit(ctx, i))
     return viol
 
-def check_exclamation_mark(text: str, data=None):
+def check_exclamation_mark(text: str, data=None, ctx=None):
     triggers = (data or {}).get("triggers", [])
-    triggers = [t.lower() for t in triggers]
+    triggers = tuple(t.lower() for t in triggers)
     viol = []
-    for s in sentences(text):
-        low = s.lower()
-        hit = any(t in low for t in triggers)
+    if not triggers:
+        return viol
+    ac = phrase_automaton(triggers)
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
+        hit = ac.first(s)
         if hit and not s.strip().endswith("!"):
-            viol.append({"example": s[:120]})
+            viol.append(sentence_hit(ctx, i))
     return viol
 
-def check_comma_before_conjunction(text: str, data=None):
+def check_comma_before_conjunction(text: str, data=None, ctx=None):
     conj = (data or {}).get("conj", [])
     conj = [c.lower() for c in conj]
     viol = []
-    for s in sentences(text):
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
         low = s.lower()
         for c in conj:
             idx = low.find(" " + c + " ")
@@ -417,35 +1063,76 @@ def check_comma_before_conjunction(text: str, data=None):
             while j >= 0 and s[j].isspace():
                 j -= 1
             if j >= 0 and s[j] != ",":
-                viol.append({"example": s[:140], "conj": c})
+                viol.append(sentence_hit(ctx, i, conj=c))
     return viol
 
-def check_intro_subclause_comma(text: str, data=None):
+def check_intro_subclause_comma(text: str, data=None, ctx=None):
     starters = (data or {}).get("starters", [])
-    starters = [st.lower() for st in starters]
+    starters = tuple(st.lower() for st in starters)
     viol = []
-    for s in sentences(text):
-        low = s.lower().strip()
-        for st in starters:
-            if low.startswith(st + " ") or low.startswith(st + ",") or low.startswith(st + "—"):
-                pos = s.find(",")
-                if pos == -1 or pos > 70:
-                    viol.append({"example": s[:160], "starter": st})
-                break
+    if not starters:
+        return viol
+    rx = word_alternation(starters, tail="[ ,—]")
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
+        m = rx.match(s.lower().strip())
+        if m:
+            pos = s.find(",")
+            if pos == -1 or pos > 70:
+                viol.append(sentence_hit(ctx, i, starter=m.group(1)))
     return viol
 
-def check_no_comma_before_subclause(text: str, data=None):
+def check_no_comma_before_subclause(text: str, data=None, ctx=None):
     markers = (data or {}).get("markers", [])
-    markers = [m.lower() for m in markers]
+    markers = tuple(m.lower() for m in markers)
     viol = []
-    for s in sentences(text):
-        low = s.lower()
+    if not markers:
+        return viol
+    rx = word_alternation(markers, head=r",\s+", tail=r"\b")
+    ctx = get_ctx(text, ctx)
+    for i, s in enumerate(ctx.sentences):
+        found = {m.group(1) for m in rx.finditer(s.lower())}
         for mk in markers:
-            if re.search(r",\s+" + re.escape(mk) + r"\b", low):
-                viol.append({"example": s[:160], "marker": mk})
+            if mk in found:
+                viol.append(sentence_hit(ctx, i, marker=mk))
                 break
     return viol
 
+# aturan berbasis kalimat: contoh = awal kalimat sepanjang ini (aturan lain: potongan di sekitar hit)
+SENTENCE_EXCERPT = {
+    check_initial_capital: 120,
+    check_sentence_final_punct: 120,
+    check_question_mark: 120,
+    check_exclamation_mark: 120,
+    check_comma_before_conjunction: 140,
+    check_intro_subclause_comma: 160,
+    check_no_comma_before_subclause: 160,
+}
+
+# ✅ Filter khusus KDEP_01: hanya flag kasus kata depan di/ke/dari yang nempel ke lokasi,
+#    bukan imbuhan "di-" pada kata kerja (dikenal, ditulis, dibuat, dll).
+KDEP_PATTERN = r"\b(di|ke|dari)[A-Za-zÀ-ÖØ-öø-ÿ]+"
+KDEP_PREFIX_RE = re.compile(r"^(di|ke|dari)", re.IGNORECASE)
+
+def keep_kdep_hit(word: str) -> bool:
+    pref_m = KDEP_PREFIX_RE.match(word)
+    if not pref_m:
+        return False
+    prefix = pref_m.group(0).lower()
+    rest = word[len(prefix):]
+    if not rest:
+        return False
+    # diBandung / keJakarta / dariSurabaya -> jelas kata depan + nama tempat
+    if rest[0].isupper():
+        return True
+    # dirumah / kesekolah / dipasar -> kata depan + lokasi umum
+    return strip_pronoun_suffix(rest.lower()) in LOCATION_WORDS
+
+# rule id -> (pola pengganti, filter per hit)
+EYD_HIT_FILTERS = {
+    "KDEP_01": (KDEP_PATTERN, keep_kdep_hit),
+}
+
 EYD_FUNCTIONS = {
     "check_initial_capital": check_initial_capital,
     "check_pun_spacing": check_pun_spacing,
@@ -457,104 +1144,240 @@ EYD_FUNCTIONS = {
     "check_no_comma_before_subclause": check_no_comma_before_subclause,
 }
 
-def apply_eyd_rules(text: str, type_key: str):
+def _env_seconds(name: str, default_ms: float) -> float:
+    try:
+        return float(os.environ.get(name, "") or default_ms) / 1000.0
+    except ValueError:
+        return default_ms / 1000.0
+
+# anggaran waktu aturan EYD (lihat regex_guard.py). Aturan yang melewati anggarannya
+# EYD_RULE_STRIKES kali dinonaktifkan sampai eyd_db.txt dimuat ulang; sekali lewat saja
+# bisa karena jeda sesaat (GC, CPU penuh), jadi hanya dokumen itu yang kehilangan aturannya.
+EYD_RULE_BUDGET = _env_seconds("EYD_RULE_BUDGET_MS", 250)
+EYD_DOC_BUDGET = _env_seconds("EYD_DOC_BUDGET_MS", 1000)
+try:
+    EYD_RULE_STRIKES = max(1, int(os.environ.get("EYD_RULE_STRIKES", "") or 2))
+except ValueError:
+    EYD_RULE_STRIKES = 2
+
+class EydRulePlan:
+    """Aturan EYD yang sudah dikompilasi sekali saat load (regex, flag, fungsi, filter khusus)."""
+
+    def __init__(self, rules):
+        self.entries = []
+        self.disabled = {}  # id -> alasan (pola ditolak saat load / melewati anggaran waktu)
+        self.sentence_limit = {}  # id aturan berbasis kalimat -> panjang contoh (SENTENCE_EXCERPT)
+        self.strikes = Counter()
+        self._lock = threading.Lock()  # strike() dari beberapa thread
+        for rule in rules:
+            rid = rule.get("id", "UNKNOWN")
+            ctype = rule.get("check_type", "")
+            entry = {"rule": rule, "id": rid, "kind": "skip"}
+            self.entries.append(entry)
+
+            if ctype == "function":
+                fn = EYD_FUNCTIONS.get(rule.get("function", ""))
+                if fn:
+                    data = rule.get("data") or {}
+                    entry.update(kind="function", fn=fn, data=data)
+                    if fn in SENTENCE_EXCERPT:
+                        self.sentence_limit[rid] = SENTENCE_EXCERPT[fn]
+                    # daftar kata pemicu -> automaton dibangun sekarang, bukan di request pertama
+                    if fn is check_question_mark:
+                        phrase_automaton(tuple(w.lower() for w in data.get("question_words", [])), QUESTION_PARTICLES).regex
+                    elif fn is check_exclamation_mark:
+                        phrase_automaton(tuple(w.lower() for w in data.get("triggers", []))).regex
+            elif ctype == "regex" and rule.get("pattern", ""):
+                pat, keep = rule.get("pattern", ""), None
+                if rid in EYD_HIT_FILTERS:
+                    pat, keep = EYD_HIT_FILTERS[rid]
+                try:
+                    rx = re.compile(pat, _re_flags(rule.get("flags", "")))
+                except re.error:
+                    continue
+                reason = check_pattern(rx)
+                if reason:
+                    self.disable(entry, "pola ditolak: " + reason)
+                    continue
+                entry.update(kind="regex", regex=rx, keep=keep)
+
+    def disable(self, entry, reason: str):
+        entry["kind"] = "disabled"
+        # salin-lalu-ganti: pembaca (eyd_report) di thread lain selalu melihat dict yang utuh
+        self.disabled = {**self.disabled, entry["id"]: reason}
+        sys.stderr.write(f"aturan EYD {entry['id']} dinonaktifkan: {reason}\n")
+
+    def strike(self, entry) -> bool:
+        """Catat satu pelanggaran anggaran; True kalau aturan kini dinonaktifkan."""
+        with self._lock:
+            if entry["kind"] == "disabled":
+                return True
+            self.strikes[entry["id"]] += 1
+            if self.strikes[entry["id"]] < EYD_RULE_STRIKES:
+                return False
+            self.disable(entry, f"melebihi anggaran {EYD_RULE_BUDGET * 1000:.0f} ms")
+            return True
+
+def hit_excerpt(text: str, rid: str, start: int, end: int) -> str:
+    """Contoh teks untuk satu hit EYD (span di text): awal kalimat untuk aturan berbasis kalimat,
+    selain itu potongan di sekitar hit."""
+    plan = engine().plan
+    limit = plan.sentence_limit.get(rid) if plan is not None else None
+    if limit:
+        return re.sub(r"\s+", " ", text[start:end])[:limit]
+    return _excerpt(text, start, end)
+
+def _regex_spans(entry, window, end: float, examples: int):
+    keep = entry["keep"]
+    wtext, lo, hi, more_before, more_after = window
+    spans = []
+    try:
+        for m in entry["regex"].finditer(wtext):
+            if time.perf_counter() > end:
+                raise RuleTimeout()  # tanpa SIGALRM: dicek di antara hit
+            if m.start() < lo:
+                continue
+            if m.start() >= hi:
+                break
+            if keep is not None and not keep(m.group(0)):
+                continue
+            span = (m.start() - lo, m.end() - lo)
+            if len(spans) < examples:
+                span += (_excerpt(wtext, m.start(), m.end(), more_before=more_before, more_after=more_after),)
+            spans.append(span)
+            if len(spans) >= 10:
+                break
+    except RuleTimeout:
+        raise
+    except Exception:
+        pass
+    return spans
+
+def _function_spans(entry, text: str, ctx, examples: int, plan=None, window=None):
+    # contoh teks diambil dari jendela (bukan paragraf saja) supaya sama dengan evaluate() di batas paragraf
+    wtext, lo, _, more_before, more_after = window or (text, 0, len(text), False, False)
+    spans = []
+    for it in (entry["fn"](text, data=entry["data"], ctx=ctx) or [])[:10]:
+        span = (it["start"], it["end"])
+        if len(spans) < examples:
+            limit = plan.sentence_limit.get(entry["id"]) if plan is not None else None
+            if limit and "sentence" in it:
+                span += (ctx.sentences[it["sentence"]][:limit],)
+            else:
+                span += (_excerpt(wtext, it["start"] + lo, it["end"] + lo, more_before=more_before, more_after=more_after),)
+        spans.append(span)
+    return spans
+
+def eyd_rule_hits(text: str, type_key: str, ctx=None, window=None, timer=None, guard=None, examples=0):
+    """[(rule, [(awal, akhir), ...]), ...] urut eyd_db.txt, maks 10 span (offset di text) per aturan.
+
+    examples: sebanyak ini hit pertama tiap aturan diberi contoh teks -> (awal, akhir, contoh);
+    dipakai mode stream yang tidak menyimpan teks utuh (lihat hit_excerpt untuk teks utuh).
+    window=(wtext, lo, hi, more_before, more_after): aturan regex dijalankan pada wtext
+    (paragraf + potongan tetangganya), hanya hit yang mulai di [lo, hi) yang dihitung; span tetap
+    relatif thd text (wtext[lo:hi]). Aturan fungsi tetap dijalankan pada text, tetapi contoh
+    teksnya juga dipotong dari wtext.
+    guard (dict, opsional): diisi "timeouts" (aturan yang melewati anggarannya) dan "skipped"
+    (aturan yang tidak sempat jalan karena anggaran dokumen habis).
+    """
+    eng = engine()
+    if not eng.eyd_loaded:
+        return []
+
+    ctx = get_ctx(text, ctx)
+    hits = []
+    plan = eng.plan or EydRulePlan(eng.rules)
+    guard = {} if guard is None else guard
+    doc_end = time.perf_counter() + EYD_DOC_BUDGET
+    for entry in plan.entries:
+        rule = entry["rule"]
+        rid = entry["id"]
+
+        # relax untuk puisi: jangan “maksa” tiap kalimat harus bertitik
+        if type_key == "puisi" and rid in {"TITIK_01", "KOMA_02"}:
+            continue
+        if entry["kind"] not in ("regex", "function"):
+            continue
+
+        spans = []
+        t0 = time.perf_counter()
+        if t0 >= doc_end:
+            guard.setdefault("skipped", []).append(rid)
+            continue
+        budget = min(EYD_RULE_BUDGET, doc_end - t0)
+        try:
+            with Deadline(budget):
+                if entry["kind"] == "regex":
+                    spans = _regex_spans(entry, window or (text, 0, len(text), False, False), t0 + budget, examples)
+                else:
+                    try:
+                        spans = _function_spans(entry, text, ctx, examples, plan, window)
+                    except RuleTimeout:
+                        raise
+                    except Exception:
+                        spans = []
+        except RuleTimeout:
+            spans = []
+            if budget < EYD_RULE_BUDGET:
+                guard.setdefault("skipped", []).append(rid)  # anggaran dokumen yang habis
+            else:
+                guard.setdefault("timeouts", []).append(rid)
+                plan.strike(entry)
+
+        if timer is not None:
+            timer.rule(rid, time.perf_counter() - t0, len(spans))
+        if spans:
+            hits.append((rule, spans))
+    cancel_alarm()
+    if timer is not None and (guard or plan.disabled):
+        timer.eyd_guard = {**guard, "disabled": sorted(plan.disabled)}
+    return hits
+
+def eyd_report(hits, guard=None):
+    eng = engine()
     report = {
-        "loaded": bool(EYD_LOADED),
+        "loaded": bool(eng.eyd_loaded),
         "violations": [],
         "counts": {"error": 0, "warning": 0, "info": 0},
         "by_id": {},
-        "by_category": {}
+        "by_category": {},
+        "spans": []
     }
-    if not EYD_LOADED:
+    if not eng.eyd_loaded:
         return report
 
     counts_by_id = Counter()
     counts_by_cat = Counter()
     counts_by_sev = Counter()
     violations = []
+    spans = []
 
-    def add_violation(rule, example):
+    for rule, hit_spans in hits:
         rid = rule.get("id", "UNKNOWN")
         sev = (rule.get("severity") or "warning").lower()
         cat = (rule.get("category") or "lainnya").lower()
 
-        counts_by_id[rid] += 1
-        counts_by_cat[cat] += 1
-        counts_by_sev[sev] += 1
-
-        violations.append({
-            "id": rid,
-            "severity": sev,
-            "category": cat,
-            "title": rule.get("title", ""),
-            "message": rule.get("message", ""),
-            "example": example
-        })
-
-    for rule in EYD_RULES:
-        rid = rule.get("id", "")
-
-        # relax untuk puisi: jangan “maksa” tiap kalimat harus bertitik
-        if type_key == "puisi" and rid in {"TITIK_01", "KOMA_02"}:
-            continue
-
-        ctype = rule.get("check_type", "")
-        if ctype == "regex":
-            pat = rule.get("pattern", "")
-            flags = _re_flags(rule.get("flags", ""))
-            if not pat:
-                continue
-            try:
-                # ✅ Filter khusus KDEP_01: hanya flag kasus kata depan di/ke/dari yang nempel ke lokasi,
-                #    bukan imbuhan "di-" pada kata kerja (dikenal, ditulis, dibuat, dll).
-                if rid == "KDEP_01":
-                    for m in re.finditer(r"\b(di|ke|dari)[A-Za-zÀ-ÖØ-öø-ÿ]+", text, flags=flags):
-                        word = m.group(0)
-                        pref_m = re.match(r"^(di|ke|dari)", word, flags=re.IGNORECASE)
-                        if not pref_m:
-                            continue
-                        prefix = pref_m.group(0).lower()
-                        rest = word[len(prefix):]
-                        if not rest:
-                            continue
-
-                        rest_low = strip_pronoun_suffix(rest.lower())
-
-                        keep = False
-                        # diBandung / keJakarta / dariSurabaya -> jelas kata depan + nama tempat
-                        if rest[0].isupper():
-                            keep = True
-                        # dirumah / kesekolah / dipasar -> kata depan + lokasi umum
-                        elif rest_low in LOCATION_WORDS:
-                            keep = True
-
-                        if keep:
-                            add_violation(rule, _excerpt(text, m.start(), m.end()))
-                            if counts_by_id[rid] >= 10:
-                                break
-                    continue
-
-                for m in re.finditer(pat, text, flags=flags):
-                    add_violation(rule, _excerpt(text, m.start(), m.end()))
-                    if counts_by_id[rid] >= 10:
-                        break
-            except:
-                continue
-
-        elif ctype == "function":
-            fn = rule.get("function", "")
-            f = EYD_FUNCTIONS.get(fn)
-            if not f:
-                continue
-            try:
-                data = rule.get("data") or {}
-                res = f(text, data=data) or []
-                for it in res[:10]:
-                    add_violation(rule, it.get("example") if isinstance(it, dict) else str(it))
-            except:
-                continue
+        counts_by_id[rid] += len(hit_spans)
+        counts_by_cat[cat] += len(hit_spans)
+        counts_by_sev[sev] += len(hit_spans)
+
+        for span in hit_spans:
+            v = {
+                "id": rid,
+                "severity": sev,
+                "category": cat,
+                "title": rule.get("title", ""),
+                "message": rule.get("message", ""),
+                "start": span[0],
+                "end": span[1]
+            }
+            if len(span) > 2:
+                v["example"] = span[2]
+            violations.append(v)
+            spans.append([span[0], span[1], rid])
 
     report["violations"] = violations[:40]
+    report["spans"] = sorted(spans)
     report["counts"] = {
         "error": int(counts_by_sev.get("error", 0)),
         "warning": int(counts_by_sev.get("warning", 0)),
@@ -562,8 +1385,20 @@ def apply_eyd_rules(text: str, type_key: str):
     }
     report["by_id"] = dict(counts_by_id)
     report["by_category"] = dict(counts_by_cat)
+    # hanya ada kalau penjaga waktu pernah bertindak (lihat EYD_RULE_BUDGET)
+    if eng.plan is not None and eng.plan.disabled:
+        report["disabled"] = dict(eng.plan.disabled)
+    for k in ("timeouts", "skipped"):
+        if (guard or {}).get(k):
+            report[k] = list(guard[k])
     return report
 
+def apply_eyd_rules(text: str, type_key: str, ctx=None, timer=None):
+    guard = {}
+    return eyd_report(eyd_rule_hits(text, type_key, ctx=ctx, timer=timer, guard=guard), guard)
+
+load_eyd_db()
+
 # =========================================================
 # DENOTATIF vs KONOTATIF (heuristik)
 # =========================================================
@@ -586,47 +1421,130 @@ CONNOTATIVE_TYPES = {"puisi","fiksi","naratif","deskriptif","persuasi"}
 # =========================================================
 # AUTO FIX SEDERHANA
 # =========================================================
-def auto_fix_basic(text: str, is_poem: bool):
-    t = norm_space(text)
-    t = re.sub(r"\s+([,.!?…;:])", r"\1", t)
-    t = re.sub(r"([,.!?;:])(?!\s|$)", r"\1 ", t)
+# Hasil berupa daftar edit [(awal, akhir, pengganti)] atas teks ternormalisasi (norm_space), urut &
+# tidak bertumpuk, dari satu kali pindai (bukan 5x re.sub yang masing-masing menyalin teks utuh):
+#   1. spasi sebelum , . ! ? … ; : dihapus    2. spasi disisipkan sesudah , . ! ? ; : yang menempel
+#   3. kata slang diganti (SLANG_MAP)
+#   4. prosa: huruf kecil sesudah . ! ? … + spasi jadi kapital (spasinya jadi satu), huruf pertama
+#      teks kapital; puisi: spasi di awal/akhir baris dibuang, huruf pertama tiap baris kapital
+FIX_LETTER = "A-Za-zÀ-ÖØ-öø-ÿ"
+FIX_SPACE_AFTER = ",.!?;:"
+FIX_SLANG = "|".join(
+    "".join(f"[{c}{c.upper()}]" if c.isalpha() else re.escape(c) for c in k)
+    for k in sorted(SLANG_MAP, key=len, reverse=True)
+)
+# hanya posisi yang mungkin diubah: kata biasa & spasi tunggal dilewati mesin regex (di C)
+_FIX_COMMON = (
+    r"(\s+(?=[,.!?…;:]))"                                # 1 spasi sebelum tanda baca
+    r"|{gap}"                                             # 2 prosa: spasi sesudah . ! ? …; puisi: ganti baris
+    r"|([,.!?;:](?=\S))"                                  # 3 tanda baca menempel
+    r"|(?<![\w'])(" + FIX_SLANG + r")(?![\w'])"           # 4 kata slang utuh
+    r"|((?<![" + FIX_LETTER + r"'])[" + FIX_LETTER + r"']*'[" + FIX_LETTER + r"']*)"  # 5 kata ber-apostrof
+)
+FIX_PROSE_RE = re.compile(_FIX_COMMON.replace("{gap}", r"((?<=[.!?…])\s+)"))
+FIX_POEM_RE = re.compile(_FIX_COMMON.replace("{gap}", r"(\s*\n\s*)"))
+# batas kata slang seperti \b[huruf']+\b; dipakai apa adanya untuk kata ber-apostrof ("ga'", "'gue")
+FIX_WORD_RE = re.compile(r"\b[" + FIX_LETTER + r"']+\b")
+FIX_LOWER_RE = re.compile(r"[a-zà-öø-ÿ]")
+FIX_ALPHA_RE = re.compile("[" + FIX_LETTER + "]")
+
+def auto_fix_edits(t: str, is_poem: bool, cap_first: bool = True):
+    edits = []
+    # huruf yang (mungkin) dikapitalkan: posisi -> (selalu, spasi sebelumnya, sesudah tanda akhir kalimat)
+    caps = {}
+
+    def want_cap(p, always=False, gap=None, sent=False):
+        cur = caps.get(p, (False, None, False))
+        caps[p] = (always or cur[0], gap or cur[1], sent or cur[2])
+
+    def cap(p, rep):
+        # rep = teks hasil perbaikan yang dimulai di huruf p
+        always, gap, sent = caps.pop(p)
+        if sent and FIX_LOWER_RE.match(rep):
+            if gap is not None and t[gap[0]:gap[1]] != " ":
+                edits.append((gap[0], gap[1], " "))
+            up = rep[0].upper()
+            if always and not FIX_ALPHA_RE.match(up):
+                # "ÿ" -> "Ÿ" (di luar kelas huruf): kapital huruf pertama teks pindah ke huruf berikutnya
+                a = FIX_ALPHA_RE.search(t, p + 1)
+                if a:
+                    want_cap(a.start(), always=True)
+            return up + rep[1:]
+        return rep[0].upper() + rep[1:] if always else rep
+
+    def flush(upto):
+        # huruf biasa (bukan awal kata slang) sebelum posisi upto
+        while caps:
+            p = min(caps)
+            if p >= upto:
+                break
+            ch = cap(p, t[p])
+            if ch != t[p]:
+                edits.append((p, p + 1, ch))
 
-    def repl(m):
-        w = m.group(0)
+    def word(s, e):
+        w = t[s:e]
         low = w.lower()
-        if low in SLANG_MAP:
-            rep = SLANG_MAP[low]
-            if w[0].isupper():
-                rep = rep[0].upper() + rep[1:]
-            return rep
-        return w
-
-    t = re.sub(r"\b[A-Za-zÀ-ÖØ-öø-ÿ']+\b", repl, t)
-
-    if is_poem:
-        lines = t.split("\n")
-        fixed = []
-        for ln in lines:
-            ln2 = ln.strip()
-            if not ln2:
-                fixed.append("")
-                continue
-            m = re.search(r"[A-Za-zÀ-ÖØ-öø-ÿ]", ln2)
-            if m:
-                i = m.start()
-                ln2 = ln2[:i] + ln2[i].upper() + ln2[i+1:]
-            fixed.append(ln2)
-        return "\n".join(fixed).strip()
-
-    def cap_after(m):
-        return m.group(1) + " " + m.group(2).upper()
-
-    t = re.sub(r"([.!?…])\s+([a-zà-öø-ÿ])", cap_after, t)
-    m = re.search(r"[A-Za-zÀ-ÖØ-öø-ÿ]", t)
-    if m:
-        i = m.start()
-        t = t[:i] + t[i].upper() + t[i+1:]
-    return t
+        rep = match_case(w, SLANG_MAP[low]) if low in SLANG_MAP else w
+        if s in caps:
+            rep = cap(s, rep)
+        while caps and min(caps) < e:
+            # kapital yang pindah dari "ÿ" di awal kata ke huruf berikutnya di kata yang sama
+            i = min(caps) - s
+            rep = rep[:i] + cap(s + i, rep[i:])
+        if rep != w:
+            edits.append((s, e, rep))
+
+    if cap_first:
+        a = FIX_ALPHA_RE.search(t)
+        if a:
+            want_cap(a.start(), always=True)
+    for m in (FIX_POEM_RE if is_poem else FIX_PROSE_RE).finditer(t):
+        s, e = m.span()
+        kind = m.lastindex
+        if caps:
+            flush(s + 1 if kind <= 3 else s)
+        if kind == 1:
+            edits.append((s, e, " " if t[s - 1] in FIX_SPACE_AFTER else ""))
+        elif kind == 2:
+            if is_poem:
+                rep = "\n" * m.group(2).count("\n")
+                if rep != m.group(2):
+                    edits.append((s, e, rep))
+                a = FIX_ALPHA_RE.search(t, e)
+                if a:
+                    want_cap(a.start(), always=True)
+            else:
+                want_cap(e, gap=(s, e), sent=True)
+        elif kind == 3:
+            edits.append((e, e, " "))
+            if not is_poem and m.group(3) in ".!?":
+                want_cap(e, sent=True)
+        elif kind == 4:
+            word(s, e)
+        else:
+            for w in FIX_WORD_RE.finditer(t, s, e + 1):
+                if caps:
+                    flush(w.start())
+                word(*w.span())
+            if caps:
+                flush(e)
+    if caps:
+        flush(len(t))
+    return edits
+
+def apply_edits(text: str, edits):
+    out, pos = [], 0
+    for s, e, rep in edits:
+        out.append(text[pos:s])
+        out.append(rep)
+        pos = e
+    out.append(text[pos:])
+    return "".join(out)
+
+def auto_fix_basic(text: str, is_poem: bool, cap_first: bool = True):
+    t = norm_space(text)
+    return apply_edits(t, auto_fix_edits(t, is_poem, cap_first))
 
 # =========================================================
 # RUBRIK
@@ -640,12 +1558,84 @@ TIME_MARKERS = {"kemarin","hari","pagi","siang","sore","malam","suatu","ketika",
 PLACE_MARKERS = {"di","ke","dari","pada","dalam","atas","bawah","sebelah","dekat","jauh","kampung","sekolah","rumah","pasar","kota","desa"}
 CONFLICT_MARKERS = {"tetapi","namun","sayang","masalah","kesulitan","bingung","marah","takut","celaka","tiba-tiba"}
 RESOLUTION_MARKERS = {"akhirnya","pada akhirnya","sejak itu","selesai","berhasil","membaik","damai","lega"}
+DEFINITION_KEYS = ["adalah","merupakan","yaitu"]
+
+# frasa penanda struktur per tipe -> dicek sebagai substring teks (huruf kecil)
+STRUCTURE_KEYS = {
+    "naratif": {
+        "resolusi": ["akhirnya"],
+        "koda": ["pesan","amanat","pelajaran","sejak itu","jadi"],
+    },
+    "deskriptif": {
+        "identifikasi": DEFINITION_KEYS,
+    },
+    "fiksi": {
+        "rangkaian": ["lalu","kemudian","setelah itu","selanjutnya"],
+        "klimaks": ["tiba-tiba","puncaknya","mendadak","ketika itu","seketika"],
+        "resolusi": ["akhirnya"],
+        "amanat": ["amanat","pesan","pelajaran"],
+    },
+    "nonfiksi": {
+        "penutup": ["kesimpulan","oleh karena itu","dengan demikian","penutup"],
+    },
+    "prosedur": {
+        "tujuan": ["tujuan"],
+        "alat_bahan": ["alat","bahan"],
+        "langkah": ["langkah","pertama"],
+        "penutup": ["selesai","penutup","demikian"],
+    },
+    "surat_pribadi": {
+        "salam_pembuka": ["halo","hai","assalamualaikum","selamat"],
+        "salam_penutup": ["salam","salam hangat","hormat","terima kasih"],
+    },
+    "eksposisi": {
+        "tesis": ["menurut","pendapat","seharusnya","perlu","penting"],
+        "argumentasi": ["karena","sebab","sehingga","selain itu","namun","tetapi"],
+        "penegasan": ["kesimpulan","oleh karena itu","dengan demikian","penegasan"],
+    },
+    "pengumuman": {
+        "judul": ["pengumuman"],
+        "tempat": ["tempat","lokasi","ruang","aula","lapangan","kelas","di"],
+        "pembuat": ["panitia","kepala sekolah","sekretaris","ketua"],
+    },
+    "surel": {
+        "salam_pembuka": ["yth","dengan hormat","halo","hai"],
+        "salam_penutup": ["terima kasih","hormat saya","salam","regards"],
+    },
+    "informatif": {
+        "penutup": ["kesimpulan","penutup","oleh karena itu","dengan demikian"],
+    },
+    "eksplanasi": {
+        "deretan": ["sebab","karena","proses","akibat","sehingga","maka","oleh karena itu"],
+        "penutup": ["penutup","kesimpulan","dengan demikian"],
+    },
+    "persuasi": {
+        "argumen": ["karena","sebab","buktinya","contohnya","selain itu","oleh karena itu"],
+        "ajakan": ["ayo","mari","sebaiknya","hendaknya","jangan","harus"],
+        "penegasan": ["penegasan","kesimpulan","jadi","maka"],
+    },
+    "puisi": {
+        "amanat": ["pesan","amanat","ingatlah","jangan","harus","semoga"],
+    },
+    "biografi": {
+        "orientasi": ["lahir","dilahirkan","adalah","merupakan"],
+        "tahun": ["tahun"],
+        "peristiwa": ["kemudian","setelah itu","pada tahun","selanjutnya","karier","prestasi"],
+        "reorientasi": ["sejak itu","hingga kini","akhirnya","menginspirasi","teladan","penutup"],
+    },
+}
+STRUCTURE_PHRASES = sorted({k for keys in STRUCTURE_KEYS.values() for ks in keys.values() for k in ks})
+# semua penanda struktur + penghubung dalam satu automaton: sekali jalan per teks, batas kata terjaga
+MARKERS = PhraseAutomaton(STRUCTURE_PHRASES + sorted(CONNECTORS))
 
-def detect_title(text: str):
-    lines = [ln.strip() for ln in get_lines(text) if ln.strip()]
-    if not lines:
+def has_marker(text: str, phrases) -> bool:
+    hits = MARKERS.find(text)
+    return any(k in hits for k in phrases)
+
+def detect_title(text: str, ctx=None):
+    first = get_ctx(text, ctx).first_line
+    if not first:
         return ("", False)
-    first = lines[0]
     if len(alpha_words(first)) <= 12:
         return (first, True)
     return (first, False)
@@ -659,18 +1649,35 @@ def has_date_place_line(text: str):
 def has_email_address(text: str):
     return bool(re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text))
 
+TIME_RE = re.compile(r"\b(jam|pukul)\b|\b\d{1,2}[:.]\d{2}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b")
+
+def verse_ends(lines):
+    # larik = baris tidak kosong; bunyi akhir = 3 huruf terakhir kata terakhir tiap larik
+    n, ends = 0, Counter()
+    for ln in lines:
+        if not ln.strip():
+            continue
+        n += 1
+        ws = alpha_words(ln)
+        if ws:
+            ends[ws[-1].lower()[-3:]] += 1
+    return n, ends
+
 def mk_check(label, ok, note=""):
     return {"label": label, "ok": bool(ok), "note": note}
 
-def score_structure(type_key: str, text: str):
+def score_structure(type_key: str, text: str, ctx=None):
     benar, kurang, perlu = [], [], []
     checklist = []
 
-    paras = get_paragraphs(text)
-    low = text.lower()
-    w = [x.lower() for x in alpha_words(text)]
+    ctx = get_ctx(text, ctx)
+    keys = STRUCTURE_KEYS.get(type_key, {})
+    first_para = ctx.first_paragraph.lower()
+
+    def has(name):
+        return ctx.has_any(keys[name])
 
-    title, title_ok = detect_title(text)
+    title, title_ok = detect_title(text, ctx=ctx)
 
     def add(label, ok, note_ok="", note_no=""):
         checklist.append(mk_check(label, ok, note_ok if ok else note_no))
@@ -683,136 +1690,127 @@ def score_structure(type_key: str, text: str):
 
     if type_key == "naratif":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul singkat di baris pertama.")
-        orient = any(x in TIME_MARKERS for x in w) and any(x in PLACE_MARKERS for x in w)
+        orient = ctx.has_word(TIME_MARKERS) and ctx.has_word(PLACE_MARKERS)
         add("Orientasi", orient, note_ok="Ada waktu & tempat.", note_no="Tambahkan orientasi (waktu dan tempat) di awal.")
-        comp = any(x in CONFLICT_MARKERS for x in w)
+        comp = ctx.has_word(CONFLICT_MARKERS)
         add("Komplikasi", comp, note_ok="Ada konflik/masalah.", note_no="Tambahkan konflik/masalah (komplikasi).")
-        resol = ("akhirnya" in low) or any(x in RESOLUTION_MARKERS for x in w)
+        resol = has("resolusi") or ctx.has_word(RESOLUTION_MARKERS)
         add("Resolusi", resol, note_ok="Ada penyelesaian.", note_no="Tambahkan resolusi (penyelesaian).")
-        koda = any(k in low for k in ["pesan", "amanat", "pelajaran", "sejak itu", "jadi"])
+        koda = has("koda")
         add("Koda", koda, note_ok="Ada penutup/pesan.", note_no="Tambahkan koda (pesan/penutup).")
 
     elif type_key == "deskriptif":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        ident = any(k in low for k in ["adalah", "merupakan", "yaitu"]) or (len(paras) >= 1 and len(alpha_words(paras[0])) >= 8)
+        ident = has("identifikasi") or (ctx.paragraph_count >= 1 and len(alpha_words(first_para)) >= 8)
         add("Identifikasi", ident, note_ok="Objek dikenalkan di awal.", note_no="Tambahkan identifikasi objek di paragraf awal.")
-        adj = count_hits(text, {"indah","besar","kecil","tinggi","rendah","panjang","pendek","lebar","sempit","gelap","terang","harum","wangi","sejuk","hangat","dingin","panas"})
-        bagian = (len(paras) >= 2) or (adj >= 5)
+        adj = ctx.count_hits({"indah","besar","kecil","tinggi","rendah","panjang","pendek","lebar","sempit","gelap","terang","harum","wangi","sejuk","hangat","dingin","panas"})
+        bagian = (ctx.paragraph_count >= 2) or (adj >= 5)
         add("Deskripsi bagian", bagian, note_ok="Ada detail bagian/ciri.", note_no="Tambahkan deskripsi bagian (ciri, warna, ukuran, suasana).")
 
     elif type_key == "fiksi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        orient = any(x in TIME_MARKERS for x in w) or any(x in PLACE_MARKERS for x in w)
+        orient = ctx.has_word(TIME_MARKERS) or ctx.has_word(PLACE_MARKERS)
         add("Orientasi", orient, note_ok="Ada latar awal.", note_no="Tambahkan orientasi (waktu/tempat/tokoh) di awal.")
-        rangkaian = any(k in low for k in ["lalu","kemudian","setelah itu","selanjutnya"]) or (len(paras) >= 2)
+        rangkaian = has("rangkaian") or (ctx.paragraph_count >= 2)
         add("Rangkaian peristiwa", rangkaian, note_ok="Ada urutan peristiwa.", note_no="Tambahkan rangkaian peristiwa yang runtut.")
-        klimaks = any(k in low for k in ["tiba-tiba","puncaknya","mendadak","ketika itu","seketika"])
+        klimaks = has("klimaks")
         add("Klimaks", klimaks, note_ok="Ada puncak konflik.", note_no="Tambahkan klimaks (puncak kejadian).")
-        resol = ("akhirnya" in low) or any(x in RESOLUTION_MARKERS for x in w)
+        resol = has("resolusi") or ctx.has_word(RESOLUTION_MARKERS)
         add("Resolusi", resol, note_ok="Ada penyelesaian.", note_no="Tambahkan resolusi (akhir cerita).")
-        amanat = any(k in low for k in ["amanat","pesan","pelajaran"])
+        amanat = has("amanat")
         add("Amanat", amanat, note_ok="Amanat ada.", note_no="Tambahkan amanat/pesan (boleh eksplisit).")
 
     elif type_key == "nonfiksi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        pend = len(paras) >= 1 and (any(k in paras[0].lower() for k in ["adalah","merupakan","yaitu"]) or len(alpha_words(paras[0])) >= 10)
+        pend = ctx.paragraph_count >= 1 and (has_marker(first_para, DEFINITION_KEYS) or len(alpha_words(first_para)) >= 10)
         add("Pendahuluan", pend, note_ok="Topik dikenalkan.", note_no="Tambahkan pendahuluan (pengenalan topik).")
-        isi = len(paras) >= 2
+        isi = ctx.paragraph_count >= 2
         add("Isi", isi, note_ok="Ada isi pembahasan.", note_no="Tambahkan isi (penjelasan/fakta/contoh).")
-        penutup = any(k in low for k in ["kesimpulan","oleh karena itu","dengan demikian","penutup"])
+        penutup = has("penutup")
         add("Penutup", penutup, note_ok="Ada penutup.", note_no="Tambahkan penutup/kesimpulan.")
 
     elif type_key == "prosedur":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul prosedur.")
-        add("Tujuan", "tujuan" in low, note_ok="Ada bagian tujuan.", note_no="Tambahkan bagian 'Tujuan'.")
-        add("Alat dan bahan", ("alat" in low) or ("bahan" in low), note_ok="Ada alat/bahan.", note_no="Tambahkan 'Alat dan Bahan'.")
-        langkah = ("langkah" in low) or (count_bullets(text) >= 3) or ("pertama" in low)
+        add("Tujuan", has("tujuan"), note_ok="Ada bagian tujuan.", note_no="Tambahkan bagian 'Tujuan'.")
+        add("Alat dan bahan", has("alat_bahan"), note_ok="Ada alat/bahan.", note_no="Tambahkan 'Alat dan Bahan'.")
+        langkah = has("langkah") or (ctx.bullet_count >= 3)
         add("Langkah-langkah", langkah, note_ok="Langkah jelas.", note_no="Tuliskan langkah-langkah bernomor minimal 3.")
-        add("Penutup", any(k in low for k in ["selesai","penutup","demikian"]), note_ok="Ada penutup singkat.", note_no="Tambahkan penutup singkat (mis. selesai/demikian).")
+        add("Penutup", has("penutup"), note_ok="Ada penutup singkat.", note_no="Tambahkan penutup singkat (mis. selesai/demikian).")
 
     elif type_key == "surat_pribadi":
-        add("Tempat dan tanggal", has_date_place_line(text), note_ok="Pola tempat,tanggal terdeteksi.", note_no="Tambahkan tempat dan tanggal (mis. Jakarta, 12 Desember 2025).")
-        add("Salam pembuka", any(k in low for k in ["halo","hai","assalamualaikum","selamat"]), note_ok="Salam pembuka ada.", note_no="Tambahkan salam pembuka.")
-        add("Isi surat", len(alpha_words(text)) >= 40, note_ok="Isi surat cukup.", note_no="Tambahkan isi surat yang jelas (minimal 40 kata).")
-        add("Salam penutup", any(k in low for k in ["salam","salam hangat","hormat","terima kasih"]), note_ok="Salam penutup ada.", note_no="Tambahkan salam penutup.")
-        lines = [ln.strip() for ln in get_lines(text) if ln.strip()]
-        add("Nama pengirim", bool(lines and 1 <= len(alpha_words(lines[-1])) <= 4), note_ok="Ada nama pengirim.", note_no="Tambahkan nama pengirim di baris terakhir.")
+        add("Tempat dan tanggal", ctx.has_date_place, note_ok="Pola tempat,tanggal terdeteksi.", note_no="Tambahkan tempat dan tanggal (mis. Jakarta, 12 Desember 2025).")
+        add("Salam pembuka", has("salam_pembuka"), note_ok="Salam pembuka ada.", note_no="Tambahkan salam pembuka.")
+        add("Isi surat", ctx.n_words >= 40, note_ok="Isi surat cukup.", note_no="Tambahkan isi surat yang jelas (minimal 40 kata).")
+        add("Salam penutup", has("salam_penutup"), note_ok="Salam penutup ada.", note_no="Tambahkan salam penutup.")
+        add("Nama pengirim", 1 <= len(alpha_words(ctx.last_line)) <= 4, note_ok="Ada nama pengirim.", note_no="Tambahkan nama pengirim di baris terakhir.")
 
     elif type_key == "eksposisi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        add("Tesis", any(k in low for k in ["menurut", "pendapat", "seharusnya", "perlu", "penting"]), note_ok="Ada pernyataan tesis.", note_no="Nyatakan tesis/pendapat di awal.")
-        arg = sum(1 for p in ["karena","sebab","sehingga","selain itu","namun","tetapi"] if p in low) >= 3
+        add("Tesis", has("tesis"), note_ok="Ada pernyataan tesis.", note_no="Nyatakan tesis/pendapat di awal.")
+        arg = ctx.count_any(keys["argumentasi"]) >= 3
         add("Argumentasi", arg, note_ok="Ada argumentasi/penguat.", note_no="Tambahkan argumentasi (karena, sehingga, selain itu).")
-        add("Penegasan ulang", any(k in low for k in ["kesimpulan","oleh karena itu","dengan demikian","penegasan"]), note_ok="Ada penegasan ulang.", note_no="Tambahkan penegasan ulang/kesimpulan.")
+        add("Penegasan ulang", has("penegasan"), note_ok="Ada penegasan ulang.", note_no="Tambahkan penegasan ulang/kesimpulan.")
 
     elif type_key == "pengumuman":
-        add("Judul", ("pengumuman" in low) or title_ok, note_ok="Judul pengumuman ada.", note_no="Tambahkan judul 'PENGUMUMAN'.")
-        add("Isi pengumuman", len(alpha_words(text)) >= 25, note_ok="Isi cukup.", note_no="Tambahkan isi pengumuman yang jelas.")
-        waktu = bool(re.search(r"\b(jam|pukul)\b|\b\d{1,2}[:.]\d{2}\b|\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b", low))
-        tempat = any(k in low for k in ["tempat","lokasi","ruang","aula","lapangan","kelas","di "])
+        add("Judul", has("judul") or title_ok, note_ok="Judul pengumuman ada.", note_no="Tambahkan judul 'PENGUMUMAN'.")
+        add("Isi pengumuman", ctx.n_words >= 25, note_ok="Isi cukup.", note_no="Tambahkan isi pengumuman yang jelas.")
+        waktu = ctx.has_time
+        tempat = has("tempat")
         add("Waktu dan tempat", waktu and tempat, note_ok="Waktu & tempat terdeteksi.", note_no="Tambahkan waktu dan tempat pelaksanaan.")
-        add("Nama pembuat", any(k in low for k in ["panitia","kepala sekolah","sekretaris","ketua"]) or (len(get_lines(text)) >= 3),
+        add("Nama pembuat", has("pembuat") or (ctx.line_count >= 3),
             note_ok="Ada penanggung jawab/pembuat.", note_no="Tambahkan nama pembuat/panitia.")
 
     elif type_key == "surel":
-        add("Alamat email tujuan", has_email_address(text), note_ok="Email terdeteksi.", note_no="Tambahkan alamat email tujuan.")
-        subjek = any(ln.lower().strip().startswith(("subjek:", "subject:")) for ln in get_lines(text))
-        add("Subjek", subjek, note_ok="Subjek ada.", note_no="Tambahkan baris 'Subjek: ...'.")
-        add("Salam pembuka", any(k in low for k in ["yth","dengan hormat","halo","hai"]), note_ok="Salam pembuka ada.", note_no="Tambahkan salam pembuka.")
-        add("Isi email", len(alpha_words(text)) >= 35, note_ok="Isi email cukup.", note_no="Perjelas isi email (minimal 35 kata).")
-        add("Salam penutup", any(k in low for k in ["terima kasih","hormat saya","salam","regards"]), note_ok="Salam penutup ada.", note_no="Tambahkan salam penutup.")
-        lines = [ln.strip() for ln in get_lines(text) if ln.strip()]
-        add("Nama pengirim", bool(lines and 1 <= len(alpha_words(lines[-1])) <= 4), note_ok="Ada nama pengirim.", note_no="Tambahkan nama pengirim di baris terakhir.")
+        add("Alamat email tujuan", ctx.has_email, note_ok="Email terdeteksi.", note_no="Tambahkan alamat email tujuan.")
+        add("Subjek", ctx.has_subject_line, note_ok="Subjek ada.", note_no="Tambahkan baris 'Subjek: ...'.")
+        add("Salam pembuka", has("salam_pembuka"), note_ok="Salam pembuka ada.", note_no="Tambahkan salam pembuka.")
+        add("Isi email", ctx.n_words >= 35, note_ok="Isi email cukup.", note_no="Perjelas isi email (minimal 35 kata).")
+        add("Salam penutup", has("salam_penutup"), note_ok="Salam penutup ada.", note_no="Tambahkan salam penutup.")
+        add("Nama pengirim", 1 <= len(alpha_words(ctx.last_line)) <= 4, note_ok="Ada nama pengirim.", note_no="Tambahkan nama pengirim di baris terakhir.")
 
     elif type_key == "informatif":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        pend = len(paras) >= 1 and any(k in paras[0].lower() for k in ["adalah","merupakan","yaitu"])
+        pend = ctx.paragraph_count >= 1 and has_marker(first_para, DEFINITION_KEYS)
         add("Pendahuluan", pend, note_ok="Pendahuluan/definisi ada.", note_no="Tambahkan pendahuluan (definisi/pengenalan).")
-        add("Isi informasi", len(paras) >= 2, note_ok="Isi informasi ada.", note_no="Tambahkan isi informasi (penjelasan).")
-        add("Penutup", any(k in low for k in ["kesimpulan","penutup","oleh karena itu","dengan demikian"]),
+        add("Isi informasi", ctx.paragraph_count >= 2, note_ok="Isi informasi ada.", note_no="Tambahkan isi informasi (penjelasan).")
+        add("Penutup", has("penutup"),
             note_ok="Penutup ada.", note_no="Tambahkan penutup singkat.")
 
     elif type_key == "eksplanasi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        umum = len(paras) >= 1 and any(k in paras[0].lower() for k in ["adalah","merupakan","yaitu"])
+        umum = ctx.paragraph_count >= 1 and has_marker(first_para, DEFINITION_KEYS)
         add("Pernyataan umum", umum, note_ok="Pernyataan umum ada.", note_no="Tambahkan pernyataan umum (definisi fenomena).")
-        deret = any(k in low for k in ["sebab","karena","proses","akibat","sehingga","maka","oleh karena itu"])
+        deret = has("deretan")
         add("Deretan penjelas", deret, note_ok="Ada sebab-akibat/proses.", note_no="Tambahkan deretan penjelas (sebab-akibat/proses).")
-        add("Penutup", any(k in low for k in ["penutup","kesimpulan","dengan demikian"]),
+        add("Penutup", has("penutup"),
             note_ok="Penutup ada.", note_no="Tambahkan penutup/kesimpulan.")
 
     elif type_key == "persuasi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        add("Pengenalan isu", len(paras) >= 1 and len(alpha_words(paras[0])) >= 10, note_ok="Isu dikenalkan.", note_no="Tambahkan pengenalan isu di paragraf awal.")
-        arg = sum(1 for p in ["karena","sebab","buktinya","contohnya","selain itu","oleh karena itu"] if p in low) >= 2
+        add("Pengenalan isu", ctx.paragraph_count >= 1 and len(alpha_words(first_para)) >= 10, note_ok="Isu dikenalkan.", note_no="Tambahkan pengenalan isu di paragraf awal.")
+        arg = ctx.count_any(keys["argumen"]) >= 2
         add("Rangkaian argumen", arg, note_ok="Ada argumen.", note_no="Tambahkan argumen pendukung.")
-        add("Ajakan", any(k in low for k in ["ayo","mari","sebaiknya","hendaknya","jangan","harus"]), note_ok="Ada ajakan.", note_no="Tambahkan ajakan (ayo/mari/sebaiknya).")
-        add("Penegasan kembali", any(k in low for k in ["penegasan","kesimpulan","jadi","maka"]), note_ok="Ada penegasan.", note_no="Tambahkan penegasan kembali (kalimat penutup).")
+        add("Ajakan", has("ajakan"), note_ok="Ada ajakan.", note_no="Tambahkan ajakan (ayo/mari/sebaiknya).")
+        add("Penegasan kembali", has("penegasan"), note_ok="Ada penegasan.", note_no="Tambahkan penegasan kembali (kalimat penutup).")
 
     elif type_key == "puisi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul puisi di baris pertama.")
-        lines = [ln.strip() for ln in get_lines(text)]
-        non_empty = [ln for ln in lines[1:] if ln.strip()]
-        add("Larik dan bait", len(non_empty) >= 6, note_ok=f"{len(non_empty)} larik terdeteksi.", note_no="Minimal 6 larik setelah judul.")
-        ends = []
-        for ln in non_empty:
-            ws = [w.lower() for w in alpha_words(ln)]
-            if ws:
-                ends.append(ws[-1][-3:])
+        n_larik, ends = ctx.verse_ends
+        add("Larik dan bait", n_larik >= 6, note_ok=f"{n_larik} larik terdeteksi.", note_no="Minimal 6 larik setelah judul.")
         rhyme_ok = False
-        if len(ends) >= 6:
-            common = Counter(ends).most_common(1)[0][1]
+        if sum(ends.values()) >= 6:
+            common = ends.most_common(1)[0][1]
             rhyme_ok = common >= 2
         add("Rima/irama", rhyme_ok, note_ok="Ada pola bunyi (heuristik).", note_no="Coba buat rima/irama (pengulangan bunyi akhir).")
-        add("Amanat", any(k in low for k in ["pesan","amanat","ingatlah","jangan","harus","semoga"]), note_ok="Amanat/pesan terdeteksi.", note_no="Tambahkan amanat/pesan.")
+        add("Amanat", has("amanat"), note_ok="Amanat/pesan terdeteksi.", note_no="Tambahkan amanat/pesan.")
 
     elif type_key == "biografi":
         add("Judul", title_ok, note_ok=title, note_no="Tambahkan judul di baris pertama.")
-        orient = any(k in low for k in ["lahir","dilahirkan","adalah","merupakan"]) and (count_numbers(text) >= 1 or "tahun" in low)
+        orient = has("orientasi") and (ctx.number_count >= 1 or has("tahun"))
         add("Orientasi", orient, note_ok="Ada identitas awal (lahir/tahun).", note_no="Tambahkan orientasi: tokoh + lahir/tahun/asal.")
-        peristiwa = any(k in low for k in ["kemudian","setelah itu","pada tahun","selanjutnya","karier","prestasi"]) or (count_numbers(text) >= 2)
+        peristiwa = has("peristiwa") or (ctx.number_count >= 2)
         add("Peristiwa penting", peristiwa, note_ok="Ada peristiwa penting.", note_no="Tambahkan peristiwa penting kronologis.")
-        reorient = any(k in low for k in ["sejak itu","hingga kini","akhirnya","menginspirasi","teladan","penutup"])
+        reorient = has("reorientasi")
         add("Reorientasi", reorient, note_ok="Ada penutup/reorientasi.", note_no="Tambahkan reorientasi (kesan/penutup).")
 
     total_items = max(1, len(checklist))
@@ -823,13 +1821,15 @@ def score_structure(type_key: str, text: str):
 # =========================================================
 # BAHASA (35) — include EYD DB violations
 # =========================================================
-def score_language(text: str, type_key: str, eyd_report: dict):
+def score_language(text: str, type_key: str, eyd_report: dict, ctx=None, suggest=True):
+    # suggest=False: lewati saran ejaan (hanya untuk umpan balik; skor tidak berubah)
     benar, kurang, perlu = [], [], []
     sub = {}
 
-    weird = find_weird_punct(text)
-    slang = find_slang(text)
-    smash, nonkbbi, _ = detect_gibberish_and_non_kbbi(text)
+    ctx = get_ctx(text, ctx)
+    weird = ctx.weird_punct
+    slang = ctx.slang
+    smash, nonkbbi, _ = ctx.gibberish
 
     by_id = (eyd_report or {}).get("by_id", {}) if isinstance(eyd_report, dict) else {}
     eyd_viol = (eyd_report or {}).get("violations", []) if isinstance(eyd_report, dict) else []
@@ -873,7 +1873,8 @@ def score_language(text: str, type_key: str, eyd_report: dict):
     s_baku = 10
     s_baku -= min(8, len(slang) * 2)
     s_baku -= min(10, len(smash) * 3)
-    if KBBI_LOADED:
+    kbbi_loaded = engine().kbbi_loaded
+    if kbbi_loaded:
         s_baku -= min(8, max(0, len(nonkbbi) - 1) * 2)
 
     penulisan_ids = ["KDEP_01","PART_01","PART_02","PART_03","KGNT_01","KGNT_02","SAND_01","ULANG_01","ANGKA_01","ANGKA_02"]
@@ -889,17 +1890,21 @@ def score_language(text: str, type_key: str, eyd_report: dict):
         contoh = ", ".join([f"{w}({r})" for (w, r) in smash[:5]])
         kurang.append("Ada kata seperti asal ketik/typo: " + contoh)
         perlu.append("Perbaiki/hapus kata yang tidak bermakna.")
-    if KBBI_LOADED and nonkbbi:
+    saran = {}
+    if kbbi_loaded and nonkbbi:
         kurang.append("Ada kata tidak terverifikasi KBBI: " + ", ".join(nonkbbi[:12]))
         perlu.append("Periksa ejaan kata sesuai KBBI (catatan: nama diri tidak dihitung).")
+        saran = spelling_suggestions(nonkbbi[:12]) if suggest else {}
+        if saran:
+            perlu.append("Saran ejaan: " + "; ".join(f"{w} → {'/'.join(s)}" for w, s in list(saran.items())[:6]))
     if penulisan_hits > 0:
         kurang.append(f"Ada {penulisan_hits} indikasi salah penulisan kata (aturan EYD).")
         perlu.append("Periksa 'di/ke/dari', partikel, kata ganti (-ku/-mu/-nya), bentuk ulang, penulisan angka.")
 
     # Denotatif/konotatif (0..7)
-    figur = count_hits(text, FIGURATIVE)
-    facts = count_hits(text, FACT_MARKERS) + count_numbers(text)
-    wc = len(alpha_words(text)) or 1
+    figur = ctx.count_hits(FIGURATIVE)
+    facts = ctx.count_hits(FACT_MARKERS) + ctx.number_count
+    wc = ctx.n_words or 1
     fig_per_100 = (figur / wc) * 100.0
 
     s_dk = 7
@@ -921,9 +1926,9 @@ def score_language(text: str, type_key: str, eyd_report: dict):
     sub["denotatif_konotatif"] = s_dk
 
     # Variasi kosakata (0..5)
-    div = lexical_diversity(text)
-    top = Counter([w.lower() for w in alpha_words(text)]).most_common(1)
-    top_ratio = (top[0][1] / max(1, len(alpha_words(text)))) if top else 0.0
+    div = ctx.lexical_diversity
+    top = ctx.word_counts.most_common(1)
+    top_ratio = (top[0][1] / max(1, ctx.n_words)) if top else 0.0
     s_vocab = 5
     if div < 0.52: s_vocab -= 2
     if top_ratio > 0.10: s_vocab -= 1
@@ -939,14 +1944,18 @@ def score_language(text: str, type_key: str, eyd_report: dict):
     # contoh pelanggaran EYD (maks 3)
     if eyd_loaded and eyd_viol:
         for v in eyd_viol[:3]:
-            msg = f"EYD {v.get('id','')}: {v.get('title','')}. Contoh: {v.get('example','')}"
+            example = v.get("example")
+            if example is None:
+                example = hit_excerpt(text, v.get("id", ""), v["start"], v["end"]) if "start" in v else ""
+            msg = f"EYD {v.get('id','')}: {v.get('title','')}. Contoh: {example}"
             kurang.append(msg)
 
     meta = {
-        "kbbi_loaded": bool(KBBI_LOADED),
+        "kbbi_loaded": bool(kbbi_loaded),
         "eyd_loaded": bool(eyd_loaded),
         "weird_punct": weird,
         "slang": slang,
+        "saran_ejaan": saran,
         "eyd_counts": (eyd_report or {}).get("counts", {}),
     }
     return total, sub, meta, benar, kurang, perlu
@@ -954,24 +1963,24 @@ def score_language(text: str, type_key: str, eyd_report: dict):
 # =========================================================
 # KEJELASAN (15)
 # =========================================================
-def score_clarity(text: str):
+def score_clarity(text: str, ctx=None):
     benar, kurang, perlu = [], [], []
-    ss = sentences(text)
-    if not ss:
+    ctx = get_ctx(text, ctx)
+    n_ss = ctx.sentence_count
+    if not n_ss:
         return 0, {"kalimat": 0, "rata2_kata": 0}, benar, ["Tidak ada kalimat."], ["Tambahkan kalimat yang jelas."]
 
-    avglen = avg_sentence_len(text)
-    w = [w.lower() for w in alpha_words(text)]
-    conn = sum(1 for c in CONNECTORS if c in " ".join(w))
+    avglen = ctx.avg_sentence_len
+    conn = len(ctx.connectors)
 
-    too_short = sum(1 for s in ss if len(alpha_words(s)) <= 3)
-    too_long = sum(1 for s in ss if len(alpha_words(s)) >= 30)
+    too_short = ctx.short_sentences
+    too_long = ctx.long_sentences
 
     s = 15
     if avglen < 7 or avglen > 24: s -= 3
-    if too_short >= max(2, len(ss)//3): s -= 3
+    if too_short >= max(2, n_ss//3): s -= 3
     if too_long >= 2: s -= 2
-    if conn == 0 and len(ss) >= 4: s -= 3
+    if conn == 0 and n_ss >= 4: s -= 3
 
     s = clamp(s, 0, 15)
     if s >= 12:
@@ -979,16 +1988,17 @@ def score_clarity(text: str):
     else:
         kurang.append("Kejelasan/koherensi masih kurang.")
         perlu.append("Gunakan penghubung (karena, sehingga, kemudian, namun) dan rapikan kalimat.")
-    return s, {"kalimat": len(ss), "rata2_kata": round(avglen,2), "penghubung": conn}, benar, kurang, perlu
+    return s, {"kalimat": n_ss, "rata2_kata": round(avglen,2), "penghubung": conn}, benar, kurang, perlu
 
 # =========================================================
 # KREATIVITAS (15)
 # =========================================================
-def score_creativity(text: str, type_key: str):
+def score_creativity(text: str, type_key: str, ctx=None):
     benar, kurang, perlu = [], [], []
-    wcount = len(alpha_words(text)) or 1
-    figur = count_hits(text, FIGURATIVE)
-    div = lexical_diversity(text)
+    ctx = get_ctx(text, ctx)
+    wcount = ctx.n_words or 1
+    figur = ctx.count_hits(FIGURATIVE)
+    div = ctx.lexical_diversity
 
     s = 15
     if type_key in CONNOTATIVE_TYPES:
@@ -1010,26 +2020,26 @@ def score_creativity(text: str, type_key: str):
 # =========================================================
 # KERAPIHAN (5)
 # =========================================================
-def score_neatness(text: str):
+def score_neatness(text: str, ctx=None):
     benar, kurang, perlu = [], [], []
-    raw = (text or "")
+    ctx = get_ctx(text or "", ctx)
 
     s = 5
-    if re.search(r"[ \t]{2,}", raw):
+    if ctx.has_double_space:
         s -= 1
         kurang.append("Ada spasi ganda/berlebih.")
         perlu.append("Hapus spasi ganda.")
-    if re.search(r"\n{3,}", raw):
+    if ctx.has_blank_run:
         s -= 1
         kurang.append("Terlalu banyak baris kosong.")
         perlu.append("Rapikan paragraf (maks 1 baris kosong).")
-    if WEIRD_SYMBOLS_RE.search(raw):
+    if ctx.has_weird_symbol:
         s -= 2
         kurang.append("Ada simbol aneh yang mengganggu kerapihan.")
         perlu.append("Hapus simbol asing (@/#/$/%/dll).")
 
-    caps = sum(1 for ch in raw if ch.isupper())
-    letters = sum(1 for ch in raw if ch.isalpha())
+    caps = ctx.upper_count
+    letters = ctx.alpha_count
     if letters > 0 and (caps / letters) > 0.25:
         s -= 1
         kurang.append("Huruf kapital terlalu banyak (tidak rapi).")
@@ -1038,7 +2048,7 @@ def score_neatness(text: str):
     s = clamp(s, 0, 5)
     if s >= 4:
         benar.append("Teks cukup rapi.")
-    return s, {"baris": len(get_lines(text))}, benar, kurang, perlu
+    return s, {"baris": ctx.line_count}, benar, kurang, perlu
 
 # =========================================================
 # MAIN
@@ -1048,12 +2058,86 @@ VALID_TYPES = {
     "pengumuman","surel","informatif","eksplanasi","persuasi","puisi","biografi"
 }
 
-def evaluate(type_key: str, text: str):
+# Evaluasi sebagian (parameter "fields"): bagian hasil -> analisis yang dibutuhkan, lalu
+# ANALYSIS_DEPS ditelusuri sampai tuntas. Analisis yang tidak terjangkau tidak dijalankan sama sekali
+# (mis. ["eyd"] melewati pemeriksaan KBBI, kelima skor, auto_fix, dan susunan umpan balik).
+RESULT_FIELDS = {
+    "score": ("scores",),                       # skor total
+    "subscores": ("scores",),                   # breakdown.meta.subscores
+    "feedback": ("scores", "suggest"),          # benar / kurang_tepat / perlu_diperbaiki
+    "detail": ("scores", "suggest"),            # breakdown.meta lengkap (detail per skor)
+    "structure": ("structure",),                # breakdown.structure (cek struktur per tipe)
+    "eyd": ("eyd",),                            # breakdown.eyd
+    "auto_fix": ("auto_fix",),                  # auto_fix.edits
+}
+ANALYSIS_DEPS = {
+    "scores": ("structure", "language", "clarity", "creativity", "neatness", "kbbi"),
+    "language": ("eyd", "kbbi"),
+    "suggest": ("kbbi",),                       # saran ejaan kata non-KBBI
+}
+ALL_ANALYSES = frozenset(
+    {a for deps in RESULT_FIELDS.values() for a in deps} | {a for deps in ANALYSIS_DEPS.values() for a in deps}
+)
+
+def parse_fields(value):
+    """list / "score,eyd" -> frozenset bagian hasil; None = hasil lengkap. Nama tak dikenal -> ValueError."""
+    if value is None or value == "" or value == []:
+        return None
+    items = value.split(",") if isinstance(value, str) else value
+    if not isinstance(items, (list, tuple)):
+        raise ValueError("fields harus list atau string dipisah koma")
+    fields = frozenset(str(f).strip() for f in items if str(f).strip())
+    unknown = sorted(fields - RESULT_FIELDS.keys())
+    if unknown:
+        raise ValueError("fields tidak dikenal: " + ", ".join(unknown) + " (pilihan: " + ", ".join(RESULT_FIELDS) + ")")
+    return fields or None
+
+def analyses_for(fields) -> frozenset:
+    if fields is None:
+        return ALL_ANALYSES
+    need, todo = set(), [a for f in fields for a in RESULT_FIELDS[f]]
+    while todo:
+        a = todo.pop()
+        if a not in need:
+            need.add(a)
+            todo.extend(ANALYSIS_DEPS.get(a, ()))
+    return frozenset(need)
+
+def select_fields(res: dict, fields):
+    """Ambil bagian yang diminta dari hasil (lengkap atau sebagian); bentuk kunci sama dengan hasil lengkap."""
+    if fields is None:
+        return res
+    out = {k: res[k] for k in ("ok", "type", "message", "incomplete") if k in res}
+    out["fields"] = sorted(fields)
+    for f in ("score", "feedback", "auto_fix"):
+        if f in fields and f in res:
+            out[f] = res[f]
+    bd, sel = res.get("breakdown", {}), {}
+    for f in ("structure", "eyd"):
+        if f in fields and f in bd:
+            sel[f] = bd[f]
+    meta = bd.get("meta", {})
+    if "detail" in fields and meta:
+        sel["meta"] = meta
+    elif "subscores" in fields and "subscores" in meta:
+        sel["meta"] = {"subscores": meta["subscores"]}
+    if sel:
+        out["breakdown"] = sel
+    return out
+
+def evaluate(type_key: str, text: str, timer=None, fields=None):
+    # timer (StageTimer, opsional): catat waktu per tahap; tidak mengubah isi hasil.
+    # fields (hasil parse_fields): hanya bagian itu yang dihitung & dikembalikan
+    with pinned():
+        return _evaluate(type_key, text, timer=timer, fields=fields)
+
+def _evaluate(type_key: str, text: str, timer=None, fields=None):
     type_key = (type_key or "").strip()
-    cleaned = norm_space(text or "")
+    with stage(timer, "norm_space"):
+        cleaned = norm_space(text or "")
 
     if not cleaned:
-        return {
+        return select_fields({
             "ok": False,
             "type": type_key,
             "score": 0,
@@ -1063,35 +2147,77 @@ def evaluate(type_key: str, text: str):
                 "kurang_tepat": ["Teks masih kosong."],
                 "perlu_diperbaiki": ["Tempel/unggah teks terlebih dahulu."]
             },
-            "auto_fix": {"text": ""},
+            "auto_fix": {"edits": []},
             "breakdown": {}
-        }
+        }, fields)
 
     if type_key not in VALID_TYPES:
         type_key = "informatif"
 
-    eyd_report = apply_eyd_rules(cleaned, type_key)
-
-    s_str, b_str, okS, kS, pS = score_structure(type_key, cleaned)
-    s_lang, sub_lang, meta_lang, okL, kL, pL = score_language(cleaned, type_key, eyd_report)
-    s_clr, b_clr, okC, kC, pC = score_clarity(cleaned)
-    s_crv, b_crv, okR, kR, pR = score_creativity(cleaned, type_key)
-    s_neat, b_neat, okN, kN, pN = score_neatness(cleaned)
+    need = analyses_for(fields)
+    ctx = AnalysisContext(cleaned)
+    if timer is not None and "scores" in need:
+        # isi cache konteks lebih dulu supaya biayanya tidak tercampur ke tahap pertama yang memakainya
+        with stage(timer, "tokenize"):
+            ctx.token_spans
+        with stage(timer, "sentences"):
+            ctx.sentences
+        with stage(timer, "find_slang"):
+            ctx.slang
+        with stage(timer, "detect_gibberish_and_non_kbbi"):
+            ctx.gibberish
+    report, edits = {}, []
+    if "eyd" in need:
+        with stage(timer, "apply_eyd_rules"):
+            report = apply_eyd_rules(cleaned, type_key, ctx=ctx, timer=timer)
+    if "auto_fix" in need:
+        with stage(timer, "auto_fix_edits"):
+            edits = auto_fix_edits(cleaned, is_poem=(type_key == "puisi"))
+    res = build_result(type_key, cleaned, ctx, report, edits, timer=timer, need=need)
+    return select_fields(res, fields)
+
+_SKIPPED = (0, {}, [], [], [])  # skor yang tidak diminta: (skor, detail, benar, kurang, perlu)
+
+def build_result(type_key: str, text: str, ctx, eyd_report: dict, edits, timer=None, need=ALL_ANALYSES):
+    # ctx: AnalysisContext (teks utuh) atau StreamContext (agregat per paragraf).
+    # edits: auto_fix_edits() atas teks ternormalisasi; span EYD & edit = offset di teks itu
+    # need (analyses_for): skor yang tidak termasuk diisi kosong; select_fields membuangnya
+    s_str, b_str, okS, kS, pS = _SKIPPED
+    s_lang, sub_lang, meta_lang, okL, kL, pL = 0, {}, {}, [], [], []
+    s_clr, b_clr, okC, kC, pC = _SKIPPED
+    s_crv, b_crv, okR, kR, pR = _SKIPPED
+    s_neat, b_neat, okN, kN, pN = _SKIPPED
+    if "structure" in need:
+        with stage(timer, "score_structure"):
+            s_str, b_str, okS, kS, pS = score_structure(type_key, text, ctx=ctx)
+    if "language" in need:
+        with stage(timer, "score_language"):
+            s_lang, sub_lang, meta_lang, okL, kL, pL = score_language(
+                text, type_key, eyd_report, ctx=ctx, suggest="suggest" in need
+            )
+    if "clarity" in need:
+        with stage(timer, "score_clarity"):
+            s_clr, b_clr, okC, kC, pC = score_clarity(text, ctx=ctx)
+    if "creativity" in need:
+        with stage(timer, "score_creativity"):
+            s_crv, b_crv, okR, kR, pR = score_creativity(text, type_key, ctx=ctx)
+    if "neatness" in need:
+        with stage(timer, "score_neatness"):
+            s_neat, b_neat, okN, kN, pN = score_neatness(text, ctx=ctx)
 
     total = clamp(s_str + s_lang + s_clr + s_crv + s_neat, 0, 100)
 
-    smash, _, _ = detect_gibberish_and_non_kbbi(cleaned)
-    weird = find_weird_punct(cleaned)
-    if total > 98 and (len(smash) > 0 or len(weird) > 0):
-        total = 98
-
-    fixed = auto_fix_basic(cleaned, is_poem=(type_key == "puisi"))
+    if "scores" in need:
+        smash, _, _ = ctx.gibberish
+        weird = ctx.weird_punct
+        if total > 98 and (len(smash) > 0 or len(weird) > 0):
+            total = 98
 
     benar = (okS + okL + okC + okR + okN)[:18]
     kurang = (kS + kL + kC + kR + kN)[:18]
     perlu = (pS + pL + pC + pR + pN)[:18]
 
-    return {
+    res = {
         "ok": True,
         "type": type_key,
         "score": int(total),
@@ -1100,18 +2226,24 @@ def evaluate(type_key: str, text: str):
             "kurang_tepat": kurang,
             "perlu_diperbaiki": perlu
         },
-        "auto_fix": {"text": fixed},
+        "auto_fix": {"edits": [[a, b, rep] for (a, b, rep) in edits]},
         "breakdown": {
             "structure": b_str,
             "eyd": {
                 "loaded": bool(eyd_report.get("loaded", False)),
                 "counts": eyd_report.get("counts", {}),
-                "top_violations": eyd_report.get("violations", [])[:8]
+                "by_id": eyd_report.get("by_id", {}),
+                "spans": eyd_report.get("spans", []),
+                # contoh teks hanya lewat opsi "excerpts" (expand_result)
+                "top_violations": [
+                    {k: v for k, v in x.items() if k != "example"} for x in eyd_report.get("violations", [])[:8]
+                ],
+                **{k: eyd_report[k] for k in ("disabled", "timeouts", "skipped") if eyd_report.get(k)}
             },
             "meta": {
                 "rubrik": RUBRIK,
-                "kbbi_loaded": bool(KBBI_LOADED),
-                "eyd_loaded": bool(EYD_LOADED),
+                "kbbi_loaded": bool(engine().kbbi_loaded),
+                "eyd_loaded": bool(engine().eyd_loaded),
                 "subscores": {
                     "struktur": int(s_str),
                     "bahasa": int(s_lang),
@@ -1127,12 +2259,1540 @@ def evaluate(type_key: str, text: str):
             }
         }
     }
+    if eyd_report.get("timeouts") or eyd_report.get("skipped"):
+        res["incomplete"] = True  # ada aturan EYD yang terpotong anggaran waktu: jangan di-cache
+    return res
+
+# =========================================================
+# CACHE HASIL (evaluate() deterministik untuk tipe + teks ternormalisasi + versi kamus)
+# =========================================================
+RESULT_CACHE = None
+
+LAZY_LOCK = threading.Lock()  # objek modul yang dibuat malas (cache, sesi, overlay, pool) dibuat sekali
+
+def dict_version() -> str:
+    return engine().version
+
+def get_result_cache():
+    global RESULT_CACHE
+    if RESULT_CACHE is None:
+        with LAZY_LOCK:
+            if RESULT_CACHE is None:
+                RESULT_CACHE = cache_from_env()
+    return RESULT_CACHE
+
+# =========================================================
+# MUAT ULANG KAMUS & ATURAN (tanpa restart worker)
+# =========================================================
+# Thread latar memantau kbbi_wordlist.csv & eyd_db.txt, membangun versi baru (index KBBI,
+# index saran ejaan, rencana aturan EYD) lalu menitipkannya di `pending`; apply_reload()
+# memasangnya di awal request berikutnya, jadi satu evaluasi tidak pernah melihat dua versi.
+# Cache hasil & sesi ikut basi lewat dict_version(). Gagal muat -> versi lama tetap dipakai.
+RELOAD_INTERVAL = _env_seconds("EVAL_RELOAD_INTERVAL_MS", 5000)  # 0 = tidak dipantau
+WATCHER = None
+
+def build_kbbi():
+    words, source = read_kbbi(rebuild=True)
+    try:
+        spell = open_spell_index(SPELL_INDEX, KBBI_CSV)
+        if spell is None:
+            build_spell_index(KBBI_CSV, SPELL_INDEX)
+            spell = open_spell_index(SPELL_INDEX, KBBI_CSV)
+    except OSError:
+        spell = None
+    return words, source, spell or False, open_smash(True)
+
+class DictWatcher:
+    """Pemantau file kamus: mtime/ukuran dicek tiap `interval` detik, sha256 memastikan isinya berubah."""
+
+    FILES = (
+        (KBBI_CSV, "kbbi_wordlist.csv", build_kbbi, set_kbbi),
+        (EYD_DB_TXT, "eyd_db.txt", read_eyd_db, set_eyd),
+    )
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.seen = dict(DICT_FILES)
+        self.settling = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.reloads = self.failures = 0
+        self.last_error = ""
+
+    def start(self):
+        threading.Thread(target=self._run, name="dict-watcher", daemon=True).start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:  # thread pemantau tidak boleh mati
+                self.failures += 1
+                self.last_error = str(e) or e.__class__.__name__
+
+    def check(self, settle: bool = True):
+        """Bangun versi baru file yang berubah; settle: file harus tidak berubah selama satu putaran
+        (file yang sedang ditulis tidak ikut dimuat)."""
+        for path, name, build, _ in self.FILES:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # file hilang: versi yang dimuat tetap dipakai
+            stamp = (st.st_mtime_ns, st.st_size)
+            old = self.seen.get(path)
+            if old is not None and old[:2] == stamp:
+                continue
+            if settle and self.settling.get(path) != stamp:
+                self.settling[path] = stamp
+                continue
+            state = file_state(path)
+            if state is None:
+                continue
+            if old is not None and old[2] == state[2]:
+                self.seen[path] = state  # hanya mtime berubah (touch / disalin ulang)
+                continue
+            try:
+                built = build()
+            except Exception as e:
+                self.seen[path] = state  # coba lagi kalau file berubah lagi
+                self.failures += 1
+                self.last_error = f"{name}: {e or e.__class__.__name__}"
+                dict_load_failed(name, e, True)
+                continue
+            if file_state(path) != state:
+                continue  # berubah lagi selama dibangun: ulangi di putaran berikutnya
+            self.seen[path] = state
+            with self.lock:
+                self.pending[path] = (state, built)
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "pending": len(self.pending),
+        }
+
+def start_watcher():
+    # per proses: thread tidak ikut fork, jadi worker --serve memanggil ini sendiri
+    global WATCHER
+    WATCHER = DictWatcher(RELOAD_INTERVAL)
+    if RELOAD_INTERVAL > 0:
+        WATCHER.start()
+    return WATCHER
+
+def apply_reload() -> bool:
+    """Pasang versi yang sudah dibangun di latar; dipanggil di antara request."""
+    w = WATCHER
+    if w is None or not w.pending:
+        return False
+    with w.lock:
+        pending, w.pending = w.pending, {}
+    for path, name, _, install in DictWatcher.FILES:
+        if path in pending:
+            state, built = pending[path]
+            install(*built, state=state)
+            w.reloads += 1
+            sys.stderr.write(f"{name} dimuat ulang (pid {os.getpid()}, versi {state[2].hex()[:16]})\n")
+    sys.stderr.flush()
+    return True
+
+def reload_now() -> bool:
+    # op "reload": periksa sekarang juga tanpa menunggu file "tenang" / interval berikutnya
+    w = WATCHER or start_watcher()
+    w.check(settle=False)
+    return apply_reload()
+
+def dict_status():
+    eng = engine()
+    return {
+        "version": eng.version,
+        "kbbi_loaded": bool(eng.kbbi_loaded),
+        "kbbi_source": eng.kbbi_source,
+        "kbbi_words": len(eng.words),
+        "eyd_loaded": bool(eng.eyd_loaded),
+        "eyd_rules": len(eng.rules),
+        "reload": WATCHER.stats() if WATCHER is not None else None,
+    }
+
+def truthy(flag) -> bool:
+    return flag in (True, 1) or str(flag).strip().lower() in ("1", "true", "yes")
+
+def want_profile(flag=None) -> bool:
+    # profil per tahap: opt-in per request, atau dipaksa lewat env EVAL_PROFILE=1
+    if os.environ.get("EVAL_PROFILE", "").strip() in ("1", "true", "yes"):
+        return True
+    return truthy(flag)
+
+def attach_timing(res: dict, timer):
+    if timer is not None:
+        res.setdefault("breakdown", {}).setdefault("meta", {})["timing"] = timer.to_dict()
+    return res
+
+def apply_spell_fix(res: dict, text: str):
+    """Opt-in: auto_fix juga mengganti kata non-KBBI yang sarannya tidak ambigu.
+
+    text = teks ternormalisasi (offset edit). Edit di dalam kata yang dibetulkan (kapital) dilebur
+    ke edit penggantinya; kata yang sudah diubah auto-fix lebih dari kapitalnya dibiarkan.
+    Mengembalikan salinan dangkal; hasil dari cache tidak diubah.
+    """
+    saran = res.get("breakdown", {}).get("meta", {}).get("bahasa_meta", {}).get("saran_ejaan") or {}
+    fixes = spelling_fixes(saran)
+    if not fixes or "edits" not in res.get("auto_fix", {}):
+        return res
+    lookup = {w.lower(): rep.lower() for w, rep in fixes.items()}
+    pat = word_alternation(tuple(sorted(lookup)), r"(?i)(?<![\w'-])", r"(?![\w]|[-']\w)")
+    edits, out, i = res["auto_fix"]["edits"], [], 0
+    for m in pat.finditer(text):
+        s, e = m.span()
+        while i < len(edits) and edits[i][1] <= s:
+            out.append(edits[i])
+            i += 1
+        k = i
+        while k < len(edits) and edits[k][1] <= e and edits[k][0] < e:
+            k += 1
+        inside = edits[i:k]
+        if (k < len(edits) and edits[k][0] < e) or any(r.lower() != text[a:b].lower() for a, b, r in inside):
+            continue
+        word = apply_edits(text[s:e], [(a - s, b - s, r) for a, b, r in inside])
+        out.append([s, e, match_case(word, lookup[m.group(1).lower()])])
+        i = k
+    out.extend(edits[i:])
+    res = dict(res)
+    res["auto_fix"] = {**res["auto_fix"], "edits": out, "ejaan": fixes}
+    return res
+
+def expand_result(res: dict, text: str, excerpts=False, fix_text=False):
+    """Opt-in: contoh teks pelanggaran EYD ("excerpts") & teks auto-fix utuh ("fix_text"), dibuat dari
+    span/edit atas teks ternormalisasi. Mengembalikan salinan dangkal; hasil dari cache tidak diubah."""
+    out = dict(res)
+    bd = res.get("breakdown") or {}
+    eyd = bd.get("eyd")
+    if excerpts and eyd and eyd.get("top_violations"):
+        top = [{**v, "example": hit_excerpt(text, v["id"], v["start"], v["end"])} for v in eyd["top_violations"]]
+        out["breakdown"] = {**bd, "eyd": {**eyd, "top_violations": top}}
+    fix = res.get("auto_fix")
+    if fix_text and fix and "edits" in fix:
+        out["auto_fix"] = {**fix, "text": apply_edits(text, fix["edits"])}
+    return out
+
+def evaluate_cached(type_key: str, text: str, profile=False, timer=None, fields=None, parallel=False):
+    # hasil dari cache dipakai bersama: jangan diubah oleh pemanggil.
+    # profile=True melewati cache (waktu yang diukur = evaluasi sungguhan) dan menulis
+    # breakdown.meta.timing; timer dari pemanggil (worker) dipakai untuk metrik saja.
+    # fields: hasil lengkap di cache tetap dipakai; kalau tidak ada, hasil sebagian disimpan
+    # dengan kunci sendiri (tidak pernah menimpa hasil lengkap).
+    # parallel=True: dokumen besar dinilai per paragraf di beberapa core (hasil sama -> cache sama)
+    with pinned():
+        return _evaluate_cached(type_key, text, profile, timer, fields, parallel)
+
+def _evaluate_cached(type_key, text, profile, timer, fields, parallel):
+    type_key = (type_key or "").strip()
+    run = evaluate_parallel if parallel else evaluate
+    if profile and timer is None:
+        timer = StageTimer()
+    with stage(timer, "norm_space"):
+        cleaned = norm_space(text or "")
+    if profile or not cleaned:
+        return attach_timing(run(type_key, cleaned, timer=timer, fields=fields), timer if profile else None)
+    cache = get_result_cache()
+    version = dict_version()
+    # overlay sekolah: kunci sendiri (versi cache tetap versi kamus bersama, tidak dibuang per sekolah)
+    ov = ACTIVE_OVERLAY.get()
+    variant = type_key if ov is None else f"{type_key}|@{ov.key}"
+    key = cache_key(variant, cleaned, version)
+    with stage(timer, "cache_get"):
+        res = cache.get(key, version)
+        if res is None and fields is not None:
+            key = cache_key(variant + "|" + ",".join(sorted(fields)), cleaned, version)
+            res = cache.get(key, version)
+    if res is None:
+        res = run(type_key, cleaned, timer=timer, fields=fields)
+        if not res.get("incomplete"):
+            with stage(timer, "cache_put"):
+                cache.put(key, version, res)
+    return select_fields(res, fields)
+
+def evaluate_request(req: dict, timer=None):
+    """Payload {type, text, fields?, spell_fix?, excerpts?, fix_text?, profile?, parallel?, school?, similar?,
+    submission?} -> hasil (worker, batch, CLI). school = nama overlay kamus sekolah (kbbi_overlay.py);
+    similar/submission = cari & simpan di indeks submisi mirip (near_dup.py)."""
+    with pinned(), use_overlay(overlay_for(req.get("school"))):
+        return _evaluate_request(req, timer)
+
+def _evaluate_request(req: dict, timer=None):
+    fields = parse_fields(req.get("fields"))
+    spell_fix = truthy(req.get("spell_fix"))
+    excerpts, fix_text = truthy(req.get("excerpts")), truthy(req.get("fix_text"))
+    inner = fields
+    if spell_fix and fields is not None and "auto_fix" in fields:
+        inner = fields | {"detail"}  # saran ejaan ada di breakdown.meta.bahasa_meta
+    res = evaluate_cached(
+        req.get("type", "informatif"), req.get("text", ""), profile=want_profile(req.get("profile")),
+        timer=timer, fields=inner, parallel=truthy(req.get("parallel"))
+    )
+    if spell_fix or excerpts or fix_text:
+        cleaned = norm_space(req.get("text", ""))
+        if spell_fix:
+            res = apply_spell_fix(res, cleaned)
+        res = expand_result(res, cleaned, excerpts, fix_text)
+    res = res if inner is fields else select_fields(res, fields)
+    if truthy(req.get("similar")) and res.get("ok"):
+        hasher = MinHasher()
+        hasher.update(tokenize_words(norm_space(req.get("text", ""))))
+        with stage(timer, "similar"):
+            res = attach_similar(res, similar_submissions(hasher, res.get("type", ""), req.get("school"), req.get("submission")))
+    return res
+
+# =========================================================
+# SUBMISI MIRIP (near_dup.py: MinHash + LSH di SQLite, dibagi antar worker)
+# =========================================================
+# Opt-in per request ("similar"): teks dicari di indeks; hasilnya di breakdown.meta.similar_submissions,
+# di luar cache hasil (bergantung isi indeks, bukan hanya teks). Cakupan per sekolah ("school").
+# Teks hanya disimpan kalau ada "submission" (id submisi/siswa): kirim ulang / revisi dengan id yang sama
+# tidak dilaporkan mirip dengan dirinya sendiri. Tanpa id hanya dicari, tidak disimpan (klik ulang teks
+# yang sama tidak pernah menemukan dirinya).
+SIMILAR = None
+SIMILAR_PID = None
+
+def get_similarity_index():
+    global SIMILAR, SIMILAR_PID
+    # koneksi SQLite tidak boleh diwarisi lewat fork (server pre-fork, pool paralel): buka per proses
+    if SIMILAR is None or SIMILAR_PID != os.getpid():
+        with LAZY_LOCK:
+            if SIMILAR is None or SIMILAR_PID != os.getpid():
+                SIMILAR = similarity_index_from_env()
+                SIMILAR_PID = os.getpid()
+    return SIMILAR
+
+def similar_submissions(hasher, type_key: str, school=None, submission=None):
+    """[{id, submission, type, jaccard, created}, ...], lalu dokumen ini disimpan kalau ada id submisi;
+    None kalau teks terlalu pendek atau indeks tidak bisa dipakai (penilaian tetap jalan)."""
+    scope, ref = str(school or ""), str(submission or "").strip()[:128]
+    try:
+        index, limit, min_jaccard = get_similarity_index()
+        if not ref:
+            return index.query(hasher, scope, "", limit, min_jaccard)
+        return index.check(hasher, scope, ref, type_key, limit, min_jaccard)
+    except (sqlite3.Error, OSError):
+        return None
+
+def attach_similar(res: dict, matches):
+    # salinan dangkal: hasil dari cache tidak diubah
+    if matches is None:
+        return res
+    bd = res.get("breakdown") or {}
+    out = dict(res)
+    out["breakdown"] = {**bd, "meta": {**bd.get("meta", {}), "similar_submissions": matches}}
+    return out
+
+# =========================================================
+# WORKER MODE (NDJSON lewat stdin/stdout, proses hidup lama)
+# =========================================================
+def handle_worker_request(req: dict):
+    rid = req.get("id")
+    op = req.get("op", "evaluate")
+    if op == "ping":
+        return {
+            "id": rid, "ok": True, "pong": True, "pid": os.getpid(),
+            "kbbi_loaded": bool(engine().kbbi_loaded), "eyd_loaded": bool(engine().eyd_loaded)
+        }
+    if op == "stats":
+        return {
+            "id": rid, "ok": True, "pid": os.getpid(),
+            "cache": get_result_cache().stats(),
+            "sessions": get_session_store().stats(),
+            "overlays": get_overlay_store().stats(),
+            "similar": SIMILAR[0].stats() if SIMILAR is not None and SIMILAR_PID == os.getpid() else None,
+            "kbbi_root_cache": engine().kbbi_root.cache_info()._asdict(),
+            "threads": thread_status(),
+            "dict": dict_status()
+        }
+    if op == "reload":
+        return {"id": rid, "ok": True, "pid": os.getpid(), "reloaded": reload_now(), "dict": dict_status()}
+    if op == "session":
+        if not req.get("session"):
+            return {"id": rid, "ok": False, "error": "session wajib diisi"}
+        with use_overlay(overlay_for(req.get("school"))):
+            res, info = evaluate_session(
+                req["session"], req.get("type", "informatif"), req.get("text", ""), profile=want_profile(req.get("profile"))
+            )
+            cleaned = norm_space(req.get("text", ""))
+            if truthy(req.get("spell_fix")):
+                res = apply_spell_fix(res, cleaned)
+        res = expand_result(res, cleaned, truthy(req.get("excerpts")), truthy(req.get("fix_text")))
+        res = select_fields(res, parse_fields(req.get("fields")))
+        return {"id": rid, "ok": True, "result": res, "session": info}
+    if op == "session_close":
+        return {"id": rid, "ok": True, "closed": get_session_store().close(str(req.get("session", "")))}
+    if op == "memory":
+        return {"id": rid, "ok": True, "pid": os.getpid(), **memory_report()}
+    if op != "evaluate":
+        return {"id": rid, "ok": False, "error": f"op tidak dikenal: {op}"}
+    # timing=True: sertakan catatan waktu (untuk metrik di sisi Node) tanpa mengubah hasil
+    timer = StageTimer() if req.get("timing") else None
+    res = evaluate_request(req, timer=timer)
+    resp = {"id": rid, "ok": True, "result": res}
+    if timer is not None:
+        resp["timing"] = timer.to_dict()
+        resp["cached"] = "cache_get" in timer.stages and "cache_put" not in timer.stages  # evaluasi tidak dijalankan
+    return resp
+
+def handle_worker_line(raw):
+    """Satu request JSON (str/bytes) -> dict response; error apa pun jadi response ok=False."""
+    rid = None
+    try:
+        req = json.loads(raw)
+        if not isinstance(req, dict):
+            raise ValueError("request harus objek JSON")
+        rid = req.get("id")
+        apply_reload()
+        with pinned():
+            return handle_worker_request(req)
+    except Exception as e:
+        resp = {"id": rid, "ok": False, "error": str(e) or e.__class__.__name__}
+        if getattr(e, "code", None):
+            resp["code"], resp["status"] = e.code, getattr(e, "status", 500)  # mis. OverlayNotFound -> 404
+        return resp
+
+def serve_worker(inp=None, out=None):
+    # 1 baris JSON per request -> 1 baris JSON per response (ditandai "id").
+    # Kamus KBBI & EYD cukup dimuat sekali saat import, bukan per request.
+    inp = inp or sys.stdin
+    out = out or sys.stdout
+    start_watcher()
+    while True:
+        line = inp.readline()
+        if not line:
+            break
+        ln = line.strip()
+        if not ln:
+            continue
+        resp = handle_worker_line(ln)
+        out.write(json.dumps(resp, ensure_ascii=False) + "\n")
+        out.flush()
+
+# =========================================================
+# SERVER PRE-FORK (Unix socket; kamus dimuat sekali di master, dibagi copy-on-write ke worker)
+# =========================================================
+# Frame request/response: panjang (u32 big-endian) + JSON UTF-8, isi sama dengan mode --worker.
+# Satu koneksi dilayani satu worker sampai ditutup, jadi jumlah koneksi klien <= jumlah worker.
+FRAME = struct.Struct(">I")
+MAX_FRAME = 64 * 1024 * 1024
+SERVE_MASTER = None  # pid master, diisi di proses worker --serve (untuk laporan memori)
+
+PREWARM_TEXT = (
+    "Judul Liburan\n\nKemarin pagi saya pergi ke rumah nenek di desa, lalu kami bermain. "
+    "Apakah kamu ikut? Ayo berangkat sekarang! Karena itu, kami sangat senang.\n\n"
+    "Akhirnya kami pulang dan makan bersama. Menurut saya liburan itu menyenangkan."
+)
+
+def prewarm():
+    # bangun semua yang dibuat malas (regex EYD, automaton, index saran ejaan, versi kamus, regex
+    # di cache modul re) sebelum fork, supaya worker berbagi halaman yang sama, bukan membangun ulang
+    dict_version()
+    get_spell_index()
+    engine().smash_model()
+    for t in sorted(VALID_TYPES):
+        evaluate(t, PREWARM_TEXT)
+
+def proc_memory(pid: int):
+    """Memori proses (KiB) dari /proc: rss, pss (bagian adil dari halaman bersama), shared, private."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for ln in f:
+                k, _, v = ln.partition(":")
+                if k in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    fields[k] = int(v.split()[0])
+    except (OSError, ValueError, IndexError):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for ln in f:
+                    if ln.startswith("VmRSS:"):
+                        return {"pid": pid, "rss_kib": int(ln.split()[1])}
+        except OSError:
+            pass
+        return {"pid": pid}
+    return {
+        "pid": pid,
+        "rss_kib": fields.get("Rss", 0),
+        "pss_kib": fields.get("Pss", 0),
+        "shared_kib": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_kib": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+def child_pids(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(x) for x in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+def memory_report():
+    """Memori proses ini; di mode --serve juga master + semua worker (bandingkan total rss vs pss)."""
+    rep = {"memory": proc_memory(os.getpid())}
+    if SERVE_MASTER is not None:
+        procs = [proc_memory(SERVE_MASTER)] + [proc_memory(p) for p in child_pids(SERVE_MASTER)]
+        rep["master"] = procs[0]
+        rep["workers"] = procs[1:]
+        rep["total_rss_kib"] = sum(p.get("rss_kib", 0) for p in procs)
+        rep["total_pss_kib"] = sum(p.get("pss_kib", 0) for p in procs)
+    return rep
+
+def read_frame(rfile):
+    """Isi satu frame (bytes), atau None kalau koneksi ditutup / frame tidak valid."""
+    head = rfile.read(FRAME.size)
+    if len(head) < FRAME.size:
+        return None
+    (n,) = FRAME.unpack(head)
+    body = rfile.read(n) if n <= MAX_FRAME else b""
+    if len(body) < n or not n:
+        return None
+    return body
+
+def serve_socket_child(srv, max_requests: int):
+    import signal
+    global SERVE_MASTER
+    SERVE_MASTER = os.getppid()
+    state = {"busy": False, "stop": False}
+
+    def on_term(signum, frame):
+        # berhenti halus: request yang sedang dinilai diselesaikan dulu
+        state["stop"] = True
+        if not state["busy"]:
+            os._exit(0)
+
+    signal.signal(signal.SIGTERM, on_term)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C diurus master
+    start_watcher()
+    served = 0
+    while not state["stop"]:
+        conn, _ = srv.accept()
+        with conn, conn.makefile("rb") as rfile:
+            while not state["stop"]:
+                body = read_frame(rfile)
+                if body is None:
+                    break
+                state["busy"] = True
+                try:
+                    resp = handle_worker_line(body)
+                    served += 1
+                    if max_requests and served >= max_requests:
+                        # daur ulang: klien menyambung ulang, master menjalankan worker baru
+                        resp["recycle"] = True
+                        state["stop"] = True
+                    data = json.dumps(resp, ensure_ascii=False).encode("utf-8")
+                    conn.sendall(FRAME.pack(len(data)) + data)
+                except OSError:
+                    break
+                finally:
+                    state["busy"] = False
+    os._exit(0)
+
+def serve_socket(path: str, workers: int = 0, max_requests: int = 0, exit_with_parent: bool = False):
+    import gc, signal, socket
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    prewarm()
+    # objek hasil muat dibekukan: GC di worker tidak menulis header objek lama, jadi halamannya
+    # tetap dibagi copy-on-write (lihat total pss vs rss di op "memory")
+    gc.collect()
+    gc.freeze()
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(128)
+
+    children, parent, master = {}, os.getppid(), os.getpid()
+    stopping = False
+    # master tidak memakai thread (fork + thread tidak akur): kamus dicek di putaran waitpid,
+    # supaya worker pengganti langsung mewarisi versi baru. Worker memantau sendiri.
+    global WATCHER
+    WATCHER = DictWatcher(RELOAD_INTERVAL)
+    next_check = time.time() + RELOAD_INTERVAL
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve_socket_child(srv, max_requests)
+            finally:
+                os._exit(0)
+        children[pid] = time.time()
+
+    def on_stop(signum=None, frame=None):
+        nonlocal stopping
+        if os.getpid() != master:
+            os._exit(0)  # sinyal tiba di worker baru sebelum handler-nya sendiri terpasang
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, on_stop)
+    signal.signal(signal.SIGINT, on_stop)
+    for _ in range(workers):
+        spawn()
+    sys.stderr.write(f"poem_eval --serve {path}: {workers} worker, master pid {os.getpid()}\n")
+    sys.stderr.flush()
+
+    while children:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if exit_with_parent and not stopping and os.getppid() != parent:
+                on_stop()  # proses induk (mis. app.js) sudah mati
+            if RELOAD_INTERVAL > 0 and time.time() >= next_check and not stopping:
+                WATCHER.check()
+                if apply_reload():
+                    gc.unfreeze()  # versi lama boleh dibuang
+                    prewarm()
+                    gc.collect()
+                    gc.freeze()
+                next_check = time.time() + RELOAD_INTERVAL
+            time.sleep(0.2)
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        if time.time() - started < 1.0:
+            time.sleep(1.0)  # worker langsung mati berulang: jangan fork terus-menerus
+        spawn()  # daur ulang (max_requests) atau worker mati -> ganti
+
+    srv.close()
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+# =========================================================
+# SERVER THREAD (satu proses, satu Evaluator bersama untuk N thread)
+# =========================================================
+# --serve SOCK --threads N: frame & isi sama dengan server pre-fork, tetapi N thread di satu proses
+# yang masing-masing accept() di socket yang sama (satu koneksi = satu thread sampai ditutup).
+# Kamus hanya ada sekali di memori. Di CPython ber-GIL thread bergantian memakai satu core; di build
+# free-threaded (python3.13t) N thread menilai bersamaan di N core. Batas waktu aturan EYD di thread
+# selain thread utama dicek di antara hit (SIGALRM hanya untuk thread utama, lihat regex_guard.py).
+SERVE_THREADS = 0
+SERVE_BUSY = [0]
+SERVE_BUSY_LOCK = threading.Lock()
+
+def thread_status():
+    gil = getattr(sys, "_is_gil_enabled", None)
+    return {"serve_threads": SERVE_THREADS, "busy": SERVE_BUSY[0], "gil": gil() if gil else True}
+
+def serve_thread(srv):
+    while True:
+        try:
+            conn, _ = srv.accept()
+        except OSError:
+            return  # socket server ditutup (berhenti)
+        with conn, conn.makefile("rb") as rfile:
+            while True:
+                body = read_frame(rfile)
+                if body is None:
+                    break
+                with SERVE_BUSY_LOCK:
+                    SERVE_BUSY[0] += 1
+                try:
+                    resp = handle_worker_line(body)
+                    data = json.dumps(resp, ensure_ascii=False).encode("utf-8")
+                    conn.sendall(FRAME.pack(len(data)) + data)
+                except OSError:
+                    break
+                finally:
+                    with SERVE_BUSY_LOCK:
+                        SERVE_BUSY[0] -= 1
+
+def serve_threads(path: str, threads: int = 0, exit_with_parent: bool = False):
+    import signal, socket
+    global SERVE_THREADS
+    SERVE_THREADS = threads if threads > 0 else (os.cpu_count() or 1)
+    prewarm()
+    start_watcher()  # ENGINE baru dipasang oleh thread yang pertama melihatnya (apply_reload)
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(128)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    for i in range(SERVE_THREADS):
+        threading.Thread(target=serve_thread, args=(srv,), name=f"eval-{i}", daemon=True).start()
+    sys.stderr.write(f"poem_eval --serve {path}: {SERVE_THREADS} thread, pid {os.getpid()}, gil {thread_status()['gil']}\n")
+    sys.stderr.flush()
+
+    parent = os.getppid()
+    while not stop.wait(0.2):
+        if exit_with_parent and os.getppid() != parent:
+            break  # proses induk (mis. app.js) sudah mati
+
+    # berhenti halus: tidak menerima koneksi baru, request yang sedang dinilai diselesaikan dulu
+    srv.close()
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    deadline = time.time() + 30
+    while SERVE_BUSY[0] and time.time() < deadline:
+        time.sleep(0.05)
+
+def socket_request(path: str, req: dict):
+    """Klien kecil untuk server --serve (dipakai --serve-stats)."""
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(path)
+        data = json.dumps(req, ensure_ascii=False).encode("utf-8")
+        conn.sendall(FRAME.pack(len(data)) + data)
+        with conn.makefile("rb") as rfile:
+            (n,) = FRAME.unpack(rfile.read(FRAME.size))
+            return json.loads(rfile.read(n))
+
+# =========================================================
+# BATCH MODE (satu kelas sekaligus, paralel per core)
+# =========================================================
+def read_batch_items(raw: str):
+    """JSON array atau JSONL -> list (index, item). Baris JSONL rusak jadi item error, bukan gagal total."""
+    raw = (raw or "").strip()
+    if not raw:
+        return []
+    if raw.startswith("["):
+        return list(enumerate(json.loads(raw)))
+    items = []
+    for i, ln in enumerate(ln for ln in raw.splitlines() if ln.strip()):
+        try:
+            items.append((i, json.loads(ln)))
+        except ValueError as e:
+            items.append((i, ValueError(f"JSON tidak valid: {e}")))
+    return items
+
+def evaluate_batch_item(job):
+    idx, item = job
+    iid = item.get("id", idx) if isinstance(item, dict) else idx
+    try:
+        if isinstance(item, Exception):
+            raise item
+        if not isinstance(item, dict):
+            raise ValueError("item harus objek {id, type, text}")
+        res = evaluate_request({k: item.get(k) for k in ("type", "text", "fields", "spell_fix", "excerpts", "fix_text", "school") if k in item})
+        if not res.get("ok"):
+            return {"event": "item", "index": idx, "id": iid, "ok": False, "error": res.get("message", "")}
+        return {"event": "item", "index": idx, "id": iid, "ok": True, "result": res}
+    except Exception as e:
+        return {"event": "item", "index": idx, "id": iid, "ok": False, "error": str(e) or e.__class__.__name__}
+
+def batch_summary(items):
+    scores = sorted(it["result"]["score"] for it in items if it.get("ok") and "score" in it["result"])
+    hist = Counter(min(9, sc // 10) for sc in scores)
+    rule_hits, rule_docs = Counter(), Counter()
+    sub_sum, n_ok, n_sub = Counter(), 0, 0
+    for it in items:
+        if not it.get("ok"):
+            continue
+        n_ok += 1
+        bd = it["result"].get("breakdown", {})
+        by_id = bd.get("eyd", {}).get("by_id", {})
+        rule_hits.update(by_id)
+        rule_docs.update(by_id.keys())
+        sub = bd.get("meta", {}).get("subscores")
+        if sub is not None:  # tidak ada kalau item meminta fields tanpa subscores
+            sub_sum.update(sub)
+            n_sub += 1
+
+    n = len(scores)
+    median = 0
+    if n:
+        median = scores[n // 2] if n % 2 else (scores[n // 2 - 1] + scores[n // 2]) / 2
+    return {
+        "event": "summary",
+        "total": len(items),
+        "ok": n_ok,
+        "failed": len(items) - n_ok,
+        "score": {
+            "mean": round(sum(scores) / n, 2) if n else 0,
+            "median": median,
+            "min": scores[0] if n else 0,
+            "max": scores[-1] if n else 0,
+            "histogram": {f"{b*10}-{b*10+9 if b < 9 else 100}": int(hist.get(b, 0)) for b in range(10)},
+        },
+        "subscores_mean": {k: round(v / n_sub, 2) for k, v in sub_sum.items()} if n_sub else {},
+        "eyd_top": [
+            {"id": rid, "hits": int(c), "docs": int(rule_docs[rid])}
+            for rid, c in rule_hits.most_common(10)
+        ],
+    }
+
+def run_batch(raw: str, jobs: int = 0, out=None):
+    out = out or sys.stdout
+    items = read_batch_items(raw)
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    jobs = max(1, min(jobs, len(items)))
+    done = []
+
+    def emit(res):
+        done.append(res)
+        out.write(json.dumps(res, ensure_ascii=False) + "\n")
+        out.flush()
+
+    if jobs == 1:
+        for job in items:
+            emit(evaluate_batch_item(job))
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(processes=jobs) as pool:
+            # urutan hasil = urutan selesai; klien pakai "index"/"id" untuk mencocokkan
+            for res in pool.imap_unordered(evaluate_batch_item, items, chunksize=1):
+                emit(res)
+
+    emit(batch_summary(done))
+
+# =========================================================
+# STREAM MODE (dokumen panjang: diproses per paragraf, memori ~konstan)
+# =========================================================
+# stdin: baris 1 = header JSON {"type": ..., "excerpts"?: true}, sisanya teks mentah.
+# stdout: NDJSON; satu event "progress" per paragraf (counter berjalan + potongan auto-fix),
+# diakhiri event "result" (format sama dengan evaluate(); teks auto-fix dikirim lewat "fix",
+# bukan daftar edit).
+STREAM_WINDOW = 64  # konteks tetangga untuk aturan regex EYD yang menyeberang paragraf
+
+def iter_paragraphs(lines):
+    """Baris mentah -> (pemisah, paragraf), sama dengan get_paragraphs(norm_space(teks utuh)).
+
+    `pemisah` = teks persis di antara paragraf sebelumnya dan paragraf ini ("" untuk yang pertama).
+    """
+    buf, gap, sep, prev_trail = [], [], "", None
+    for line in lines:
+        ln = re.sub(r"[ \t]+", " ", line.rstrip("\n"))
+        if not ln.strip():
+            if buf or prev_trail is not None:
+                gap.append(ln)
+            continue
+        if gap and buf:
+            raw = "\n".join(buf)
+            yield sep, raw.strip()
+            prev_trail = raw[len(raw.rstrip()):]
+            buf = []
+        if not buf:
+            lead = ln[:len(ln) - len(ln.lstrip())]
+            sep = "" if prev_trail is None else re.sub(r"\n{3,}", "\n\n", prev_trail + "\n" + "\n".join(gap) + "\n" + lead)
+            gap = []
+        buf.append(ln)
+    if buf:
+        yield sep, "\n".join(buf).strip()
+
+def first_alpha_token(text: str):
+    for m in TOKEN_RE.finditer(text):
+        if not m.group(0)[0].isdigit():
+            return m.group(0)
+    return None
+
+class StreamContext:
+    """Pengganti AnalysisContext untuk dokumen yang datang per paragraf.
+
+    Hanya menyimpan counter/agregat (bukan teks utuh); atribut yang dibaca scorer sama dengan
+    AnalysisContext sehingga build_result() dipakai apa adanya.
+    """
+
+    def __init__(self, type_key: str, timer=None, excerpts=False):
+        self.type_key = type_key
+        self.timer = timer
+        self.is_poem = type_key == "puisi"
+        # contoh teks EYD dibuat di tempat (teks utuh tidak disimpan): 3 hit pertama tiap aturan per
+        # paragraf cukup untuk umpan balik; semua hit kalau diminta ("excerpts")
+        self.excerpts = excerpts
+        self.examples = 10 if excerpts else 3
+        self.chars = 0
+        self.tokens = 0
+        self.n_words = 0
+        self.word_counts = Counter()
+        self.number_count = 0
+        self.bullet_count = 0
+        self.has_date_place = self.has_email = self.has_time = self.has_subject_line = False
+        self.paragraph_count = 0
+        self.first_paragraph = self.first_line = self.last_line = ""
+        self.line_count = 0
+        self.verse_count, self.verse_end_counts = 0, Counter()
+        self.sentence_count = self.sentence_words = self.short_sentences = self.long_sentences = 0
+        self.phrases = set()
+        self.has_double_space = self.has_blank_run = self.has_weird_symbol = False
+        self.upper_count = self.alpha_count = 0
+        self.alpha_tokens = 0
+        self._weird, self._slang, self._smash, self._nonkbbi = set(), {}, {}, {}
+        self._eyd = {}
+        self.eyd_guard = {}  # aturan EYD yang terpotong anggaran waktu (lihat eyd_rule_hits)
+        # sisa kalimat tanpa tanda akhir: bersambung ke paragraf berikutnya (seperti sentences())
+        self._carry = ""
+        self._carry_back = 0    # awal kalimat sambungan: sekian karakter sebelum akhir teks sejauh ini
+        self._tail = ""         # akhir teks (huruf asli) untuk jendela EYD & tanda baca
+        self._mark_tail = ""    # token terakhir (sebanyak MARKERS.max_words - 1) untuk frasa lintas paragraf
+        self._fix_last = ""
+
+    # --- atribut turunan (sama dengan AnalysisContext)
+    @property
+    def verse_ends(self):
+        return self.verse_count, self.verse_end_counts
+
+    @property
+    def lexical_diversity(self):
+        return len(self.word_counts) / self.n_words if self.n_words else 0.0
+
+    @property
+    def avg_sentence_len(self):
+        return self.sentence_words / self.sentence_count if self.sentence_count else 0.0
+
+    @property
+    def connectors(self):
+        return {c for c in CONNECTORS if c in self.phrases}
+
+    @property
+    def slang(self):
+        return list(self._slang.values())[:10]
+
+    @property
+    def weird_punct(self):
+        return [msg for (_, msg) in WEIRD_PUNCT_CHECKS if msg in self._weird][:8]
+
+    @property
+    def gibberish(self):
+        return list(self._smash.values())[:12], list(self._nonkbbi.values())[:12], self.alpha_tokens
+
+    def count_hits(self, vocab):
+        wc = self.word_counts
+        return sum(wc[x] for x in vocab if x in wc)
+
+    def has_word(self, vocab):
+        wc = self.word_counts
+        return any(x in wc for x in vocab)
+
+    def has_any(self, phrases):
+        # frasa harus terdaftar di MARKERS (hanya itu yang dilacak per paragraf)
+        return any(k in self.phrases for k in phrases)
+
+    def count_any(self, phrases):
+        return sum(1 for k in phrases if k in self.phrases)
+
+    # --- agregasi
+    def _add_sentences(self, counts):
+        for n in counts:
+            self.sentence_count += 1
+            self.sentence_words += n
+            self.short_sentences += n <= 3
+            self.long_sentences += n >= 30
+
+    def _add_eyd(self, hits, offset: int = 0):
+        # span potongan relatif thd awal paragraf -> offset di teks utuh
+        for rule, spans in hits:
+            rid = rule.get("id", "UNKNOWN")
+            cur = self._eyd.setdefault(rid, [])
+            cur.extend((a + offset, b + offset, *ex) for (a, b, *ex) in spans[:10 - len(cur)])
+
+    def add_paragraph(self, sep: str, p: str, after: str = ""):
+        """`after` = teks sesudah paragraf (pemisah + paragraf berikutnya); lebih dari STREAM_WINDOW
+        karakter, atau seluruh sisa dokumen kalau lebih pendek."""
+        piece = self.analyze(sep, p, after)
+        self.merge(piece)
+        n = len(sep)
+        return self._progress(apply_edits(sep + p, [(a + n, b + n, rep) for (a, b, rep) in piece["fix"]]))
+
+    def piece_key(self, sep: str, p: str, after: str = ""):
+        # semua yang dibaca analyze(): paragraf + keadaan sambungan dengan tetangganya.
+        # Kunci sama -> potongan analisis sama (dipakai ulang oleh EvalSession).
+        return (
+            sep, p, self.paragraph_count == 0, self._carry, self._carry_back, self._tail, self._mark_tail, self._fix_last,
+            self.chars > len(self._tail), after[:STREAM_WINDOW], len(after) > STREAM_WINDOW, first_alpha_token(after),
+        )
+
+    # --- keadaan sambungan (dibaca analyze(), diperbarui merge())
+    def seam(self):
+        return (
+            self.paragraph_count, self.chars, self._carry, self._carry_back, self._tail, self._mark_tail, self._fix_last
+        )
+
+    def set_seam(self, state):
+        (self.paragraph_count, self.chars, self._carry, self._carry_back,
+         self._tail, self._mark_tail, self._fix_last) = state
+
+    def _seam_sentences(self, sep: str, p: str):
+        # gabungkan sisa kalimat paragraf sebelumnya, tahan kalimat terakhir yang belum berakhir
+        # (span relatif thd awal paragraf; kalimat sambungan mulai sebelum paragraf -> negatif)
+        ss, spans = sentences(p), sentence_spans(p)
+        if self._carry:
+            ss[0] = self._carry + " " + ss[0]
+            spans[0] = (-len(sep) - self._carry_back, spans[0][1])
+        carry, carry_back = "", 0
+        if p[-1] not in ".!?…":
+            carry = ss.pop()
+            carry_back = len(p) - spans.pop()[0]
+        return ss, spans, carry, carry_back
+
+    def _next_mark_tail(self, sep: str, p: str, spans):
+        k = MARKERS.max_words - 1
+        if not k:
+            return self._mark_tail
+        if len(spans) >= k:
+            return p[spans[-k][1]:]
+        seam = self._mark_tail + sep + p if self._mark_tail else p
+        toks = [m.start() for m in TOKEN_RE.finditer(seam)]
+        return seam[toks[-k]:] if len(toks) >= k else seam
+
+    def advance(self, sep: str, p: str, paragraphs: int = 1):
+        """Keadaan sambungan sesudah paragraf ini tanpa menganalisisnya (murah: pecah kalimat + token).
+
+        Dipakai evaluate_parallel() untuk menyiapkan keadaan tiap paragraf sebelum dianalisis di proses
+        lain. _fix_last diisi huruf terakhir paragraf asli: auto-fix tidak pernah mengubah apakah (dan
+        tanda baca apa yang) mengakhiri paragraf, dan hanya itu yang dibaca _fix_chunk().
+        """
+        if p[-1] in ".!?…":
+            carry, carry_back = "", 0
+        else:
+            _, _, carry, carry_back = self._seam_sentences(sep, p)
+        # token terakhir saja (token tidak memuat spasi: pindai dari spasi di dekat akhir)
+        k = MARKERS.max_words - 1
+        pos = max(0, p.rfind(" ", 0, max(0, len(p) - 256)))
+        spans = [(None, m.start(), m.end()) for m in TOKEN_RE.finditer(p, pos)]
+        if len(spans) < k and pos:
+            spans = [(None, m.start(), m.end()) for m in TOKEN_RE.finditer(p)]
+        self._mark_tail = self._next_mark_tail(sep, p, spans)
+        self._carry, self._carry_back = carry, carry_back
+        self._tail = (self._tail + sep + p)[-STREAM_WINDOW:]
+        self._fix_last = p[-1:]
+        self.paragraph_count += paragraphs
+        self.chars += len(sep) + len(p)
+
+    def analyze(self, sep: str, p: str, after: str = "", paragraphs: int = 1):
+        """Analisis satu paragraf terhadap keadaan sambungan saat ini, tanpa mengubah agregat.
+
+        paragraphs > 1: p = beberapa paragraf berurutan beserta pemisahnya (evaluate_parallel).
+        """
+        first = self.paragraph_count == 0
+
+        ss, spans, carry, carry_back = self._seam_sentences(sep, p)
+        ctx = AnalysisContext(p, sentences=ss, sentence_spans=spans)
+
+        # frasa/tanda baca bisa menyeberang pemisah paragraf -> cek juga sambungannya
+        phrases = set(ctx.markers)
+        k = MARKERS.max_words - 1
+        spans = ctx.token_spans
+        if k and self._mark_tail:
+            head = p[:spans[k - 1][2]] if len(spans) >= k else p
+            phrases.update(MARKERS.find(self._mark_tail + sep + head))
+        mark_tail = self._next_mark_tail(sep, p, spans)
+        weird = set(ctx.weird_punct)
+        weird.update(find_weird_punct(self._tail[-3:] + sep + p[:3]) if sep else [])
+
+        with stage(self.timer, "find_slang"):
+            slang = find_slang(p, ctx=ctx, limit=None)
+        with stage(self.timer, "detect_gibberish_and_non_kbbi"):
+            smash, nonkbbi, n_alpha = detect_gibberish_and_non_kbbi(
+                p, ctx=ctx, prev_char=self._tail[-1:], next_token=first_alpha_token(after), limit=None
+            )
+
+        # EYD: regex di jendela (ekor teks sebelumnya + paragraf + awal teks sesudahnya)
+        head = self._tail + sep
+        wtext = head + p + after[:STREAM_WINDOW]
+        start_abs = self.chars + len(sep) - len(head)
+        window = (wtext, len(head), len(head) + len(p), start_abs > 0, len(after) > STREAM_WINDOW)
+        guard = {}
+        with stage(self.timer, "apply_eyd_rules"):
+            eyd = eyd_rule_hits(
+                p, self.type_key, ctx=ctx, window=window, timer=self.timer, guard=guard, examples=self.examples
+            )
+
+        with stage(self.timer, "auto_fix_edits"):
+            fix, fix_last = self._fix_chunk(sep, p, first)
+        n, ends = verse_ends(ctx.lines[1:] if first else ctx.lines)
+        return {
+            "first": first,
+            "paragraph": p if paragraphs == 1 else ctx.first_paragraph,
+            "paragraphs": paragraphs,
+            "first_line": ctx.first_line,
+            "last_line": ctx.last_line,
+            "sentence_counts": ctx.sentence_word_counts,
+            "tokens": len(ctx.tokens),
+            "n_words": ctx.n_words,
+            "word_counts": ctx.word_counts,
+            "number_count": ctx.number_count,
+            "bullet_count": ctx.bullet_count,
+            "flags": {
+                "has_date_place": ctx.has_date_place,
+                "has_email": ctx.has_email,
+                "has_time": ctx.has_time,
+                "has_subject_line": ctx.has_subject_line,
+                "has_double_space": ctx.has_double_space or bool(re.search(r"[ \t]{2,}", sep)),
+                "has_blank_run": ctx.has_blank_run or bool(re.search(r"\n{3,}", sep)),
+                "has_weird_symbol": ctx.has_weird_symbol,
+            },
+            "lines": ctx.line_count + (sep.count("\n") - 1 if sep else 0),
+            "verses": (n, ends),
+            "phrases": phrases,
+            "weird": weird,
+            "upper_count": ctx.upper_count,
+            "alpha_count": ctx.alpha_count,
+            "slang": slang,
+            "smash": smash,
+            "nonkbbi": nonkbbi,
+            "alpha_tokens": n_alpha,
+            "eyd": eyd,
+            "eyd_guard": guard,
+            "fix": fix,
+            "sep_len": len(sep),
+            # keadaan sambungan untuk paragraf berikutnya
+            "state": (carry, carry_back, (self._tail + sep + p)[-STREAM_WINDOW:], mark_tail, fix_last, len(sep) + len(p)),
+        }
+
+    def merge(self, piece: dict):
+        """Tambahkan hasil analyze() ke agregat (murah; potongan tidak diubah)."""
+        self._add_sentences(piece["sentence_counts"])
+        self.paragraph_count += piece["paragraphs"]
+        self.tokens += piece["tokens"]
+        self.n_words += piece["n_words"]
+        self.word_counts.update(piece["word_counts"])
+        self.number_count += piece["number_count"]
+        self.bullet_count += piece["bullet_count"]
+        for flag, val in piece["flags"].items():
+            if val:
+                setattr(self, flag, True)
+        if piece["first"]:
+            self.first_paragraph, self.first_line = piece["paragraph"], piece["first_line"]
+        self.last_line = piece["last_line"]
+        self.line_count += piece["lines"]
+        n, ends = piece["verses"]
+        self.verse_count += n
+        self.verse_end_counts.update(ends)
+        self.phrases.update(piece["phrases"])
+        self._weird.update(piece["weird"])
+        self.upper_count += piece["upper_count"]
+        self.alpha_count += piece["alpha_count"]
+        for w in piece["slang"]:
+            self._slang.setdefault(w.lower(), w)
+        self.alpha_tokens += piece["alpha_tokens"]
+        for it in piece["smash"]:
+            self._smash.setdefault(it[0].lower(), it)
+        for w in piece["nonkbbi"]:
+            self._nonkbbi.setdefault(w.lower(), w)
+        self._add_eyd(piece["eyd"], self.chars + piece["sep_len"])
+        self.merge_guard(piece["eyd_guard"])
+        self._carry, self._carry_back, self._tail, self._mark_tail, self._fix_last, n_chars = piece["state"]
+        self.chars += n_chars
+
+    def merge_guard(self, guard: dict):
+        for k, ids in guard.items():
+            cur = self.eyd_guard.setdefault(k, [])
+            cur.extend(i for i in ids if i not in cur)
+
+    def _fix_chunk(self, sep: str, p: str, first: bool):
+        # sama dengan auto_fix_edits(teks utuh): pemisah dipertahankan, kecuali kapital setelah
+        # tanda akhir kalimat ("... .\n\nlalu" -> "... . Lalu") dan spasi sebelum tanda baca.
+        # -> (edit relatif thd awal paragraf, pemisah = offset negatif; karakter terakhir hasil perbaikan)
+        glued = not first and p[0] in ",.!?…;:"  # menempel ke baris sebelumnya
+        edits = auto_fix_edits(p, is_poem=self.is_poem, cap_first=first or (self.is_poem and not glued))
+        fixed = apply_edits(p, edits)
+        if first:
+            joiner = ""
+        elif glued:
+            # spasi sebelum tanda baca dihapus; tanda baca beruntun tetap dipisah spasi
+            joiner = " " if self._fix_last and self._fix_last in ",.!?;:" else ""
+        elif self.is_poem:
+            joiner = "\n" * sep.count("\n")
+        elif self._fix_last and self._fix_last in ".!?…" and re.match(r"[a-zà-öø-ÿ]", fixed):
+            joiner = " "
+            if edits and edits[0][0] == 0 and edits[0][2]:
+                a, b, rep = edits[0]
+                edits[0] = (a, b, rep[0].upper() + rep[1:])
+            else:
+                edits.insert(0, (0, 1, p[0].upper()))
+        else:
+            joiner = sep
+        if joiner != sep:
+            edits.insert(0, (-len(sep), 0, joiner))
+        return edits, fixed[-1:] or self._fix_last
 
-def main():
+    def _progress(self, fix: str):
+        return {
+            "event": "progress",
+            "paragraphs": self.paragraph_count,
+            "chars": self.chars,
+            "tokens": self.tokens,
+            "words": self.n_words,
+            "unique_words": len(self.word_counts),
+            "lexical_diversity": round(self.lexical_diversity, 4),
+            "sentences": self.sentence_count + (1 if self._carry else 0),
+            "avg_sentence_len": round(self.avg_sentence_len, 2),
+            "slang": len(self._slang),
+            "non_kbbi": len(self._nonkbbi),
+            "smash": len(self._smash),
+            "eyd_hits": sum(len(v) for v in self._eyd.values()),
+            "fix": fix,
+        }
+
+    def finish(self, text: str = "", need=ALL_ANALYSES):
+        """Hasil akhir dari agregat. text = teks utuh kalau ada (evaluate_parallel): contoh pelanggaran
+        EYD di umpan balik dibuat darinya, sama dengan evaluate()."""
+        if self._carry:
+            ctx = AnalysisContext("", sentences=[self._carry], sentence_spans=[(self.chars - self._carry_back, self.chars)])
+            self._add_sentences(ctx.sentence_word_counts)
+            guard = {}
+            self._add_eyd(eyd_rule_hits("", self.type_key, ctx=ctx, timer=self.timer, guard=guard, examples=self.examples))
+            self.merge_guard(guard)
+            self._carry = ""
+        eng = engine()
+        plan = eng.plan or EydRulePlan(eng.rules)
+        hits = [(e["rule"], self._eyd[e["id"]]) for e in plan.entries if self._eyd.get(e["id"])]
+        report = eyd_report(hits, self.eyd_guard) if "eyd" in need else {}
+        res = build_result(self.type_key, text, self, report, [], timer=self.timer, need=need)
+        if self.excerpts:
+            res["breakdown"]["eyd"]["top_violations"] = report["violations"][:8]
+        res["auto_fix"] = {"streamed": True}
+        attach_timing(res, self.timer)
+        return res
+
+def run_stream(inp=None, out=None):
+    inp = inp or io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace", newline=None)
+    out = out or sys.stdout
+
+    def emit(ev):
+        out.write(json.dumps(ev, ensure_ascii=False) + "\n")
+        out.flush()
+
+    header = json.loads(inp.readline() or "{}")
+    # satu proses per dokumen: overlay sekolah cukup dipasang sekali untuk sisa proses
+    ACTIVE_ENGINE.set(ENGINE)
+    try:
+        ACTIVE_OVERLAY.set(overlay_for(header.get("school")))
+    except (LookupError, ValueError) as e:
+        emit({"event": "error", "ok": False, "message": str(e), "code": getattr(e, "code", "BAD_REQUEST")})
+        return
+    type_key = str(header.get("type", "") or "").strip()
+    # fields hanya memangkas hasil akhir; tiap paragraf tetap dianalisis lengkap
+    fields = parse_fields(header.get("fields"))
+    if type_key not in VALID_TYPES:
+        type_key = "informatif"
+
+    sctx = StreamContext(
+        type_key, timer=StageTimer() if want_profile(header.get("profile")) else None, excerpts=truthy(header.get("excerpts"))
+    )
+    queue = deque()
+    hasher = MinHasher() if truthy(header.get("similar")) else None
+
+    def after_front():
+        return "".join(s + p for (s, p) in itertools.islice(queue, 1, None))
+
+    # paragraf diproses begitu teks sesudahnya cukup untuk jendela konteks (atau input habis)
+    for item in iter_paragraphs(inp):
+        queue.append(item)
+        while len(queue) > 1:
+            after = after_front()
+            if len(after) <= STREAM_WINDOW:
+                break
+            if hasher is not None:
+                hasher.update(tokenize_words(queue[0][1]))
+            emit(sctx.add_paragraph(*queue.popleft(), after=after))
+    if not queue:
+        emit({"event": "result", "result": evaluate(type_key, "", fields=fields)})
+        return
+    while queue:
+        after = after_front()
+        if hasher is not None:
+            hasher.update(tokenize_words(queue[0][1]))
+        emit(sctx.add_paragraph(*queue.popleft(), after=after))
+    res = select_fields(sctx.finish(), fields)
+    if hasher is not None:
+        res = attach_similar(res, similar_submissions(hasher, type_key, header.get("school"), header.get("submission")))
+    emit({"event": "result", "result": res})
+
+# =========================================================
+# SESI INKREMENTAL (umpan balik saat mengetik: hanya paragraf yang berubah dianalisis ulang)
+# =========================================================
+class EvalSession:
+    """Potongan analisis per paragraf (StreamContext.analyze) dari evaluasi terakhir satu editor.
+
+    Potongan dipakai ulang selama paragraf & sambungannya dengan tetangga tidak berubah; skor rubrik
+    selalu diagregasi ulang dari potongan dan contoh pelanggaran EYD dibuat dari teks utuh yang disusun
+    ulang, jadi hasilnya sama dengan evaluate() atas teks utuh (dicek oleh check_modes.py).
+    """
+
+    def __init__(self, type_key: str):
+        self.type_key = type_key
+        self.pieces = {}
+        self.version = None
+        self.touched = time.time()
+        self.evaluations = 0
+        self.lock = threading.Lock()  # satu editor, request berurutan; --threads: jangan sampai bersamaan
+
+    def evaluate(self, text: str, timer=None):
+        self.touched = time.time()
+        self.evaluations += 1
+        ov = ACTIVE_OVERLAY.get()
+        version = (dict_version(), ov.key if ov is not None else None)
+        if self.version != version:
+            self.pieces = {}  # kamus / aturan EYD / overlay sekolah berubah: potongan lama tidak berlaku
+            self.version = version
+        paras = list(iter_paragraphs(io.StringIO(text or "", newline=None)))
+        if not paras:
+            self.pieces = {}
+            return evaluate(self.type_key, "", timer=timer), {"paragraphs": 0, "reused": 0}
+
+        sctx = StreamContext(self.type_key, timer=timer)
+        sctx.examples = 0  # contoh teks EYD dari teks utuh (finish), bukan per paragraf
+        pieces, edits, reused = {}, [], 0
+        for i, (sep, p) in enumerate(paras):
+            after, j = "", i + 1
+            while j < len(paras) and len(after) <= STREAM_WINDOW:
+                after += paras[j][0] + paras[j][1]
+                j += 1
+            key = sctx.piece_key(sep, p, after)
+            piece = self.pieces.get(key)
+            if piece is None or piece["eyd_guard"]:  # aturan EYD terpotong waktu: analisis ulang
+                piece = sctx.analyze(sep, p, after)
+            else:
+                reused += 1
+            pieces[key] = piece
+            n = sctx.chars + len(sep)
+            edits.extend([a + n, b + n, rep] for (a, b, rep) in piece["fix"])
+            sctx.merge(piece)
+        # hanya potongan teks terakhir yang disimpan -> memori sebanding panjang teks
+        self.pieces = pieces
+        res = sctx.finish("".join(sep + p for sep, p in paras))
+        res["auto_fix"] = {"edits": edits}
+        return res, {"paragraphs": len(paras), "reused": reused}
+
+class SessionStore:
+    """Sesi per editor: maks `max_sessions` (LRU), dibuang setelah `ttl` detik tidak dipakai."""
+
+    def __init__(self, max_sessions: int = 64, ttl: float = 900.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = self.evicted = self.expired = 0
+
+    def _expire(self):
+        now = time.time()
+        while self._items:
+            sid, s = next(iter(self._items.items()))
+            if now - s.touched < self.ttl:
+                break
+            del self._items[sid]
+            self.expired += 1
+
+    def get(self, sid: str, type_key: str) -> EvalSession:
+        with self._lock:
+            self._expire()
+            s = self._items.get(sid)
+            if s is None or s.type_key != type_key:
+                s = self._items[sid] = EvalSession(type_key)
+                self.created += 1
+            self._items.move_to_end(sid)
+            while len(self._items) > self.max_sessions:
+                self._items.popitem(last=False)
+                self.evicted += 1
+            return s
+
+    def close(self, sid: str) -> bool:
+        with self._lock:
+            return self._items.pop(sid, None) is not None
+
+    def stats(self):
+        return {
+            "size": len(self._items),
+            "max_sessions": self.max_sessions,
+            "ttl": self.ttl,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+SESSIONS = None
+
+def get_session_store():
+    global SESSIONS
+    if SESSIONS is None:
+        def num(name, default, cast=int):
+            try:
+                return cast(os.environ.get(name, "") or default)
+            except ValueError:
+                return default
+        with LAZY_LOCK:
+            if SESSIONS is None:
+                SESSIONS = SessionStore(num("EVAL_SESSION_MAX", 64), num("EVAL_SESSION_TTL", 900.0, float))
+    return SESSIONS
+
+def evaluate_session(sid: str, type_key: str, text: str, profile=False):
+    type_key = (type_key or "").strip()
+    if type_key not in VALID_TYPES:
+        type_key = "informatif"
+    session = get_session_store().get(str(sid), type_key)
+    timer = StageTimer() if profile else None
+    with pinned(), session.lock:
+        res, info = session.evaluate(text, timer=timer)
+        info["evaluations"] = session.evaluations
+    return attach_timing(res, timer), info
+
+# =========================================================
+# EVALUASI PARALEL PER PARAGRAF (satu dokumen besar dibagi ke beberapa core)
+# =========================================================
+# Opt-in ("parallel"): paragraf dianalisis di pool proses (StreamContext.analyze: token, slang,
+# gibberish/KBBI, aturan EYD, kalimat, auto-fix), lalu potongannya digabung berurutan di proses ini.
+# Keadaan sambungan antarparagraf (kalimat yang bersambung, frasa lintas paragraf, jendela EYD)
+# disiapkan lebih dulu dengan StreamContext.advance(); skor rubrik tetap dihitung sekali atas agregat.
+# Hasil sama dengan evaluate(), termasuk span EYD dan teks hasil auto-fix.
+def _env_int(name: str, default: int) -> int:
+    try:
+        n = int(os.environ.get(name, "") or default)
+    except ValueError:
+        return default
+    return n if n > 0 else default
+
+PARALLEL_JOBS = _env_int("EVAL_PARALLEL_JOBS", os.cpu_count() or 1)
+PARALLEL_MIN_CHARS = _env_int("EVAL_PARALLEL_MIN_CHARS", 8000)  # di bawah ini biaya kirim-terima > hematnya
+PARALLEL_POOL = None
+PARALLEL_POOL_VERSION = None
+
+def get_parallel_pool():
+    """Pool proses (fork: kamus yang sudah dimuat ikut terbagi); dibuat ulang kalau kamus/aturan dimuat ulang."""
+    global PARALLEL_POOL, PARALLEL_POOL_VERSION
+    with LAZY_LOCK:
+        if PARALLEL_POOL is not None and PARALLEL_POOL_VERSION != dict_version():
+            PARALLEL_POOL.terminate()
+            PARALLEL_POOL = None
+        if PARALLEL_POOL is None:
+            import multiprocessing
+            PARALLEL_POOL = multiprocessing.Pool(processes=PARALLEL_JOBS)
+            PARALLEL_POOL_VERSION = dict_version()
+        return PARALLEL_POOL
+
+def _in_pool_worker() -> bool:
+    # proses pool (--batch, antrean job) tidak boleh membuat pool sendiri
+    import multiprocessing
+    return multiprocessing.current_process().daemon
+
+def analyze_block(job):
+    """(type, overlay, keadaan sambungan, pemisah, blok paragraf, jumlah paragraf, teks sesudahnya) -> potongan
+    StreamContext.analyze() untuk blok itu."""
+    type_key, overlay, state, sep, block, n, after = job
+    sctx = StreamContext(type_key)
+    sctx.examples = 0  # contoh teks EYD dibuat dari teks utuh (hit_excerpt), seperti evaluate()
+    sctx.set_seam(state)
+    with use_overlay(overlay):
+        return sctx.analyze(sep, block, after, paragraphs=n)
+
+def paragraph_blocks(paras, n_blocks: int):
+    """(pemisah, paragraf) -> maks n_blocks blok paragraf berurutan dengan jumlah karakter kira-kira sama:
+    [(pemisah, teks blok, jumlah paragraf)]."""
+    total = sum(len(sep) + len(p) for sep, p in paras)
+    blocks, cur, size = [], [], 0
+    for sep, p in paras:
+        cur.append((sep, p))
+        size += len(sep) + len(p)
+        if size >= total * (len(blocks) + 1) / n_blocks and len(blocks) < n_blocks - 1:
+            blocks.append(cur)
+            cur = []
+    if cur:
+        blocks.append(cur)
+    return [(b[0][0], b[0][1] + "".join(sep + p for sep, p in b[1:]), len(b)) for b in blocks]
+
+def evaluate_parallel(type_key: str, text: str, timer=None, fields=None):
+    with pinned():
+        return _evaluate_parallel(type_key, text, timer, fields)
+
+def _evaluate_parallel(type_key: str, text: str, timer=None, fields=None):
+    type_key = (type_key or "").strip()
+    with stage(timer, "norm_space"):
+        cleaned = norm_space(text or "")
+    if PARALLEL_JOBS < 2 or len(cleaned) < PARALLEL_MIN_CHARS or _in_pool_worker():
+        return evaluate(type_key, cleaned, timer=timer, fields=fields)
+    paras = list(iter_paragraphs(io.StringIO(cleaned, newline=None)))
+    if len(paras) < 2:
+        return evaluate(type_key, cleaned, timer=timer, fields=fields)
+    if type_key not in VALID_TYPES:
+        type_key = "informatif"
+
+    # blok paragraf (beberapa per proses untuk pemerataan) + keadaan sambungan tiap blok (berurutan, murah)
+    sctx = StreamContext(type_key, timer=timer)
+    jobs, i, overlay = [], 0, ACTIVE_OVERLAY.get()
+    with stage(timer, "parallel_seams"):
+        for sep, block, n in paragraph_blocks(paras, PARALLEL_JOBS * 2):
+            i += n
+            after, j = "", i  # paragraf utuh sesudah blok, seperti EvalSession
+            while j < len(paras) and len(after) <= STREAM_WINDOW:
+                after += paras[j][0] + paras[j][1]
+                j += 1
+            jobs.append((type_key, overlay, sctx.seam(), sep, block, n, after))
+            sctx.advance(sep, block, n)
+
+    with stage(timer, "parallel_analyze"):
+        pieces = get_parallel_pool().map(analyze_block, jobs, chunksize=1)
+
+    # fields hanya memangkas hasil akhir; tiap blok tetap dianalisis lengkap
+    need = analyses_for(fields)
+    sctx = StreamContext(type_key, timer=timer)
+    sctx.examples = 0
+    edits = []
+    with stage(timer, "parallel_merge"):
+        for piece in pieces:
+            n = sctx.chars + piece["sep_len"]
+            edits.extend([a + n, b + n, rep] for (a, b, rep) in piece["fix"])
+            sctx.merge(piece)
+    res = sctx.finish(cleaned, need=need)
+    res["auto_fix"] = {"edits": edits if "auto_fix" in need else []}
+    return select_fields(res, fields)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Penilai teks (stdin JSON -> stdout JSON).")
+    ap.add_argument("--worker", action="store_true", help="mode worker: NDJSON request/response lewat stdin/stdout")
+    ap.add_argument("--batch", action="store_true", help="nilai banyak teks (JSON array / JSONL), hasil NDJSON per item")
+    ap.add_argument("--jobs", type=int, default=0, help="jumlah proses untuk --batch (default: jumlah core)")
+    ap.add_argument("--stream", action="store_true", help="teks panjang per paragraf: header JSON lalu teks mentah, event NDJSON")
+    ap.add_argument("--serve", metavar="SOCK", default="", help="server pre-fork di Unix socket SOCK (frame panjang + JSON)")
+    ap.add_argument("--workers", type=int, default=0, help="jumlah worker untuk --serve (default: jumlah core)")
+    ap.add_argument("--threads", type=int, default=0, help="--serve dengan N thread di satu proses, bukan pre-fork")
+    ap.add_argument("--max-requests", type=int, default=0, help="--serve: worker didaur ulang setelah K request (0 = tidak)")
+    ap.add_argument("--exit-with-parent", action="store_true", help="--serve: berhenti kalau proses induk mati")
+    ap.add_argument("--serve-stats", metavar="SOCK", default="", help="cetak memori master + tiap worker dari server --serve")
+    ap.add_argument("--check-morph", action="store_true", help="cek contoh imbuhan (MORPH_ACCEPT / MORPH_REJECT) terhadap KBBI")
+    args = ap.parse_args(argv)
+
+    if args.serve and args.threads:
+        serve_threads(args.serve, args.threads, args.exit_with_parent)
+        return
+    if args.serve:
+        serve_socket(args.serve, args.workers, args.max_requests, args.exit_with_parent)
+        return
+    if args.serve_stats:
+        sys.stdout.write(json.dumps(socket_request(args.serve_stats, {"op": "memory"}), ensure_ascii=False, indent=2) + "\n")
+        return
+    if args.check_morph:
+        wrong = check_morphology()
+        for w, want in wrong:
+            print(f"{w}: seharusnya {'diterima' if want else 'ditandai tidak terverifikasi KBBI'}")
+        print(f"morfologi: {len(MORPH_ACCEPT) + len(MORPH_REJECT) - len(wrong)} contoh benar, {len(wrong)} salah")
+        sys.exit(1 if wrong else 0)
+
+    if args.worker:
+        serve_worker()
+        return
+    if args.batch:
+        run_batch(sys.stdin.read(), jobs=args.jobs)
+        return
+    if args.stream:
+        run_stream()
+        return
     payload = json.loads(sys.stdin.read() or "{}")
-    type_key = payload.get("type", "informatif")
-    text = payload.get("text", "")
-    sys.stdout.write(json.dumps(evaluate(type_key, text), ensure_ascii=False))
+    res = evaluate_request(payload)
+    sys.stdout.write(json.dumps(res, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
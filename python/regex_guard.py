@@ -0,0 +1,184 @@
+import signal, threading, time
+
+try:
+    from re import _parser as sre_parse, _constants as sre_c
+except ImportError:  # Python < 3.11
+    import sre_parse, sre_constants as sre_c
+
+# =========================================================
+# PENJAGA REGEX ATURAN EYD (eyd_db.txt bisa diubah siapa saja)
+# =========================================================
+# - Saat load: pola berbentuk eksponensial ((a+)+, (\w+\s?)+, (a*)*) ditolak, lalu pola diuji
+#   dengan input "pompa" yang makin panjang (+ satu input panjang untuk pola kuadratik dst.).
+# - Saat jalan: batas waktu per aturan / per dokumen. Mesin re CPython memeriksa sinyal secara
+#   berkala, jadi SIGALRM (setitimer) memotong backtracking yang sedang berjalan; di luar thread
+#   utama (atau tanpa SIGALRM) batas hanya dicek di antara hit.
+
+PROBE_LIMIT = 0.02   # detik per input uji
+PROBE_LONG = 4096    # panjang input uji pola polinomial
+BIG_REPEAT = 100     # {n,m} dengan m sebesar ini diperlakukan seperti tak terbatas
+
+HAS_ALARM = hasattr(signal, "setitimer") and hasattr(signal, "SIGALRM")
+_REPEATS = (sre_c.MAX_REPEAT, sre_c.MIN_REPEAT)
+
+class RuleTimeout(Exception):
+    pass
+
+# Satu timer dipakai ulang: tiap blok hanya menyetel ulang timer (1 syscall), dibatalkan sekali
+# lewat cancel_alarm() setelah semua aturan. Sinyal yang tiba di luar blok / milik blok
+# sebelumnya diabaikan karena handler membandingkan dengan tenggat blok yang sedang aktif.
+_until = [None]
+_SLACK = 0.005
+
+def _on_alarm(signum, frame):
+    until = _until[0]
+    if until is None:
+        return
+    left = until - time.perf_counter()
+    if left <= _SLACK:
+        raise RuleTimeout()
+    signal.setitimer(signal.ITIMER_REAL, left)  # tiba terlalu awal: tunggu sisa waktunya
+
+def _can_alarm() -> bool:
+    return HAS_ALARM and threading.current_thread() is threading.main_thread()
+
+class Deadline:
+    """`with Deadline(detik):` blok dipotong dengan RuleTimeout setelah waktunya habis.
+
+    Kelas biasa, bukan @contextmanager: dipakai sekali per aturan per dokumen, jadi biayanya terasa.
+    `armed` False kalau blok tidak bisa dipotong (bukan thread utama / tanpa SIGALRM).
+    """
+    __slots__ = ("seconds", "armed")
+    _installed = False
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.armed = seconds > 0 and _can_alarm()
+
+    def __enter__(self):
+        if self.armed:
+            if not Deadline._installed:
+                signal.signal(signal.SIGALRM, _on_alarm)
+                Deadline._installed = True
+            _until[0] = time.perf_counter() + self.seconds
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        return self
+
+    def __exit__(self, *exc):
+        _until[0] = None
+        return False
+
+def cancel_alarm():
+    if _can_alarm():
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+# ---------------------------------------------------------
+# cek statis: pengulangan yang badannya bisa "dibagi" dengan banyak cara
+# ---------------------------------------------------------
+def _unbounded(op, av) -> bool:
+    return op in _REPEATS and (av[1] == sre_c.MAXREPEAT or av[1] > BIG_REPEAT)
+
+def _children(op, av):
+    if op in _REPEATS:
+        return [av[2]]
+    if op == sre_c.SUBPATTERN:
+        return [av[-1]]
+    if op == sre_c.BRANCH:
+        return av[1]
+    if op in (sre_c.ASSERT, sre_c.ASSERT_NOT):
+        return [av[1]]
+    if op == sre_c.GROUPREF_EXISTS:
+        return [p for p in av[1:] if p is not None]
+    return []  # POSSESSIVE_REPEAT / ATOMIC_GROUP tanpa backtracking: aman
+
+def _collapses(body) -> bool:
+    # badan = pengulangan tak terbatas + bagian opsional saja -> (X+)+ : 2^n cara membagi input
+    inner = False
+    for op, av in body:
+        if _unbounded(op, av):
+            inner = True
+        elif op == sre_c.SUBPATTERN and _collapses(av[-1]):
+            inner = True
+        elif op == sre_c.BRANCH and any(_collapses(alt) for alt in av[1]):
+            inner = True
+        elif sre_parse.SubPattern(body.state, [(op, av)]).getwidth()[0] > 0:
+            return False
+    return inner
+
+def nested_quantifier(parsed):
+    """Potongan pola berbentuk eksponensial, atau None."""
+    for op, av in parsed:
+        if _unbounded(op, av) and _collapses(av[2]):
+            return "kuantifier bersarang"
+        for sub in _children(op, av):
+            found = nested_quantifier(sub)
+            if found:
+                return found
+    return None
+
+# ---------------------------------------------------------
+# cek dinamis: input "pompa" (huruf/literal pola diulang, diakhiri karakter yang menggagalkan)
+# ---------------------------------------------------------
+def _literals(parsed, out):
+    for op, av in parsed:
+        if op == sre_c.LITERAL:
+            out.append(chr(av))
+        elif op == sre_c.IN:
+            for iop, iav in av:
+                if iop == sre_c.LITERAL:
+                    out.append(chr(iav))
+                elif iop == sre_c.RANGE:
+                    out.append(chr(iav[0]))
+        for sub in _children(op, av):
+            _literals(sub, out)
+    return out
+
+def _pumps(parsed):
+    lits = list(dict.fromkeys(c for c in _literals(parsed, []) if c.isprintable()))[:4]
+    base = ["a", " ", "a ", "aa", "A", "1"] + lits + [c + " " for c in lits[:2]]
+    return list(dict.fromkeys(base))
+
+def _slow(rx, text: str, limit: float) -> bool:
+    t0 = time.perf_counter()
+    try:
+        with Deadline(limit * 2):
+            for _ in rx.finditer(text):
+                pass
+    except RuleTimeout:
+        return True
+    return time.perf_counter() - t0 > limit
+
+def probe(rx, parsed, limit: float = PROBE_LIMIT):
+    """Input uji yang membuat pola lambat, atau None. Lambat harus terulang (bukan jeda GC sesaat)."""
+    try:
+        return _probe(rx, parsed, limit)
+    finally:
+        cancel_alarm()
+
+def _probe(rx, parsed, limit: float):
+    for pump in _pumps(parsed):
+        # panjang naik pelan: pola eksponensial sudah lambat di sini sebelum biayanya meledak
+        for n in range(4, 68, 4):
+            text = pump * n + "!"
+            if _slow(rx, text, limit) and _slow(rx, text, limit):
+                return f"lambat pada input {pump!r} x {n}"
+        # input panjang juga dinaikkan bertahap (x2): tanpa SIGALRM (muat ulang di thread latar)
+        # pola kubik dst. pada 4096 karakter langsung bisa berjalan bermenit-menit
+        n = 128
+        while n <= PROBE_LONG:
+            text = pump * (n // len(pump)) + "!"
+            if _slow(rx, text, limit * 5) and _slow(rx, text, limit * 5):
+                return f"lambat pada input {pump!r} x {n // len(pump)}"
+            n *= 2
+    return None
+
+def check_pattern(rx):
+    """Alasan menolak regex terkompilasi (bentuk eksponensial / lambat saat diuji), atau None."""
+    try:
+        parsed = sre_parse.parse(rx.pattern, rx.flags)
+    except Exception:
+        return None  # sudah lolos re.compile; parser internal berbeda versi -> lewati cek statis
+    reason = nested_quantifier(parsed)
+    if reason:
+        return reason
+    return probe(rx, parsed)
@@ -0,0 +1,178 @@
+import os, time, json, hashlib, sqlite3, threading
+from collections import OrderedDict
+
+# =========================================================
+# CACHE HASIL EVALUASI (content-addressed: hash teks ternormalisasi + tipe + versi kamus)
+# =========================================================
+
+def cache_key(type_key: str, cleaned: str, version: str) -> str:
+    h = hashlib.sha256()
+    h.update(version.encode("utf-8"))
+    h.update(b"\0")
+    h.update((type_key or "").encode("utf-8"))
+    h.update(b"\0")
+    h.update(cleaned.encode("utf-8"))
+    return h.hexdigest()
+
+class ResultCache:
+    """LRU in-process berbatas ukuran + TTL, dengan counter hit/miss.
+
+    Versi kamus ikut di kunci; kalau versi berubah, isi lama dibuang sekaligus.
+    """
+
+    def __init__(self, max_items: int = 512, ttl: float = 3600.0, store=None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.store = store  # lapisan kedua opsional (mis. SqliteResultCache), dibagi antar worker
+        self.version = None
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = self.store_hits = 0
+
+    def _check_version(self, version: str):
+        if version != self.version:
+            self._items.clear()
+            self.version = version
+            if self.store is not None:
+                self.store.purge_other_versions(version)
+
+    def get(self, key: str, version: str):
+        with self._lock:
+            self._check_version(version)
+            it = self._items.get(key)
+            if it is not None:
+                created, value = it
+                if self.ttl <= 0 or time.time() - created < self.ttl:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+                self.expired += 1
+        if self.store is not None:
+            value = self.store.get(key, version, self.ttl)
+            if value is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.store_hits += 1
+                    self._put_mem(key, value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put_mem(self, key, value):
+        self._items[key] = (time.time(), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, key: str, version: str, value):
+        with self._lock:
+            self._check_version(version)
+            if self.max_items > 0:
+                self._put_mem(key, value)
+        if self.store is not None:
+            self.store.put(key, version, value)
+
+    def stats(self):
+        total = self.hits + self.misses
+        out = {
+            "size": len(self._items),
+            "max_items": self.max_items,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "version": self.version,
+        }
+        if self.store is not None:
+            out["store"] = {"path": self.store.path, "hits": self.store_hits}
+        return out
+
+class SqliteResultCache:
+    """Cache on-disk bersama (SQLite) untuk beberapa proses worker; LRU via kolom accessed."""
+
+    def __init__(self, path: str, max_rows: int = 20000):
+        self.path = path
+        self.max_rows = max_rows
+        self._puts = 0
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, version TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str, ttl: float):
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT created, value FROM results WHERE key = ? AND version = ?", (key, version)
+                ).fetchone()
+                if row is None:
+                    return None
+                if ttl > 0 and now - row[0] >= ttl:
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    return None
+                self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            return json.loads(row[1])
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def put(self, key: str, version: str, value):
+        now = time.time()
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, version, created, accessed, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, version, now, now, json.dumps(value, ensure_ascii=False)),
+                )
+                self._puts += 1
+                # pangkas berkala, bukan tiap put
+                if self._puts % 64 == 0:
+                    self._trim()
+        except sqlite3.Error:
+            pass
+
+    def _trim(self):
+        n = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if n > self.max_rows:
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                (n - self.max_rows,),
+            )
+
+    def purge_other_versions(self, version: str):
+        try:
+            with self._lock:
+                self._db.execute("DELETE FROM results WHERE version != ?", (version,))
+        except sqlite3.Error:
+            pass
+
+def cache_from_env():
+    def num(name, default, cast=int):
+        try:
+            return cast(os.environ.get(name, "") or default)
+        except ValueError:
+            return default
+
+    store = None
+    db_path = (os.environ.get("EVAL_CACHE_DB") or "").strip()
+    if db_path:
+        try:
+            store = SqliteResultCache(db_path, max_rows=num("EVAL_CACHE_DB_MAX", 20000))
+        except sqlite3.Error:
+            store = None
+    return ResultCache(
+        max_items=num("EVAL_CACHE_SIZE", 512),
+        ttl=num("EVAL_CACHE_TTL", 3600.0, float),
+        store=store,
+    )
@@ -0,0 +1,152 @@
+import sys, os, math, struct
+from array import array
+from collections import Counter
+
+from kbbi_index import read_wordlist_csv, file_sha256
+
+# =========================================================
+# MODEL TRIGRAM HURUF UNTUK "ASAL KETIK" (dilatih dari kbbi_wordlist.csv)
+# =========================================================
+# log P(huruf | dua huruf sebelumnya) dari semua kata KBBI, add-k smoothing. Skor satu token =
+# rata-rata log-prob per transisi (termasuk batas awal & akhir kata). Kata Indonesia, juga yang
+# berimbuhan dan nama diri, tersusun dari trigram yang lazim di KBBI; ketikan asal ("asdjkasd",
+# "jdjdjd", "qwerty") memuat banyak trigram yang hampir tidak pernah muncul.
+#
+# Alfabet (V = 28): 0 = batas kata (awal/akhir, spasi, '-', '\''), 1..26 = a..z, 27 = huruf lain (é, ß, ...).
+# Format file (little-endian):
+#   MAGIC (8 byte)
+#   HEADER: csv_mtime_ns (u64), csv_size (u64), sha256 csv (32 byte), jumlah kata (u32), V (u32), SCALE (u32)
+#   TABLE: V^3 x i16 = round(log P(c | a b) * SCALE), indeks (a * V + b) * V + c
+
+MAGIC = b"KBBITRI1"
+HEADER = struct.Struct("<QQ32sIII")
+V = 28
+V2 = V * V
+SCALE = 1000
+SMOOTHING = 0.1
+
+class _Codes(dict):
+    # str.translate: huruf di luar tabel (mis. huruf non-Latin) -> "huruf lain"
+    def __missing__(self, key):
+        return chr(V - 1) if chr(key).isalpha() else "\0"
+
+CODES = _Codes({ord(c): "\0" for c in " -'"})
+for _i, _c in enumerate("abcdefghijklmnopqrstuvwxyz", 1):
+    CODES[ord(_c)] = CODES[ord(_c.upper())] = chr(_i)
+
+def encode(word: str) -> bytes:
+    """Kata -> kode alfabet model (bytes), diakhiri batas kata."""
+    return word.translate(CODES).encode("latin-1") + b"\0"
+
+def build_model(csv_path: str, path: str):
+    st = os.stat(csv_path)
+    digest = file_sha256(csv_path)
+    words = read_wordlist_csv(csv_path)
+    tri = Counter()
+    for w in words:
+        idx = 0
+        for c in encode(w):
+            idx = (idx % V2) * V + c
+            tri[idx] += 1
+    hist = Counter()
+    for idx, n in tri.items():
+        hist[idx // V] += n
+    table = array("h", bytes(2 * V * V2))
+    for h in range(V2):
+        total = hist[h] + SMOOTHING * V
+        for c in range(V):
+            table[h * V + c] = max(-32768, round(math.log((tri[h * V + c] + SMOOTHING) / total) * SCALE))
+    if sys.byteorder != "little":
+        table.byteswap()
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(st.st_mtime_ns, st.st_size, digest, len(words), V, SCALE))
+        f.write(table.tobytes())
+    # atomic: worker lain yang membuka file tidak pernah melihat file setengah jadi
+    os.replace(tmp, path)
+    return len(words), len(tri)
+
+class SmashModel:
+    """Skor kelaziman ejaan per token: `score(kata)` -> rata-rata log-prob per huruf (makin kecil makin aneh)."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("bukan file model trigram")
+        self.mtime_ns, self.size, self.sha256, self.words, v, scale = HEADER.unpack_from(data, len(MAGIC))
+        if v != V:
+            raise ValueError(f"alfabet model {v}, bukan {V}")
+        table = array("h")
+        table.frombytes(data[len(MAGIC) + HEADER.size:])
+        if len(table) != V * V2:
+            raise ValueError("tabel model terpotong")
+        if sys.byteorder != "little":
+            table.byteswap()
+        # float per entri: penjumlahan di loop per huruf tanpa pembagian (tabel kecil, ~22 ribu entri)
+        self._logp = array("d", (x / scale for x in table))
+
+    def score(self, word: str) -> float:
+        logp, idx, total = self._logp, 0, 0.0
+        codes = encode(word)
+        for c in codes:
+            idx = (idx % V2) * V + c
+            total += logp[idx]
+        return total / len(codes)
+
+    def scores(self, words):
+        """[skor, ...] untuk banyak token sekaligus (satu dokumen)."""
+        logp, out = self._logp, []
+        for w in words:
+            idx, total = 0, 0.0
+            codes = encode(w)
+            for c in codes:
+                idx = (idx % V2) * V + c
+                total += logp[idx]
+            out.append(total / len(codes))
+        return out
+
+    def is_fresh(self, csv_path: str) -> bool:
+        try:
+            st = os.stat(csv_path)
+        except OSError:
+            return True
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.size:
+            return True
+        return st.st_size == self.size and file_sha256(csv_path) == self.sha256
+
+def open_model(path: str, csv_path: str):
+    """Model jika ada & segar; None jika perlu dibangun ulang."""
+    if not os.path.exists(path):
+        return None
+    try:
+        model = SmashModel(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    return model if model.is_fresh(csv_path) else None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    this_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(this_dir, "kbbi_wordlist.csv")
+    path = os.path.join(this_dir, "kbbi_wordlist.tri")
+    words = [a for a in argv if not a.startswith("--")]
+    if words:
+        # skor kata tertentu, untuk menyetel EVAL_SMASH_THRESHOLD
+        model = open_model(path, csv_path)
+        if model is None:
+            build_model(csv_path, path)
+            model = SmashModel(path)
+        for w, s in zip(words, model.scores(words)):
+            print(f"{s:8.3f}  {w}")
+        return
+    if "--if-stale" in argv and open_model(path, csv_path) is not None:
+        print("model trigram sudah terbaru:", path)
+        return
+    n, m = build_model(csv_path, path)
+    print(f"model trigram dibuat: {path} ({n} kata, {m} trigram)")
+
+if __name__ == "__main__":
+    main()
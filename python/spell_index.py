@@ -0,0 +1,233 @@
+import sys, os, mmap, struct
+
+from kbbi_index import read_wordlist_csv, file_sha256
+
+# =========================================================
+# INDEX SARAN EJAAN (deletion neighbourhood ala SymSpell, dibaca via mmap)
+# =========================================================
+# Setiap kata KBBI menyumbang semua varian "hapus <= MAX_DIST huruf" dari PREFIX_LEN huruf
+# pertamanya. Kata salah ketik menghasilkan varian hapus yang sama dengan kata benarnya, jadi
+# kandidat didapat dari beberapa lookup (tanpa memindai 80 ribu kata), lalu diverifikasi
+# dengan jarak edit (Damerau/OSA).
+#
+# Format file (little-endian):
+#   MAGIC (8 byte)
+#   HEADER: csv_mtime_ns (u64), csv_size (u64), sha256 csv (32 byte),
+#           jumlah kata N (u32), jumlah kunci M (u32), jumlah posting P (u32), PREFIX_LEN (u8), MAX_DIST (u8)
+#   WORD_OFF: (N+1) x u32, KEY_OFF: (M+1) x u32, POST_OFF: (M+1) x u32 (indeks ke POSTINGS)
+#   POSTINGS: P x u32 (nomor kata << 2 | jumlah huruf yang dihapus dari kata untuk kunci ini)
+#   WORDS, KEYS: UTF-8 terurut (urutan byte), tanpa pemisah
+
+MAGIC = b"KBBISYM1"
+HEADER = struct.Struct("<QQ32sIIIBB2x")
+PREFIX_LEN = 7
+MAX_DIST = 2
+# kandidat jarak 2 yang diverifikasi per kata (urut peringkat). Kata ber-awalan umum (meng-, peng-)
+# bisa punya ribuan kandidat; yang terpotong hanya kandidat berperingkat rendah.
+VERIFY_BUDGET = 300
+# salah ketik paling sering: huruf terlewat ("kta" -> "kata"), lalu huruf lebih ("pergii"),
+# baru huruf salah; selisih panjang (kandidat - kata) -> urutan
+_LEN_PREF = {1: 0, -1: 1, 0: 2}
+
+def deletes(word: str, max_dist: int = MAX_DIST):
+    """{varian hapus: jumlah huruf yang dihapus (minimum)}"""
+    out, frontier = {word: 0}, {word}
+    for level in range(1, max_dist + 1):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i+1:])
+        nxt -= out.keys()
+        for w in nxt:
+            out[w] = level
+        frontier = nxt
+    return out
+
+def _within(a: str, b: str, k: int) -> bool:
+    # jarak OSA <= k? awalan sama dilewati, lalu coba ganti/hapus/sisip/tukar (k kecil: cabang sedikit)
+    i, n = 0, min(len(a), len(b))
+    while i < n and a[i] == b[i]:
+        i += 1
+    if i:
+        a, b = a[i:], b[i:]
+    if abs(len(a) - len(b)) > k:
+        return False
+    if not a or not b:
+        return True
+    if k == 0:
+        return False
+    swap = len(a) > 1 and len(b) > 1 and a[0] == b[1] and a[1] == b[0]
+    if k == 1:
+        # satu edit tersisa: cukup bandingkan sisa string (di C), tanpa rekursi
+        return a[1:] == b[1:] or a[1:] == b or a == b[1:] or (swap and a[2:] == b[2:])
+    if swap and _within(a[2:], b[2:], k - 1):
+        return True
+    return _within(a[1:], b[1:], k - 1) or _within(a[1:], b, k - 1) or _within(a, b[1:], k - 1)
+
+def edit_distance(a: str, b: str, max_dist: int) -> int:
+    """Jarak Damerau-Levenshtein (optimal string alignment), dipotong: > max_dist -> max_dist + 1."""
+    for d in range(max_dist + 1):
+        if _within(a, b, d):
+            return d
+    return max_dist + 1
+
+def build_index(csv_path: str, idx_path: str):
+    st = os.stat(csv_path)
+    digest = file_sha256(csv_path)
+    words = sorted(read_wordlist_csv(csv_path), key=lambda w: w.encode("utf-8"))
+
+    table = {}
+    for wid, w in enumerate(words):
+        for k, level in deletes(w[:PREFIX_LEN]).items():
+            table.setdefault(k.encode("utf-8"), []).append(wid << 2 | level)
+    keys = sorted(table)
+    wblob = [w.encode("utf-8") for w in words]
+
+    n, m = len(wblob), len(keys)
+    p = sum(len(v) for v in table.values())
+    base = len(MAGIC) + HEADER.size + 4 * ((n + 1) + 2 * (m + 1) + p)
+
+    word_off, pos = [], base
+    for w in wblob:
+        word_off.append(pos)
+        pos += len(w)
+    word_off.append(pos)
+    key_off = []
+    for k in keys:
+        key_off.append(pos)
+        pos += len(k)
+    key_off.append(pos)
+    post_off, postings = [0], []
+    for k in keys:
+        postings.extend(table[k])
+        post_off.append(len(postings))
+
+    tmp = f"{idx_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(st.st_mtime_ns, st.st_size, digest, n, m, p, PREFIX_LEN, MAX_DIST))
+        for arr in (word_off, key_off, post_off, postings):
+            f.write(struct.pack("<%dI" % len(arr), *arr))
+        f.write(b"".join(wblob))
+        f.write(b"".join(keys))
+    # atomic: worker lain yang membuka file tidak pernah melihat file setengah jadi
+    os.replace(tmp, idx_path)
+    return n, m
+
+class SpellIndex:
+    """Saran kata KBBI untuk kata tak dikenal: `suggest(kata)` -> [(kata_kbbi, jarak), ...]."""
+
+    def __init__(self, idx_path: str):
+        with open(idx_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError("bukan file index saran ejaan")
+        (self.mtime_ns, self.size, self.sha256, self.n, self.m, p,
+         self.prefix_len, self.max_dist) = HEADER.unpack_from(self._mm, len(MAGIC))
+        view = memoryview(self._mm)
+        pos = len(MAGIC) + HEADER.size
+        arrays = []
+        for count in (self.n + 1, self.m + 1, self.m + 1, p):
+            arrays.append(view[pos:pos + 4 * count].cast("I"))
+            pos += 4 * count
+        self._word_off, self._key_off, self._post_off, self._post = arrays
+
+    def word(self, wid: int) -> str:
+        return self._mm[self._word_off[wid]:self._word_off[wid + 1]].decode("utf-8")
+
+    def _postings(self, key: bytes):
+        mm, off = self._mm, self._key_off
+        lo, hi = 0, self.m
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            cur = mm[off[mid]:off[mid + 1]]
+            if cur < key:
+                lo = mid + 1
+            elif cur > key:
+                hi = mid
+            else:
+                return self._post[self._post_off[mid]:self._post_off[mid + 1]]
+        return ()
+
+    def _rank(self, wid: int, q0: int, q1: int, qlen: int):
+        # urutan seri antarkandidat berjarak sama, dari offset saja (tanpa decode): huruf awal sama,
+        # huruf akhir sama, lalu selisih panjang (lihat _LEN_PREF)
+        a, b = self._word_off[wid], self._word_off[wid + 1]
+        mm = self._mm
+        diff = b - a - qlen
+        return (mm[a] != q0, mm[b - 1] != q1, _LEN_PREF.get(diff, 3 + abs(diff)), wid)
+
+    def suggest(self, word: str, k: int = 3, max_dist=None):
+        """Maks. k saran dengan jarak terkecil: jarak 2 hanya dicari kalau tidak ada yang berjarak 1."""
+        q = word.lower()
+        max_dist = self.max_dist if max_dist is None else min(max_dist, self.max_dist)
+        if len(q) <= 4:
+            max_dist = min(max_dist, 1)  # kata pendek: jarak 2 hampir selalu kata lain
+        keys = deletes(q[:self.prefix_len], max_dist)
+
+        # jarak <= 1 pasti berbagi kunci dengan hapus <= 1 di kedua sisi: kandidatnya sedikit
+        near, far = set(), set()
+        for key, dq in keys.items():
+            for p in self._postings(key.encode("utf-8")):
+                if dq <= 1 and (p & 3) <= 1:
+                    near.add(p >> 2)
+                else:
+                    far.add(p >> 2)
+        qb = q.encode("utf-8")
+        q0, q1, qlen = (qb[0], qb[-1], len(qb)) if qb else (-1, -1, 0)
+        rank = lambda i: self._rank(i, q0, q1, qlen)
+
+        found = []
+        for wid in sorted(near, key=rank):
+            w = self.word(wid)
+            if w != q and _within(q, w, 1):
+                found.append((w, 1))
+        if len(q) > 4:
+            # huruf tertukar ("rumha") lebih mungkin salah ketik daripada huruf salah ("rumba")
+            qs = sorted(q)
+            found.sort(key=lambda x: len(x[0]) != len(q) or sorted(x[0]) != qs)
+        del found[k:]
+        if not found and max_dist >= 2:
+            # jarak 2: kandidat banyak, jadi verifikasi urut peringkat dan berhenti begitu cukup
+            off = self._word_off
+            cands = [i for i in near | far if abs(off[i + 1] - off[i] - qlen) <= 2]
+            for wid in sorted(cands, key=rank)[:VERIFY_BUDGET]:
+                w = self.word(wid)
+                if w != q and _within(q, w, 2):
+                    found.append((w, 2))
+                    if len(found) >= k:
+                        break
+        return found
+
+    def is_fresh(self, csv_path: str) -> bool:
+        try:
+            st = os.stat(csv_path)
+        except OSError:
+            return True
+        if st.st_mtime_ns == self.mtime_ns and st.st_size == self.size:
+            return True
+        return st.st_size == self.size and file_sha256(csv_path) == self.sha256
+
+def open_index(idx_path: str, csv_path: str):
+    """Index mmap jika ada & segar; None jika perlu dibangun ulang."""
+    if sys.byteorder != "little" or not os.path.exists(idx_path):
+        return None
+    try:
+        idx = SpellIndex(idx_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    return idx if idx.is_fresh(csv_path) else None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    this_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(this_dir, "kbbi_wordlist.csv")
+    idx_path = os.path.join(this_dir, "kbbi_wordlist.sym")
+    if "--if-stale" in argv and open_index(idx_path, csv_path) is not None:
+        print("index saran ejaan sudah terbaru:", idx_path)
+        return
+    n, m = build_index(csv_path, idx_path)
+    print(f"index saran ejaan dibuat: {idx_path} ({n} kata, {m} kunci)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# =========================================================
+# PROFIL PER TAHAP (opt-in): waktu dinding + jumlah panggilan per tahap & per aturan EYD
+# =========================================================
+
+class StageTimer:
+    """Pencatat waktu satu evaluasi; hasilnya masuk ke breakdown.meta.timing / metrik worker."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self.rules = {}
+        self.eyd_guard = None  # diisi eyd_rule_hits kalau ada aturan yang terpotong / nonaktif
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(self.stages, name, time.perf_counter() - t0)
+
+    def rule(self, rule_id: str, seconds: float, hits: int = 0):
+        self._add(self.rules, rule_id, seconds)[2] += hits
+
+    @staticmethod
+    def _add(table, key, seconds):
+        it = table.setdefault(key, [0.0, 0, 0])  # [detik, panggilan, hit]
+        it[0] += seconds
+        it[1] += 1
+        return it
+
+    def to_dict(self):
+        out = {
+            "total_ms": round((time.perf_counter() - self.t0) * 1000.0, 3),
+            "stages": {k: {"ms": round(v[0] * 1000.0, 3), "calls": v[1]} for k, v in self.stages.items()},
+            "eyd_rules": {
+                k: {"ms": round(v[0] * 1000.0, 3), "calls": v[1], "hits": v[2]} for k, v in self.rules.items()
+            },
+        }
+        if self.eyd_guard:
+            out["eyd_guard"] = self.eyd_guard
+        return out
+
+def stage(timer, name: str):
+    """`with stage(timer, "nama"):` -> no-op kalau profil tidak aktif (timer None)."""
+    return timer.stage(name) if timer is not None else nullcontext()
@@ -0,0 +1,110 @@
+import sys, os, time, json, random, argparse, threading
+
+# anggaran waktu aturan EYD diukur dengan jam dinding: di bawah GIL thread lain ikut "memakai"
+# anggaran itu, jadi aturan bisa terpotong (hasil berbeda karena beban, bukan karena balapan data)
+os.environ.setdefault("EYD_RULE_BUDGET_MS", "60000")
+os.environ.setdefault("EYD_DOC_BUDGET_MS", "600000")
+
+import poem_eval as pe
+from bench_eval import CorpusGenerator
+
+# =========================================================
+# UJI BEBAN THREAD: banyak thread menilai korpus yang sama bersamaan (Evaluator bersama, cache
+# hasil bersama, ENGINE diganti di tengah jalan); setiap hasil harus identik dengan hasil serial
+# =========================================================
+SIZES = [300, 3000, 12000]
+MODES = ("evaluator", "request", "fields")
+FIELDS = pe.parse_fields("score,subscores,eyd")
+
+def dump(res) -> str:
+    return json.dumps(res, ensure_ascii=False, sort_keys=True)
+
+def run_one(ev, mode: str, type_key: str, text: str):
+    if mode == "evaluator":
+        return ev.evaluate(type_key, text)
+    if mode == "request":
+        return pe.evaluate_request({"type": type_key, "text": text})
+    return pe.evaluate_request({"type": type_key, "text": text, "fields": sorted(FIELDS)})
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Uji evaluasi bersamaan: hasil tiap thread dibandingkan dengan hasil serial.")
+    ap.add_argument("--threads", type=int, default=8, help="jumlah thread penilai")
+    ap.add_argument("--rounds", type=int, default=3, help="putaran korpus per thread (urutan diacak per thread)")
+    ap.add_argument("--types", default="", help="tipe dipisah koma (default: semua VALID_TYPES)")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="ukuran dokumen (karakter), dipisah koma")
+    ap.add_argument("--seed", type=int, default=0, help="seed korpus & urutan")
+    ap.add_argument("--swap-ms", type=float, default=20.0,
+                    help="ganti ENGINE dengan Evaluator baru (isi sama, cache kosong) tiap sekian ms; 0 = tidak")
+    ap.add_argument("--switch-interval", type=float, default=1e-5,
+                    help="sys.setswitchinterval: makin kecil, thread makin sering bergantian di tengah evaluasi")
+    args = ap.parse_args(argv)
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()] or sorted(pe.VALID_TYPES)
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    gen = CorpusGenerator(args.seed)
+    docs = [(t, pe.norm_space(gen.generate(t, size))) for size in sizes for t in types]
+
+    # acuan: serial, satu thread, Evaluator yang sama
+    ev = pe.ENGINE
+    t0 = time.perf_counter()
+    expected = {}
+    for t, text in docs:
+        full = ev.evaluate(t, text)
+        expected[("evaluator", t, text)] = expected[("request", t, text)] = dump(full)
+        expected[("fields", t, text)] = dump(pe.select_fields(full, FIELDS))
+    serial = time.perf_counter() - t0
+
+    stop = threading.Event()
+    swaps = [0]
+
+    def swapper():
+        while not stop.wait(args.swap_ms / 1000):
+            pe.set_kbbi(pe.ENGINE.words, pe.ENGINE.kbbi_source, state=pe.DICT_FILES.get(pe.KBBI_CSV))
+            swaps[0] += 1
+
+    lock = threading.Lock()
+    calls, bad, errors = [0], [], []
+
+    def worker(i: int):
+        rnd = random.Random(args.seed * 1000 + i)
+        for _ in range(args.rounds):
+            order = [(rnd.choice(MODES), t, text) for t, text in docs]
+            rnd.shuffle(order)
+            for mode, t, text in order:
+                try:
+                    got = dump(run_one(ev if mode == "evaluator" else None, mode, t, text))
+                except Exception as e:
+                    with lock:
+                        errors.append(f"thread {i} {mode} {t}: {e!r}")
+                    continue
+                with lock:
+                    calls[0] += 1
+                    if got != expected[(mode, t, text)]:
+                        bad.append((i, mode, t, len(text)))
+
+    sys.setswitchinterval(args.switch_interval)
+    if args.swap_ms > 0:
+        threading.Thread(target=swapper, daemon=True).start()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - t0
+    stop.set()
+
+    gil = pe.thread_status()["gil"]
+    print(f"python {sys.version.split()[0]}, gil {gil}, {args.threads} thread x {args.rounds} putaran, {len(docs)} dokumen")
+    print(f"serial (acuan): {serial:.2f} s untuk {len(docs)} dokumen ({len(docs) / serial:.1f} dok/s)")
+    print(f"bersamaan: {calls[0]} evaluasi dalam {wall:.2f} s ({calls[0] / wall:.1f} dok/s), ENGINE diganti {swaps[0]}x")
+    print(f"cache hasil: {pe.get_result_cache().stats()}")
+    for msg in errors[:10]:
+        print("ERROR", msg)
+    for i, mode, t, n in bad[:10]:
+        print(f"BEDA thread {i} mode {mode} tipe {t} ({n} karakter)")
+    print(f"hasil berbeda: {len(bad)}, error: {len(errors)}")
+    return 1 if bad or errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())